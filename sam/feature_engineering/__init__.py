@@ -1,3 +1,4 @@
+from .calendar_cache import CalendarCache
 from .decompose_datetime import decompose_datetime, recode_cyclical_features
 from .rolling_features import BuildRollingFeatures
 from .lag_range import range_lag_column
@@ -8,6 +9,7 @@ from .simple_feature_engineering import SimpleFeatureEngineer
 
 
 __all__ = [
+    "CalendarCache",
     "decompose_datetime",
     "recode_cyclical_features",
     "BuildRollingFeatures",
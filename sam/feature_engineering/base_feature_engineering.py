@@ -1,6 +1,6 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import Callable, List
+from typing import Callable, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -47,6 +47,19 @@ class BaseFeatureEngineer(BaseEstimator, TransformerMixin, ABC):
         check_is_fitted(self, "_feature_names")
         return self._feature_names
 
+    def get_lookback(self) -> Optional[Tuple[int, pd.Timedelta]]:
+        """
+        The history that is needed to compute the features of a new row. Used by
+        `BaseTimeseriesRegressor.update_and_predict` to keep a history buffer.
+        Returns None by default, which means that the entire history is needed.
+
+        Returns
+        -------
+        tuple of (int, pd.Timedelta), or None:
+            the number of previous rows, and the time span before the new row, that are needed
+        """
+        return None
+
 
 class FeatureEngineer(BaseFeatureEngineer):
     """
@@ -110,3 +123,7 @@ class IdentityFeatureEngineer(BaseFeatureEngineer):
         if self.numeric_only:
             return X.select_dtypes(include=np.number)
         return X
+
+    def get_lookback(self) -> Tuple[int, pd.Timedelta]:
+        """No history is needed, since the features of a row only depend on that row"""
+        return 0, pd.Timedelta(0)
@@ -0,0 +1,170 @@
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Callable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray
+
+ArrayLike = Union[np.ndarray, ExtensionArray]
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "n_blocks", "nbytes", "max_bytes"])
+
+
+class CalendarCache:
+    """Least recently used cache of calendar components of regular datetime series
+
+    Decomposing timestamps into calendar components (hour, day of week, etcetera) is relatively
+    expensive, especially with timezone conversions, and is often repeated on mostly the same
+    timestamps, for example when retraining and predicting on a sliding window. This cache stores
+    the components of regular (equidistant) datetime series as blocks, keyed by the timezone,
+    frequency, start and length of the series. A series that is contained in a cached block with
+    the same timezone and frequency is served by slicing that block, instead of recomputing it.
+
+    Irregular series are never cached. When the total size of the blocks exceeds `max_bytes`,
+    the least recently used blocks are removed.
+
+    Parameters
+    ----------
+    max_bytes : int, optional (default=64 * 1024 ** 2)
+        The maximum total size of the cached blocks in bytes. 0 disables the cache.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from sam.feature_engineering import CalendarCache
+    >>> cache = CalendarCache()
+    >>> times = pd.Series(pd.date_range("2022-01-01", periods=48, freq="H"))
+    >>> hours = cache.get(times, "example.hour", lambda x: x.dt.hour)
+    >>> hours = cache.get(times.iloc[12:24], "example.hour", lambda x: x.dt.hour)
+    >>> cache.cache_info()
+    CacheInfo(hits=1, misses=1, n_blocks=1, nbytes=384, max_bytes=67108864)
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024**2):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._blocks = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_key(
+        timecol: pd.Series, timezone: Optional[str] = None
+    ) -> Optional[Tuple[str, int, int, int]]:
+        """The (timezone, frequency, start, length) of a regular series, or None if irregular"""
+        if not pd.api.types.is_datetime64_any_dtype(timecol) or timecol.size == 0:
+            return None
+        if timecol.isna().any():
+            return None
+        # asi8 are the UTC nanoseconds, also for timezone aware series
+        times = pd.DatetimeIndex(timecol).asi8
+        steps = np.diff(times)
+        if steps.size > 0 and (steps[0] <= 0 or np.any(steps != steps[0])):
+            return None
+        freq = int(steps[0]) if steps.size > 0 else 0
+        tz = str(timecol.dt.tz) if timezone is None else str(timezone)
+        return tz, freq, int(times[0]), times.size
+
+    @staticmethod
+    def _convert(timecol: pd.Series, timezone: Optional[str]) -> pd.Series:
+        """Converts a UTC or timezone naive (assumed UTC) series to `timezone`, if not None"""
+        if timezone is None:
+            return timecol
+        if timecol.dt.tz is None:
+            timecol = timecol.dt.tz_localize("UTC")
+        return timecol.dt.tz_convert(timezone)
+
+    def _find_block(self, name: str, key: Tuple[str, int, int, int]) -> Optional[ArrayLike]:
+        """Finds a cached block of component `name` that contains `key`, and marks it as most
+        recently used. Returns the part of the block that matches `key`, or None"""
+        tz, freq, start, length = key
+        for block_key, values in self._blocks.items():
+            block_name, block_tz, block_freq, block_start, block_length = block_key
+            if block_name != name or block_tz != tz:
+                continue
+            if length > 1 and block_freq != freq:
+                continue
+            offset = start - block_start
+            if block_freq == 0:
+                position = 0 if offset == 0 else -1
+            elif offset % block_freq == 0:
+                position = offset // block_freq
+            else:
+                continue
+            if position >= 0 and position + length <= block_length:
+                self._blocks.move_to_end(block_key)
+                return values[position : position + length]
+        return None
+
+    def _add_block(self, name: str, key: Tuple[str, int, int, int], values: ArrayLike) -> None:
+        """Adds a block, and removes the least recently used blocks if needed"""
+        nbytes = values.nbytes
+        if nbytes > self.max_bytes:
+            return
+        self._blocks[(name, *key)] = values
+        self._nbytes += nbytes
+        while self._nbytes > self.max_bytes:
+            _, removed = self._blocks.popitem(last=False)
+            self._nbytes -= removed.nbytes
+
+    def get(
+        self,
+        timecol: pd.Series,
+        name: str,
+        function: Callable[[pd.Series], pd.Series],
+        timezone: Optional[str] = None,
+    ) -> pd.Series:
+        """Gets a calendar component of a datetime series, from the cache if possible
+
+        Parameters
+        ----------
+        timecol : pd.Series
+            The datetime series
+        name : str
+            The name of the component. Must uniquely identify `function`, also between different
+            callers that share a cache, for example `"decompose_datetime.hour"`
+        function : callable
+            Function that computes the component from a datetime series, for example
+            `lambda x: x.dt.hour`
+        timezone : str, optional (default=None)
+            If not None, `timecol` must be in UTC or timezone naive (assumed to be UTC), and is
+            converted to this timezone before computing the component. The conversion is only
+            done when the component is not cached.
+
+        Returns
+        -------
+        pd.Series
+            The component, with the same index as `timecol`
+        """
+        key = self._get_key(timecol, timezone)
+        if key is None or self.max_bytes <= 0:
+            return function(self._convert(timecol, timezone))
+
+        with self._lock:
+            values = self._find_block(name, key)
+            if values is not None:
+                self.hits += 1
+                return pd.Series(values.copy(), index=timecol.index, name=timecol.name)
+            self.misses += 1
+
+        result = function(self._convert(timecol, timezone))
+        with self._lock:
+            self._add_block(name, key, result.array.copy())
+        return result
+
+    def cache_info(self) -> CacheInfo:
+        """The number of hits and misses, and the number and total size of the cached blocks"""
+        return CacheInfo(self.hits, self.misses, len(self._blocks), self._nbytes, self.max_bytes)
+
+    def clear(self) -> None:
+        """Removes all cached blocks, and resets the counters"""
+        with self._lock:
+            self._blocks.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+calendar_cache = CalendarCache()
@@ -5,6 +5,7 @@ from typing import List, Optional, Sequence, Tuple, Union, cast
 import numpy as np
 import pandas as pd
 import pytz
+from sam.feature_engineering.calendar_cache import calendar_cache
 from sam.logging_functions import log_dataframe_characteristics, log_new_columns
 
 logger = logging.getLogger(__name__)
@@ -159,19 +160,14 @@ def decompose_datetime(
         f"Decomposing datetime, number of dates: {len(timecol)}. " f"Components: {components}"
     )
 
-    # Fix timezone
-    if timezone is not None:
-        if timecol.dt.tz is not None:
-            if timecol.dt.tz != pytz.utc:
-                raise ValueError(
-                    "Data should either be in UTC timezone or it should have no"
-                    " timezone information (assumed to be in UTC)"
-                )
-        else:
-            timecol = timecol.dt.tz_localize("UTC")
-        timecol = timecol.dt.tz_convert(timezone)
+    # The timezone is converted by the cache, only for the components that are not cached
+    if timezone is not None and timecol.dt.tz is not None and timecol.dt.tz != pytz.utc:
+        raise ValueError(
+            "Data should either be in UTC timezone or it should have no"
+            " timezone information (assumed to be in UTC)"
+        )
 
-    result = _create_time_cols(result, components, timecol, column)
+    result = _create_time_cols(result, components, timecol, column, timezone)
 
     # do this before converting to cyclicals, as this has its own logging:
     log_new_columns(result, df)
@@ -407,7 +403,11 @@ def recode_onehot_features(
 
 
 def _create_time_cols(
-    df: pd.DataFrame, components: Sequence[str], timecol: pd.Series, prefix: str = ""
+    df: pd.DataFrame,
+    components: Sequence[str],
+    timecol: pd.Series,
+    prefix: str = "",
+    timezone: Optional[str] = None,
 ) -> pd.DataFrame:
     """Helper function to create all the neccessary time columns
 
@@ -421,11 +421,15 @@ def _create_time_cols(
         A pandas series containing the datetimes, used for making the time columns
     prefix : str
         Prefix of the newly created columns, usually the same as the original time column
+    timezone : str, optional (default=None)
+        If not None, the UTC or timezone naive `timecol` is converted to this timezone before
+        creating the time components
 
     Returns
     -------
     pd.DataFrame
-        The dataframe, which includes the time components
+        The dataframe, which includes the time components. Components of regular time series
+        are cached, see `sam.feature_engineering.CalendarCache`
 
     Raises
     ------
@@ -437,24 +441,28 @@ def _create_time_cols(
 
     custom_functions = ["secondofday", "week"]
     for component in components:
-        if component in custom_functions:
-            if component == "week":
-                df[prefix + "_" + component] = timecol.dt.isocalendar().week
-            elif component == "secondofday":
-                sec_in_min = 60
-                sec_in_hour: int = sec_in_min * 60
-                df[prefix + "_" + component] = (
-                    timecol.dt.hour * sec_in_hour
-                    + timecol.dt.minute * sec_in_min
-                    + timecol.dt.second
-                )
-        elif component in pandas_functions:
-            df[prefix + "_" + component] = getattr(timecol.dt, component)
-        else:
+        if component not in custom_functions and component not in pandas_functions:
             raise NotImplementedError(f"Component {component} not implemented")
+        df[prefix + "_" + component] = calendar_cache.get(
+            timecol,
+            f"decompose_datetime.{component}",
+            lambda timecol: _get_time_component(timecol, component),
+            timezone=timezone,
+        )
     return df
 
 
+def _get_time_component(timecol: pd.Series, component: str) -> pd.Series:
+    """Computes a single time component, see `_create_time_cols`"""
+    if component == "week":
+        return timecol.dt.isocalendar().week
+    if component == "secondofday":
+        sec_in_min = 60
+        sec_in_hour: int = sec_in_min * 60
+        return timecol.dt.hour * sec_in_hour + timecol.dt.minute * sec_in_min + timecol.dt.second
+    return getattr(timecol.dt, component)
+
+
 def _validate_and_prepare_components(
     df: pd.DataFrame,
     cols: Sequence[str],
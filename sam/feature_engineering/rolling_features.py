@@ -1,8 +1,11 @@
 import logging
-from typing import Any, Callable, List, Optional, Union
+import warnings
+from collections import deque
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
 from sam.logging_functions import log_dataframe_characteristics, log_new_columns
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.utils.validation import check_is_fitted
@@ -52,6 +55,582 @@ def _nfft_helper(
     return np.abs(ff)[1 : len(ff) // 2]
 
 
+def _rolling_fourier(values: np.ndarray, n: int, chunksize: int = 4096) -> np.ndarray:
+    """Computes the absolute rolling fourier coefficients of a 1d array in batches.
+
+    All windows of size `n` are created at once as a strided (zero-copy) view on `values`.
+    The spectrum is then computed with `np.fft.rfft` for `chunksize` windows at a time, so the
+    peak memory usage is bounded by `chunksize * n`, regardless of the length of `values`.
+    The result is identical to `multicol_output` with `fourier=True`: for each window, the
+    absolute coefficients 1 to n // 2 are returned, and the first `n - 1` rows are missing.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        1d array to compute the rolling fourier coefficients of.
+    n : int
+        window size in number of datapoints.
+    chunksize : int, optional
+        number of windows to transform in a single `rfft` call, by default 4096.
+
+    Returns
+    -------
+    np.ndarray
+        array of shape `(len(values), n // 2)` with the absolute fourier coefficients.
+    """
+    values = np.ascontiguousarray(values, dtype=float)
+    result = np.full((values.size, n // 2), np.nan)
+    if n < 2 or values.size < n:
+        return result
+
+    n_windows = values.size - n + 1
+    windows = np.lib.stride_tricks.as_strided(
+        values,
+        shape=(n_windows, n),
+        strides=(values.strides[0], values.strides[0]),
+        writeable=False,
+    )
+    for start in range(0, n_windows, chunksize):
+        stop = min(start + chunksize, n_windows)
+        # rfft returns coefficients 0 to n // 2, see multicol_output for why 0 is dropped
+        spectrum = np.fft.rfft(windows[start:stop], axis=1)
+        result[start + n - 1 : stop + n - 1, :] = np.absolute(spectrum[:, 1:])
+    return result
+
+
+def _ricker(points: float, a: float) -> np.ndarray:
+    """Ricker (mexican hat) wavelet of `points` points and width `a`
+
+    This is identical to the former `scipy.signal.ricker`, which was removed from scipy.
+    """
+    amplitude = 2 / (np.sqrt(3 * a) * (np.pi**0.25))
+    x_squared = (np.arange(0, points) - (points - 1.0) / 2) ** 2
+    return amplitude * (1 - x_squared / a**2) * np.exp(-x_squared / (2 * a**2))
+
+
+def _cwt_matrix(n: int, width: float) -> np.ndarray:
+    """Matrix that computes the continuous wavelet transform of a window of `n` points
+
+    Like the former `scipy.signal.cwt` with a ricker wavelet, the window is convolved in 'same'
+    mode with a ricker wavelet of `min(10 * width, n)` points. Since the convolution is linear
+    and the window size is fixed, it is written as an `(n, n)` matrix, so that
+    `matrix @ window` is the transform of `window`.
+    """
+    kernel = _ricker(min(10 * width, n), width)[::-1]
+    # Same mode starts the output at this position of the full convolution
+    start = (kernel.size - 1) // 2
+    k = np.arange(n)[:, None] + start - np.arange(n)[None, :]
+    inside = (k >= 0) & (k < kernel.size)
+    return np.where(inside, kernel[np.clip(k, 0, kernel.size - 1)], 0.0)
+
+
+def _rolling_cwt(
+    values: np.ndarray, n: int, widths: Sequence[float], chunksize: int = 4096
+) -> np.ndarray:
+    """Computes the rolling continuous wavelet transform of a 1d array in batches.
+
+    The transform matrices of all widths are built once and stacked, so every batch of
+    `chunksize` windows (a strided, zero-copy view on `values`) is transformed for all widths
+    with a single matrix multiplication. For every window, the `n` coefficients of the first
+    width come first, then those of the second width, etcetera. The first `n - 1` rows are
+    missing, and so are all coefficients of a window that contains a missing value.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        1d array to compute the rolling transform of.
+    n : int
+        window size in number of datapoints.
+    widths : sequence of float
+        the widths of the ricker wavelet.
+    chunksize : int, optional
+        number of windows to transform in a single matrix multiplication, by default 4096.
+
+    Returns
+    -------
+    np.ndarray
+        array of shape `(len(values), len(widths) * n)` with the coefficients.
+    """
+    values = np.ascontiguousarray(values, dtype=float)
+    result = np.full((values.size, len(widths) * n), np.nan)
+    if values.size < n:
+        return result
+
+    transform = np.vstack([_cwt_matrix(n, width) for width in widths]).T
+    n_windows = values.size - n + 1
+    windows = np.lib.stride_tricks.as_strided(
+        values,
+        shape=(n_windows, n),
+        strides=(values.strides[0], values.strides[0]),
+        writeable=False,
+    )
+    for start in range(0, n_windows, chunksize):
+        stop = min(start + chunksize, n_windows)
+        result[start + n - 1 : stop + n - 1, :] = windows[start:stop] @ transform
+    return result
+
+
+def _compensated_cumsum(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Cumulative sum over the first axis, with compensation for the rounding errors.
+
+    The cumulative sum is prepended with a row of zeros, so the sum of `values[a:b]` equals
+    `(total[b] - total[a]) + (compensation[b] - compensation[a])`. The compensation is
+    the running sum of the exact rounding error of every addition in `np.cumsum`, obtained
+    with the (Kahan-style) TwoSum error-free transformation. This way, the sum of a window
+    is accurate relative to the window itself, and not to the (much larger) running total.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d float array, without missing or infinite values.
+
+    Returns
+    -------
+    total : np.ndarray
+        the uncompensated cumulative sum, shape `(n_rows + 1, n_columns)`
+    compensation : np.ndarray
+        the cumulative rounding error of `total`, shape `(n_rows + 1, n_columns)`
+    """
+    total = np.zeros((values.shape[0] + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=total[1:])
+    previous, current = total[:-1], total[1:]
+    added = current - previous
+    error = (previous - (current - added)) + (values - added)
+    compensation = np.zeros_like(total)
+    np.cumsum(error, axis=0, out=compensation[1:])
+    return total, compensation
+
+
+def _variance_from_sums(
+    window_sum: np.ndarray, window_sum_sq: np.ndarray, n: int, std: bool = False
+) -> None:
+    """Turns the window sums into the sample variance (or std) of the windows, in-place"""
+    window_sum **= 2
+    window_sum /= n
+    np.subtract(window_sum_sq, window_sum, out=window_sum)
+    # Anything below the rounding error is a constant window, like in pandas
+    window_sum[window_sum <= 16 * np.finfo(float).eps * window_sum_sq] = 0
+    if n > 1:
+        window_sum /= n - 1
+        if std:
+            np.sqrt(window_sum, out=window_sum)
+    else:
+        window_sum[:] = np.nan
+
+
+def _prefix_sums(values: np.ndarray, rolling_types: Sequence[str]) -> dict:
+    """The prefix sums that are needed to compute all `rolling_types`, see `_rolling_prefix_sum`
+
+    The sums are computed once, and can be shared by all window sizes and rolling types.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d float array of shape `(n_rows, n_columns)`, without infinite values.
+    rolling_types : sequence of str
+        one or more of 'sum', 'mean', 'var', 'std', 'numpos'
+
+    Returns
+    -------
+    dict
+        the prefix sums, for `_window_from_prefix_sums`
+    """
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    sums = {"shape": values.shape, "has_missing": missing.any()}
+    if "numpos" in rolling_types:
+        sums["count"] = np.zeros((values.shape[0] + 1, values.shape[1]))
+        np.cumsum(values > 0, axis=0, out=sums["count"][1:])
+    if set(rolling_types) - {"numpos"}:
+        # Subtract the column mean, to prevent cancellation in the variance
+        with warnings.catch_warnings():
+            # Columns with only missing values give a warning, and an offset of 0
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            sums["offset"] = np.nan_to_num(np.nanmean(values, axis=0))
+        centered = np.where(missing, 0, values - sums["offset"])
+        sums["total"], sums["compensation"] = _compensated_cumsum(centered)
+        if set(rolling_types) & {"var", "std"}:
+            sums["total_sq"], sums["compensation_sq"] = _compensated_cumsum(centered**2)
+        sums["n_missing"] = np.zeros((values.shape[0] + 1, values.shape[1]), dtype=np.int64)
+        np.cumsum(missing, axis=0, out=sums["n_missing"][1:])
+    return sums
+
+
+def _window_from_prefix_sums(sums: dict, n: int, rolling_type: str) -> np.ndarray:
+    """Computes a rolling sum, mean, var, std or numpos of window size `n` from the prefix sums
+    of `_prefix_sums`"""
+    result = np.full(sums["shape"], np.nan)
+    if n > sums["shape"][0]:
+        return result
+    # All operations are done in-place on the part of the result that is not missing
+    out = result[n - 1 :]
+    if rolling_type == "numpos":
+        # Comparisons are exact, so there is no need for compensation
+        np.subtract(sums["count"][n:], sums["count"][:-n], out=out)
+        return result
+
+    total, compensation = sums["total"], sums["compensation"]
+    np.subtract(total[n:], total[:-n], out=out)
+    out += compensation[n:]
+    out -= compensation[:-n]
+    if rolling_type == "sum":
+        out += n * sums["offset"]
+    elif rolling_type == "mean":
+        out /= n
+        out += sums["offset"]
+    else:
+        total_sq, compensation_sq = sums["total_sq"], sums["compensation_sq"]
+        window_sum_sq = total_sq[n:] - total_sq[:-n]
+        window_sum_sq += compensation_sq[n:]
+        window_sum_sq -= compensation_sq[:-n]
+        _variance_from_sums(out, window_sum_sq, n, rolling_type == "std")
+
+    if sums["has_missing"]:
+        n_missing = sums["n_missing"]
+        out[(n_missing[n:] - n_missing[:-n]) > 0] = np.nan
+    return result
+
+
+def _rolling_prefix_sum(
+    values: np.ndarray, window_sizes: List[int], rolling_type: str
+) -> List[np.ndarray]:
+    """Computes a rolling sum, mean, var, std or numpos for multiple windows in one pass.
+
+    Instead of rolling over the data once for every window size, the prefix sums (and prefix
+    sums of squares) of all columns are computed once. The result for any window is then
+    the difference between two rows of the prefix sums. Like pandas, a window that contains a
+    missing value results in a missing value, and the first `window_size - 1` rows are missing.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d float array of shape `(n_rows, n_columns)`, without infinite values.
+    window_sizes : list of int
+        the window sizes in number of datapoints, all at least 1.
+    rolling_type : str
+        one of 'sum', 'mean', 'var', 'std', 'numpos'
+
+    Returns
+    -------
+    list of np.ndarray
+        one array of shape `(n_rows, n_columns)` for every window size.
+    """
+    sums = _prefix_sums(values, [rolling_type])
+    return [_window_from_prefix_sums(sums, n, rolling_type) for n in window_sizes]
+
+
+def _offset_nanoseconds(window_size: str) -> int:
+    """The length of a time offset like '1H' in nanoseconds
+
+    Numeric window sizes are refused here: `pd.Timedelta` would silently read a float like 2.0
+    as 2 nanoseconds, instead of 2 rows.
+    """
+    if isinstance(window_size, (float, np.floating)):
+        raise ValueError(f"window_size must be an integer or a time offset, got {window_size}")
+    return pd.Timedelta(window_size).value
+
+
+def _lagged_values(
+    values: np.ndarray, index: pd.Index, window_size: Union[int, str], difference: bool = False
+) -> np.ndarray:
+    """The values `window_size` rows or time ago, for every row of a 2d array
+
+    For an integer window size `n`, this is identical to `shift(n)`. For a time offset like
+    '1H', the positions are found with a single `searchsorted` over the DatetimeIndex, and the
+    last value at or before `index[i] - window_size` is used. This way, irregular timestamps
+    do not have to be made equidistant first. The same positions are used for numeric and
+    non-numeric values.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d float or object array of shape `(n_rows, n_columns)`
+    index : pd.Index
+        the index of the data. Must be a sorted DatetimeIndex if window_size is a time offset
+    window_size : int or str
+        the lag in number of rows, or a time offset like '1H'
+    difference : bool, optional
+        if True, return `values` minus the lagged values instead, like `diff(n)`.
+        By default False
+
+    Returns
+    -------
+    np.ndarray
+        array of the same shape and dtype as `values`, missing where there is no earlier value
+    """
+    if isinstance(window_size, (int, np.integer)):
+        positions = np.arange(len(index)) - window_size
+    elif isinstance(index, pd.DatetimeIndex):
+        times = index.asi8
+        offset = _offset_nanoseconds(window_size)
+        positions = np.searchsorted(times, times - offset, side="right") - 1
+    else:
+        raise ValueError("window_size can only be a time offset if X has a DatetimeIndex")
+    valid = (positions >= 0) & (positions < len(index))
+    result = np.full(values.shape, np.nan, dtype=values.dtype)
+    result[valid] = values[positions[valid]]
+    if difference:
+        # Only subtract where there is an earlier value, so object values never meet the NaN
+        result[valid] = values[valid] - result[valid]
+    return result
+
+
+def _window_starts(index: pd.Index, window_size: Union[int, str]) -> Tuple[np.ndarray, int]:
+    """The first row of the window ending at every row, like pandas rolling
+
+    For an integer window size `n`, the window of row `i` starts at row `i - n + 1` and all
+    `n` values must be present. For a time offset, the window of row `i` contains all rows
+    after `index[i] - window_size`, and a single row is enough, like in pandas.
+
+    Parameters
+    ----------
+    index : pd.Index
+        the index of the data. Must be a sorted DatetimeIndex if window_size is a time offset
+    window_size : int or str
+        window size in number of datapoints, or a time offset like '2H'
+
+    Returns
+    -------
+    starts : np.ndarray
+        the (inclusive) start position of the window of every row
+    min_periods : int
+        the minimum number of rows in a window
+    """
+    if isinstance(window_size, (int, np.integer)):
+        return np.maximum(np.arange(len(index)) - window_size + 1, 0), int(window_size)
+    if not isinstance(index, pd.DatetimeIndex):
+        raise ValueError("window_size can only be a time offset if X has a DatetimeIndex")
+    times = index.asi8
+    return np.searchsorted(times, times - _offset_nanoseconds(window_size), side="right"), 1
+
+
+def _rolling_trimmean(
+    values: np.ndarray,
+    starts: np.ndarray,
+    min_periods: int,
+    proportiontocut: float,
+    chunksize: int = 4096,
+) -> np.ndarray:
+    """Computes the rolling trimmed mean of a 1d array in batches.
+
+    The windows are grouped by their length, and every group is gathered into a 2d array of
+    `chunksize` windows at a time, which is sorted in a single call. Like
+    `scipy.stats.trim_mean`, `int(proportiontocut * length)` values are cut from both ends of
+    every sorted window, and the rest is averaged. Windows with less than `min_periods` values
+    are missing, like in pandas, and so are windows that contain a missing value, like in scipy
+    (with the default nan_policy='propagate'). The missing value is never trimmed away, even if
+    it would be sorted into the trimmed tail.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        1d float array to compute the rolling trimmed mean of.
+    starts : np.ndarray
+        the (inclusive) start of the window ending at every value, see `_window_starts`.
+    min_periods : int
+        the minimum number of values in a window.
+    proportiontocut : float
+        the proportion to cut from both ends of every window, in [0, 0.5).
+    chunksize : int, optional
+        number of windows to sort in a single call, by default 4096.
+
+    Returns
+    -------
+    np.ndarray
+        array of the same shape as `values` with the trimmed means.
+    """
+    values = np.asarray(values, dtype=float)
+    ends = np.arange(1, values.size + 1)
+    n_missing = np.concatenate([[0], np.cumsum(np.isnan(values))])
+    lengths = ends - starts
+    valid = (lengths >= min_periods) & (n_missing[ends] == n_missing[starts])
+
+    result = np.full(values.size, np.nan)
+    for length in np.unique(lengths[valid]):
+        rows = np.flatnonzero(valid & (lengths == length))
+        cut = int(proportiontocut * length)
+        offsets = np.arange(length)
+        for start in range(0, rows.size, chunksize):
+            chunk = rows[start : start + chunksize]
+            windows = np.sort(values[starts[chunk, None] + offsets], axis=1)
+            result[chunk] = windows[:, cut : length - cut].mean(axis=1)
+    return result
+
+
+class _RollingStream:
+    """Running state of a rolling function, used by `BuildRollingFeatures.partial_transform`
+
+    The last `max(window_sizes) + 1` rows are kept in a ring buffer. For every window size,
+    the sums, sums of squares, number of positive values and number of missing values are
+    updated when a row enters or leaves the window, and the minimum and maximum are kept in
+    monotonic deques. For 'ewm', only the running (decayed) weighted sum and sum of weights
+    are kept. The unshifted results of the last `lookback` rows are kept as well, so the
+    lookback can be applied to the new rows.
+
+    Parameters
+    ----------
+    rolling_type : str
+        one of `STREAMING_TYPES`
+    window_sizes : list of int
+        the window sizes in number of datapoints. Must be `[0]` if rolling_type is 'ewm'
+    n_columns : int
+        the number of columns in every row
+    lookback : int, optional
+        the number of rows the results are shifted by, by default 0
+    alpha : float, optional
+        the parameter alpha if rolling_type is 'ewm', by default 0.5
+    """
+
+    STREAMING_TYPES = ["lag", "diff", "sum", "mean", "var", "std", "numpos", "min", "max", "ewm"]
+
+    def __init__(
+        self,
+        rolling_type: str,
+        window_sizes: List[int],
+        n_columns: int,
+        lookback: int = 0,
+        alpha: float = 0.5,
+    ):
+        self.rolling_type = rolling_type
+        self.window_sizes = window_sizes
+        self.alpha = alpha
+        self.capacity = max(window_sizes) + 1
+        self.buffer = np.full((self.capacity, n_columns), np.nan)
+        self.n_rows = 0
+        self.offset = None
+        shape = (len(window_sizes), n_columns)
+        self.sums = np.zeros(shape)
+        self.sums_sq = np.zeros(shape)
+        self.n_positive = np.zeros(shape, dtype=np.int64)
+        self.n_missing = np.zeros(shape, dtype=np.int64)
+        self.extrema = [[deque() for _ in range(n_columns)] for _ in window_sizes]
+        self.ewm_sum = np.zeros(n_columns)
+        self.ewm_weight = np.zeros(n_columns)
+        self.history = deque(maxlen=lookback + 1)
+
+    def _value_ago(self, k: int) -> Optional[np.ndarray]:
+        """The row that was added `k` rows before the last one, or None if there is none"""
+        if k >= self.n_rows:
+            return None
+        return self.buffer[(self.n_rows - 1 - k) % self.capacity]
+
+    def initialize_ewm(self, values: np.ndarray) -> None:
+        """Sets the ewm state to the state after adding all rows of `values` at once"""
+        decay = 1 - self.alpha
+        observed = ~np.isnan(values)
+        weights = decay ** np.arange(values.shape[0] - 1, -1, -1, dtype=float)[:, None]
+        self.ewm_sum = (weights * np.where(observed, values, 0)).sum(axis=0)
+        self.ewm_weight = (weights * observed).sum(axis=0)
+
+    def _update_ewm(self, row: np.ndarray) -> np.ndarray:
+        """Like pandas ewm with adjust=True: missing values are skipped, but do decay the rest"""
+        decay = 1 - self.alpha
+        observed = ~np.isnan(row)
+        self.ewm_sum = decay * self.ewm_sum + np.where(observed, row, 0)
+        self.ewm_weight = decay * self.ewm_weight + observed
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.ewm_weight > 0, self.ewm_sum / self.ewm_weight, np.nan)
+
+    def _update_counts(self, i: int, row: np.ndarray, leaving: Optional[np.ndarray]) -> None:
+        """Adds `row` to the running sums of window `i`, and removes `leaving` from them"""
+        for values, sign in [(row, 1), (leaving, -1)]:
+            if values is None:
+                continue
+            missing = np.isnan(values)
+            centered = np.where(missing, 0, values - self.offset)
+            self.n_missing[i] += sign * missing
+            with np.errstate(invalid="ignore"):
+                self.n_positive[i] += sign * (values > 0)
+            self.sums[i] += sign * centered
+            self.sums_sq[i] += sign * centered**2
+
+    def _refresh_counts(self) -> None:
+        """Recomputes the running sums from the ring buffer, to stop rounding errors adding up"""
+        for i, n in enumerate(self.window_sizes):
+            positions = (self.n_rows - 1 - np.arange(min(n, self.n_rows))) % self.capacity
+            window = self.buffer[positions]
+            missing = np.isnan(window)
+            centered = np.where(missing, 0, window - self.offset)
+            self.n_missing[i] = missing.sum(axis=0)
+            with np.errstate(invalid="ignore"):
+                self.n_positive[i] = (window > 0).sum(axis=0)
+            self.sums[i] = centered.sum(axis=0)
+            self.sums_sq[i] = (centered**2).sum(axis=0)
+
+    def _update_extrema(self, i: int, n: int, row: np.ndarray) -> np.ndarray:
+        """Updates the monotonic deques of window `i`, and returns the minimum or maximum"""
+        t = self.n_rows - 1
+        keep = np.less if self.rolling_type == "max" else np.greater
+        result = np.empty(row.size)
+        for column, value in enumerate(row):
+            extrema = self.extrema[i][column]
+            if not np.isnan(value):
+                while extrema and not keep(value, extrema[-1][1]):
+                    extrema.pop()
+                extrema.append((t, value))
+            while extrema and extrema[0][0] <= t - n:
+                extrema.popleft()
+            result[column] = extrema[0][1] if extrema else np.nan
+        return result
+
+    def _window_result(self, i: int, n: int, row: np.ndarray) -> np.ndarray:
+        """Updates window `i` of size `n` with `row`, and returns the (unshifted) result"""
+        leaving = self._value_ago(n)
+        if self.rolling_type == "lag":
+            return row.copy() if n == 0 else (leaving if leaving is not None else np.nan)
+        if self.rolling_type == "diff":
+            return row - leaving if leaving is not None else np.nan
+        self._update_counts(i, row, leaving)
+        if self.rolling_type == "numpos":
+            # Like pandas, missing values are simply not positive
+            return self.n_positive[i] if self.n_rows >= n else np.nan
+        if self.rolling_type in ["min", "max"]:
+            result = self._update_extrema(i, n, row)
+        else:
+            result = self.sums[i].copy()
+            if self.rolling_type == "sum":
+                result += n * self.offset
+            elif self.rolling_type == "mean":
+                result = result / n + self.offset
+            else:
+                _variance_from_sums(result, self.sums_sq[i].copy(), n, self.rolling_type == "std")
+        if self.n_rows < n:
+            return np.nan
+        return np.where(self.n_missing[i] > 0, np.nan, result)
+
+    def update(self, row: np.ndarray) -> np.ndarray:
+        """Adds a single row, and returns the results of all window sizes for the row.
+
+        Parameters
+        ----------
+        row : np.ndarray
+            1d float array with one value for every column
+
+        Returns
+        -------
+        np.ndarray
+            array of shape `(len(window_sizes), n_columns)`, shifted by `lookback` rows
+        """
+        row = np.asarray(row, dtype=float)
+        if self.offset is None:
+            # Subtract the first values, to prevent cancellation in the variance
+            self.offset = np.nan_to_num(row)
+        self.n_rows += 1
+        self.buffer[(self.n_rows - 1) % self.capacity] = row
+        if self.rolling_type == "ewm":
+            result = self._update_ewm(row)[None, :]
+        else:
+            result = np.full((len(self.window_sizes), row.size), np.nan)
+            for i, n in enumerate(self.window_sizes):
+                result[i] = self._window_result(i, n, row)
+            if self.n_rows % self.capacity == 0:
+                self._refresh_counts()
+        self.history.append(result)
+        if len(self.history) < self.history.maxlen:
+            return np.full(result.shape, np.nan)
+        return self.history[0]
+
+
 def multicol_output(
     arr: np.ndarray,
     n: int,
@@ -135,6 +714,13 @@ def multicol_output(
     return pd.DataFrame(helper.series)
 
 
+def _generate_shard(transformer: "BuildRollingFeatures", X: pd.DataFrame) -> np.ndarray:
+    """Generates the new features of a subset of the columns, used to parallelize transform"""
+    out = transformer._allocate_output(X, len(transformer._get_new_feature_names(X.columns)))
+    transformer._generate_new_features(X, out)
+    return out
+
+
 class BuildRollingFeatures(BaseEstimator, TransformerMixin):
     """Applies some rolling function to a pandas dataframe
 
@@ -159,10 +745,14 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
     Parameters
     ----------
     window_size: array-like, shape = (n_outputs, ), optional (default=None)
-        vector of values to shift. Ignored when rolling_type is ewm
+        vector of values to shift. Ignored when rolling_type is ewm, unless it is a timeoffset.
         if integer, the window size is fixed, and the timestamps are assumed to be uniform.
+        Floats like 2.0 are not allowed, except for ewm, where numeric window sizes are ignored.
         If string of timeoffset (for example '1H'), the input dataframe must have a DatetimeIndex.
-        timeoffset is not supported for rolling_type 'lag', 'fourier', 'ewm', 'diff'!
+        For 'lag' and 'diff', a timeoffset uses the last value at or before that time ago, so
+        irregular timestamps do not need to be made equidistant first. For 'ewm', a timeoffset
+        is used as the halflife of the decay, with the DatetimeIndex as the times of the samples.
+        timeoffset is not supported for rolling_type 'fourier' and 'cwt'!
     lookback: number type, optional (default=1)
         the features that are built will be shifted by this value
         If more than 0, this prevents leakage
@@ -178,9 +768,11 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
         if rolling_type is 'ewm', this is the parameter alpha used for weighing the samples.
         The current sample weighs alpha, the previous sample weighs alpha*(1-alpha), the
         sample before that weighs alpha*(1-alpha)^2, etcetera. Must be in (0, 1]
-    width: numeric, optional (default=1)
+    width: numeric or array-like, optional (default=1)
         if rolling_type is 'cwt', the wavelet transform uses a ricker signal. This parameter
-        defines the width of that signal
+        defines the width of that signal. If multiple widths are given, they are all computed
+        in the same pass, and the width is added to the column names, like
+        DEBIET#cwt_4_width_2_0
     nfft_ncol: numeric, optional (default=10)
         if rolling_type is 'nfft', there needs to be a fixed number of columns as output, since
         this is unknown a-priori. This means the number of output-columns will be fixed. If
@@ -189,7 +781,10 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
     proportiontocut: numeric, optional (default=0.1)
         if rolling_type is 'trimmean', this is the parameter used to trim values on both tails
         of the distribution. Must be in [0, 0.5). Value 0 results in the mean, close to 0.5
-        approaches the median.
+        approaches the median. A window that contains a missing value is always missing, also
+        for time offset windows, where pandas passes windows with missing values to the
+        function. This matches `scipy.stats.trim_mean` with nan_policy='propagate'; older scipy
+        versions sorted the missing value to the end, and could trim it away.
     keep_original: boolean, optional (default=True)
         if the original columns should be kept or discarded
         True by default, which means the new columns are added to the old ones
@@ -202,6 +797,16 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
         Whether to add lookback to the newly generated column names.
         if False, column names will be like: DEBIET#mean_2
         if True, column names will be like: DEBIET#mean_2_lookback_0
+    chunksize: int, optional (default=4096)
+        if rolling_type is 'fourier', the windows are transformed in batches of this many
+        windows at a time. Larger values are faster, smaller values use less memory.
+    n_jobs: int, optional (default=None)
+        The number of jobs to compute the features in parallel. The columns are split into
+        `n_jobs` shards, and the result of every shard is written to its own part of the output,
+        so the order of the output columns does not depend on `n_jobs`. None means 1, and -1
+        means using all processors. Threads are used by default, so the input is shared without
+        copying. To use processes instead, use `joblib.parallel_backend`, in which case large
+        arrays are memory-mapped instead of pickled.
 
     Examples
     --------
@@ -241,6 +846,8 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
         timecol: Optional[str] = None,
         keep_original: bool = True,
         add_lookback_to_colname: bool = False,
+        chunksize: int = 4096,
+        n_jobs: Optional[int] = None,
     ):
 
         self.window_size = window_size
@@ -254,6 +861,8 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
         self.keep_original = keep_original
         self.timecol = timecol
         self.add_lookback_to_colname = add_lookback_to_colname
+        self.chunksize = chunksize
+        self.n_jobs = n_jobs
         logger.debug(
             "Initialized rolling generator. rolling_type={}, lookback={}, "
             "window_size={}, deviation={}, alpha={}, proportiontocut={}, width={}, "
@@ -276,9 +885,11 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
         """
 
         self._validate_lookback()
+        self._validate_window_size()
         self._validate_width()
         self._validate_alpha()
         self._validate_proportiontocut()
+        self._validate_chunksize()
 
         if not isinstance(self.rolling_type, str):
             raise TypeError("rolling_type must be a string")
@@ -304,12 +915,31 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
         if self.lookback < 0:
             raise ValueError("lookback cannot be negative!")
 
+    def _validate_window_size(self):
+        # ewm ignores numeric window sizes, see fit
+        if self.window_size is None or self.rolling_type == "ewm":
+            return
+        window_sizes = [self.window_size] if np.isscalar(self.window_size) else self.window_size
+        # pd.Timedelta would read a float like 2.0 as nanoseconds, instead of a number of rows
+        for window_size in window_sizes:
+            if isinstance(window_size, (float, np.floating)):
+                raise ValueError(
+                    f"window_size must be an integer or a time offset, got {window_size}"
+                )
+
     def _validate_width(self):
-        if not np.isscalar(self.width):
-            raise TypeError("width must be a scalar")
-        if self.width <= 0:
+        widths = self._get_widths()
+        if len(widths) == 0 or not all(np.isscalar(width) for width in widths):
+            raise TypeError("width must be a scalar or a list of scalars")
+        if any(width <= 0 for width in widths):
             raise ValueError("width must be positive")
 
+    def _get_widths(self) -> List[float]:
+        """The width of cwt as a list, since multiple widths are allowed"""
+        if np.isscalar(self.width):
+            return [self.width]
+        return list(self.width)
+
     def _validate_alpha(self):
         if not np.isscalar(self.alpha):
             raise TypeError("alpha must be a scalar")
@@ -322,6 +952,12 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
         if self.proportiontocut >= 0.5 or self.proportiontocut < 0:
             raise ValueError("proportiontocut must be in [0, 0.5)")
 
+    def _validate_chunksize(self):
+        if not np.isscalar(self.chunksize):
+            raise TypeError("chunksize must be a scalar")
+        if int(self.chunksize) != self.chunksize or self.chunksize <= 0:
+            raise ValueError("chunksize must be a positive integer")
+
     def _get_rolling_fun(
         self,
         rolling_type: str = "mean",
@@ -343,8 +979,6 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
             Alternatively, in case of fourier/cwt, a function with one input:
             a numpy array. Will output another numpy array.
         """
-        if self.rolling_type == "cwt":
-            from scipy import signal  # Only needed for this rolling type
         if self.rolling_type == "nfft":
             from nfft import nfft
         if self.rolling_type == "trimmean":
@@ -366,10 +1000,17 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
             "kurt": lambda arr, n: arr.rolling(n).kurt(),
             "diff": lambda arr, n: arr.diff(n),
             "numpos": lambda arr, n: arr.gt(0).rolling(n).sum(),
-            "ewm": lambda arr, n: arr.ewm(alpha=self.alpha).mean(),
+            "ewm": lambda arr, n: (
+                arr.ewm(alpha=self.alpha)
+                if self.window_size_ == "ewm"
+                else arr.ewm(halflife=n, times=arr.index)
+            ).mean(),
             # These two have different signature because they are called by multicol_output
             "fourier": lambda vector: np.absolute(np.fft.fft(vector)),
-            "cwt": lambda vector: signal.cwt(vector, signal.ricker, [self.width])[0],
+            "cwt": lambda vector: np.vstack(
+                [_cwt_matrix(vector.size, width) for width in self._get_widths()]
+            )
+            @ vector,
             "nfft": lambda series: _nfft_helper(series, nfft),
         }
 
@@ -392,78 +1033,365 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
             # Pandas will insert inf when dividing by 0
             return arr / original
 
-    def _generate_and_add_new_features(
-        self, X: pd.DataFrame, result: pd.DataFrame
-    ) -> pd.DataFrame:
-        """Applies rolling functions to pandas dataframe `X` and concatenates result to `result`.
+    @staticmethod
+    def _is_numeric(X: pd.DataFrame) -> bool:
+        """Whether all columns of `X` are numeric"""
+        return all(pd.api.types.is_numeric_dtype(dtype) for dtype in X.dtypes)
+
+    def _use_prefix_sum_kernel(self, values: np.ndarray) -> bool:
+        """Whether the single-pass prefix sum kernel can be used instead of pandas rolling
+
+        This is only possible for integer window sizes and numeric data (the float `values`)
+        without infinite values. In all other cases, pandas rolling is used for every window size
+        separately.
+        """
+        if self.rolling_type not in ["sum", "mean", "var", "std", "numpos"]:
+            return False
+        if not all(isinstance(w, (int, np.integer)) and w >= 1 for w in self.window_size_):
+            return False
+        return not np.isinf(values).any()
+
+    def _get_useful_coeffs(self, window_size: Union[int, str]) -> range:
+        """The coefficients that are output for each column by fourier, cwt and nfft"""
+        if self.rolling_type == "fourier":
+            # Fourier has less columns, see multicol_output
+            return range(1, window_size // 2 + 1)
+        if self.rolling_type == "nfft":
+            return range(0, self.nfft_ncol)
+        return range(0, window_size)
+
+    def _get_coeff_names(self, window_size: Union[int, str]) -> List[str]:
+        """The suffixes of the coefficients that are output for each column by fourier, cwt and
+        nfft. With multiple cwt widths, the width is added to the coefficient"""
+        coeffs = [str(j) for j in self._get_useful_coeffs(window_size)]
+        if self.rolling_type != "cwt" or np.isscalar(self.width):
+            return coeffs
+        return ["_".join(["width", str(width), j]) for width in self.width for j in coeffs]
+
+    def _get_new_feature_names(self, columns: Sequence) -> List[str]:
+        """Creates the names of the new features, in the order they are generated
+
+        For every window size, for every column, either a single feature is created, or in
+        case of fourier, cwt and nfft, one feature per coefficient.
+        """
+        names = []
+        for window_size, suffix in zip(self.window_size_, self.suffix_):
+            for column in columns:
+                col_prefix = "#".join([str(column), suffix])
+                if self.rolling_type in ["fourier", "cwt", "nfft"]:
+                    names += [
+                        "_".join([col_prefix, j]) for j in self._get_coeff_names(window_size)
+                    ]
+                else:
+                    names.append(col_prefix)
+        return names
+
+    def _write_shifted(self, out: np.ndarray, values: np.ndarray) -> None:
+        """Writes `values` to `out`, shifted downwards by `lookback` rows"""
+        lookback = int(self.lookback)
+        if lookback == 0:
+            out[:] = values
+            return
+        out[:lookback] = np.nan
+        if lookback < len(values):
+            out[lookback:] = values[:-lookback]
+
+    def _write_block(self, block: np.ndarray, window_result: np.ndarray, values: np.ndarray):
+        """Writes the result of one window size for all columns to `block`, with lookback and
+        deviation applied"""
+        self._write_shifted(block, window_result)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            block[:] = self._apply_deviation(block, values, self.deviation)
+
+    def _generate_multicol_features(self, X: pd.DataFrame, out: np.ndarray) -> None:
+        """Writes the coefficients of fourier, cwt or nfft for all columns to `out`"""
+        position = 0
+        for window_size, _ in zip(self.window_size_, self.suffix_):
+            n_coeffs = len(self._get_coeff_names(window_size))
+            for column in X.columns:
+                if self.rolling_type == "fourier":
+                    values = _rolling_fourier(X[column].values, window_size, int(self.chunksize))
+                elif self.rolling_type == "cwt":
+                    values = _rolling_cwt(
+                        X[column].values, window_size, self._get_widths(), int(self.chunksize)
+                    )
+                elif self.rolling_type == "nfft":
+                    # For nfft, the window_size is a time_window
+                    values = multicol_output(
+                        X[column], self.nfft_ncol, self.rolling_fun_, time_window=window_size
+                    ).values
+                self._write_shifted(out[:, position : position + n_coeffs], values)
+                position += n_coeffs
+
+    def _batched_window_results(
+        self, X: pd.DataFrame, values: Optional[np.ndarray]
+    ) -> Optional[List[np.ndarray]]:
+        """The unshifted results for all columns, one array per window size, if the rolling_type
+        can be computed for all columns at once. Otherwise, returns None.
+        `values` are the float values of `X`, the object values of `X` for 'lag' and 'diff' if
+        `X` is not numeric, or None otherwise."""
+        if values is None:
+            return None
+        if self.rolling_type in ["lag", "diff"]:
+            return [
+                _lagged_values(values, X.index, w, difference=self.rolling_type == "diff")
+                for w in self.window_size_
+            ]
+        if self._use_prefix_sum_kernel(values):
+            return _rolling_prefix_sum(
+                values, [int(w) for w in self.window_size_], self.rolling_type
+            )
+        if self.rolling_type == "trimmean":
+            results = []
+            for window_size in self.window_size_:
+                starts, min_periods = _window_starts(X.index, window_size)
+                results.append(
+                    np.column_stack(
+                        [
+                            _rolling_trimmean(
+                                column,
+                                starts,
+                                min_periods,
+                                self.proportiontocut,
+                                int(self.chunksize),
+                            )
+                            for column in values.T
+                        ]
+                    )
+                )
+            return results
+        return None
+
+    def _generate_new_features(self, X: pd.DataFrame, out: np.ndarray) -> None:
+        """Applies rolling functions to pandas dataframe `X` and writes the result to `out`.
 
         Parameters:
         ----------
         X: pandas dataframe
            the pandas dataframe that you want to apply rolling functions on
-        result: pandas dataframe
-           the pandas dataframe that you want to add the new features to
-
-        Returns
-        -------
-        pandas dataframe, shape = `(n_rows, n_features * (n_outputs + 1))`
-            the pandas dataframe, appended with the new feature columns
+        out: numpy array, shape = `(n_rows, n_new_features)`
+           the preallocated array to write the new features to, in the order given by
+           `self._get_new_feature_names(X.columns)`
         """
-
         if self.rolling_type in ["fourier", "cwt", "nfft"]:
-            for window_size, suffix in zip(self.window_size_, self.suffix_):
-                # If rolling type is nfft, the time_window needs to be set
-                if self.rolling_type == "nfft":
-                    window_size, time_window = self.nfft_ncol, window_size
-                else:
-                    time_window = None
-
-                for column in X.columns:
-                    new_features = multicol_output(
-                        X[column],
-                        window_size,
-                        self.rolling_fun_,
-                        self.rolling_type == "fourier",
-                        time_window=time_window,
-                    ).shift(self.lookback)
-                    # Fourier has less columns
-                    if self.rolling_type == "fourier":
-                        useful_coeffs = range(1, window_size // 2 + 1)
-                    else:
-                        useful_coeffs = range(0, window_size)
-                    col_prefix = "#".join([str(column), suffix])
-                    new_features.columns = ["_".join([col_prefix, str(j)]) for j in useful_coeffs]
-                    new_features = new_features.set_index(X.index)
-                    result = pd.concat([result, new_features], axis=1)
+            self._generate_multicol_features(X, out)
+            return
+
+        position = 0
+        # Converted once, and shared by the batched kernels and the deviation
+        if self._is_numeric(X):
+            values = X.to_numpy(dtype=float)
+        elif self.rolling_type in ["lag", "diff"]:
+            # Non-numeric columns are lagged by the same positions, as an object array
+            values = X.to_numpy(dtype=object)
         else:
-            for window_size, suffix in zip(self.window_size_, self.suffix_):
-                new_features = X.apply(
-                    lambda arr: self._apply_deviation(
-                        self.rolling_fun_(arr, window_size).shift(self.lookback),
-                        arr,
-                        self.deviation,
-                    ),
-                    raw=False,
+            values = None
+        window_results = self._batched_window_results(X, values)
+        if window_results is not None:
+            for window_result in window_results:
+                self._write_block(out[:, position : position + X.shape[1]], window_result, values)
+                position += X.shape[1]
+            return
+
+        for window_size, _ in zip(self.window_size_, self.suffix_):
+            for column in X.columns:
+                arr = X[column]
+                out[:, position] = self._apply_deviation(
+                    self.rolling_fun_(arr, window_size).shift(int(self.lookback)),
+                    arr,
+                    self.deviation,
+                ).to_numpy()
+                position += 1
+
+    def _output_positions(self, n_columns: int, shard: np.ndarray) -> np.ndarray:
+        """The positions in the new features of all features generated from the columns in
+        `shard`, in the order they are generated when only those columns are given"""
+        positions = []
+        offset = 0
+        for window_size, _ in zip(self.window_size_, self.suffix_):
+            if self.rolling_type in ["fourier", "cwt", "nfft"]:
+                n_coeffs = len(self._get_coeff_names(window_size))
+            else:
+                n_coeffs = 1
+            for column in shard:
+                start = offset + column * n_coeffs
+                positions.extend(range(start, start + n_coeffs))
+            offset += n_columns * n_coeffs
+        return np.array(positions, dtype=int)
+
+    def _generate_new_features_parallel(self, X: pd.DataFrame, out: np.ndarray) -> None:
+        """Like `_generate_new_features`, but with the columns split over `n_jobs` jobs"""
+        n_shards = min(effective_n_jobs(self.n_jobs), X.shape[1])
+        if n_shards <= 1:
+            self._generate_new_features(X, out)
+            return
+
+        shards = np.array_split(np.arange(X.shape[1]), n_shards)
+        results = Parallel(n_jobs=n_shards, prefer="threads")(
+            delayed(_generate_shard)(self, X.iloc[:, shard]) for shard in shards
+        )
+        for shard, result in zip(shards, results):
+            out[:, self._output_positions(X.shape[1], shard)] = result
+
+    def _init_stream(self, X: pd.DataFrame) -> _RollingStream:
+        """Creates the running state for `partial_transform`, with `X` as the history.
+
+        Only the last rows of `X` that can still influence new rows are replayed, the state
+        of 'ewm' over the rows before that is computed all at once.
+        """
+        if self.rolling_type not in _RollingStream.STREAMING_TYPES:
+            raise ValueError(
+                "partial_transform is not supported for rolling_type {}, only for {}".format(
+                    self.rolling_type, _RollingStream.STREAMING_TYPES
                 )
-                new_features.columns = [
-                    "#".join([str(col), suffix]) for col in new_features.columns
-                ]
-                result = pd.concat([result, new_features], axis=1)
+            )
+        if self.rolling_type == "ewm" and self.window_size_ == "ewm":
+            window_sizes = [0]
+        elif self.rolling_type != "ewm" and all(
+            isinstance(w, (int, np.integer)) and w >= (self.rolling_type not in ["lag", "diff"])
+            for w in self.window_size_
+        ):
+            window_sizes = [int(w) for w in self.window_size_]
+        else:
+            raise ValueError("partial_transform only supports integer window sizes")
 
+        stream = _RollingStream(
+            self.rolling_type, window_sizes, X.shape[1], int(self.lookback), self.alpha
+        )
+        values = X.to_numpy(dtype=float)
+        n_replay = min(stream.capacity + int(self.lookback), values.shape[0])
+        if self.rolling_type == "ewm":
+            stream.initialize_ewm(values[: values.shape[0] - n_replay])
+        for row in values[values.shape[0] - n_replay :]:
+            stream.update(row)
+        return stream
+
+    def partial_transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        """Transforms only the new rows in `X`, using the rows of earlier calls as history
+
+        This is meant for streaming data, where a few rows arrive at a time. The first call
+        after `fit` is identical to `transform`, and `X` is used as the history. Every next call
+        only computes the features of the new rows in `X`, by updating a running state, instead
+        of recomputing the features of the entire history. The result is identical to calling
+        `transform` on all rows so far, and taking the last `len(X)` rows.
+        Calling `fit` again resets the history.
+
+        This is only supported for the rolling_types 'lag', 'diff', 'sum', 'mean', 'var',
+        'std', 'numpos', 'min', 'max' and 'ewm', and only for integer window sizes.
+
+        Parameters
+        ----------
+        X: pandas dataframe, shape = `(n_rows, n_features)`
+           the new rows, with the same columns as the history. Must be after the history in time
+
+        Returns
+        -------
+        result: pandas dataframe, shape = `(n_rows, n_features * (n_outputs + 1))`
+            the new rows, appended with the new columns
+        """
+        check_is_fitted(self, "window_size_")
+        X_features = self._set_time_index(X)
+        stream = getattr(self, "_stream", None)
+        if stream is None:
+            result = self.transform(X)
+            self._stream = self._init_stream(X_features)
+            return result
+        if X_features.shape[1] != stream.buffer.shape[1]:
+            raise ValueError("X must have the same columns as in previous calls")
+
+        values = X_features.to_numpy(dtype=float)
+        new_feature_names = self._get_new_feature_names(X_features.columns)
+        new_features = np.empty((values.shape[0], len(new_feature_names)))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for i, row in enumerate(values):
+                row_features = stream.update(row)
+                new_features[i] = self._apply_deviation(row_features, row, self.deviation).ravel()
+        result = pd.DataFrame(new_features, index=X_features.index, columns=new_feature_names)
+        if self.keep_original:
+            result = pd.concat([X_features, result], axis=1)
+
+        self._feature_names = list(result.columns.values)
+        if self.timecol is not None:
+            result = result.set_index(X.index.copy())
         return result
 
+    def get_lookback(self) -> Optional[Tuple[int, pd.Timedelta]]:
+        """The history that is needed to compute the features of a new row
+
+        Returns
+        -------
+        lookback: tuple of (int, pd.Timedelta), or None
+            the number of previous rows, and the time span before the new row, that are needed.
+            None if all history is needed, which is the case for 'ewm' without halflife
+        """
+        check_is_fitted(self, "window_size_")
+        if self.window_size_ == "ewm" or self._uses_halflife():
+            return None
+        n_rows, timespan = 0, pd.Timedelta(0)
+        for window_size in self.window_size_:
+            if isinstance(window_size, str):
+                timespan = max(timespan, pd.Timedelta(window_size))
+            else:
+                n_rows = max(n_rows, int(window_size))
+        return n_rows + int(self.lookback), timespan
+
+    def _set_time_index(self, X: pd.DataFrame) -> pd.DataFrame:
+        """Sets the timecol as DatetimeIndex of `X`, if timecol is given"""
+        if self.timecol is None:
+            return X
+        new_index = pd.DatetimeIndex(X[self.timecol].values)
+        return X.set_index(new_index).drop(self.timecol, axis=1)
+
+    def _allocate_output(self, X: pd.DataFrame, n_columns: int) -> np.ndarray:
+        """Allocates the output array. This is float, unless there are non-numeric columns"""
+        if self._is_numeric(X):
+            return np.empty((X.shape[0], n_columns), dtype=float)
+        return np.empty((X.shape[0], n_columns), dtype=object)
+
+    def _generate_blocks(self, X: pd.DataFrame) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Generates the new features of the numeric columns of `X` in a float block, and the
+        features of the other columns in a separate object block, so the numeric features stay
+        float when `X` has non-numeric columns.
+
+        Returns
+        -------
+        list of tuples
+            `(positions, block)` for every non-empty block, where `positions` are the positions
+            of the columns of `block` in `self._get_new_feature_names(X.columns)`
+        """
+        numeric = np.array([pd.api.types.is_numeric_dtype(dtype) for dtype in X.dtypes], bool)
+        blocks = []
+        for shard in [np.flatnonzero(numeric), np.flatnonzero(~numeric)]:
+            if shard.size == 0:
+                continue
+            X_shard = X.iloc[:, shard]
+            positions = self._output_positions(X.shape[1], shard)
+            block = self._allocate_output(X_shard, positions.size)
+            self._generate_new_features_parallel(X_shard, block)
+            blocks.append((positions, block))
+        return blocks
+
+    def _uses_halflife(self) -> bool:
+        """Whether the window sizes of 'ewm' are time offsets, to be used as halflife"""
+        if self.rolling_type != "ewm" or self.window_size is None:
+            return False
+        window_sizes = [self.window_size] if np.isscalar(self.window_size) else self.window_size
+        return all(isinstance(window_size, str) for window_size in window_sizes)
+
     def fit(self, X: Any = None, y: Any = None):
         """Calculates window_size and feature function
 
+        If `X` is given, the names (and order) of the output columns are also calculated.
+
         Parameters
         ----------
-        X: optional, is ignored
+        X: optional, only used to calculate the output column names
         y: optional, is ignored
         """
 
         self._validate_params()
 
-        if self.rolling_type == "ewm":
+        if self.rolling_type == "ewm" and not self._uses_halflife():
             # ewm needs no integer window_size
             self.window_size_ = "ewm"
             self.suffix_ = ["ewm_" + str(self.alpha)]
@@ -478,6 +1406,14 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
             if self.add_lookback_to_colname:
                 self.suffix_ = [s + "_lookback_" + str(self.lookback) for s in self.suffix_]
         self.rolling_fun_ = self._get_rolling_fun(self.rolling_type)
+        # Refitting resets the history of partial_transform
+        self._stream = None
+
+        if isinstance(X, pd.DataFrame):
+            columns = [col for col in X.columns if self.timecol is None or col != self.timecol]
+            self._feature_names = (columns if self.keep_original else []) + (
+                self._get_new_feature_names(columns)
+            )
         logger.debug(
             "Done fitting transformer. window size: {}, suffix: {}".format(
                 self.window_size_, self.suffix_
@@ -489,6 +1425,11 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
     def transform(self, X: pd.DataFrame) -> pd.DataFrame:
         """Transforms pandas dataframe `X` to apply rolling function
 
+        The new features are written to a single preallocated array, which is converted to a
+        dataframe only at the end. If `X` has non-numeric columns, the features of the numeric
+        columns are written to a separate float array, so they keep a float dtype.
+        To skip the dataframe entirely, use `transform_array`.
+
         Parameters
         ----------
         X: pandas dataframe, shape = `(n_rows, n_features)`
@@ -501,34 +1442,77 @@ class BuildRollingFeatures(BaseEstimator, TransformerMixin):
         """
 
         check_is_fitted(self, "window_size_")
-        if self.keep_original:
-            result = X.copy()
+        X_features = self._set_time_index(X)
+
+        new_feature_names = self._get_new_feature_names(X_features.columns)
+        blocks = self._generate_blocks(X_features)
+        frames = [
+            pd.DataFrame(
+                block,
+                index=X_features.index,
+                columns=[new_feature_names[position] for position in positions],
+            )
+            for positions, block in blocks
+        ]
+        if len(frames) == 1:
+            # The positions of a single block are already in order
+            result = frames[0]
+        elif frames:
+            order = np.argsort(np.concatenate([positions for positions, _ in blocks]))
+            result = pd.concat(frames, axis=1).iloc[:, order]
         else:
-            result = pd.DataFrame(index=X.index)
-
-        if self.timecol is not None:
-            # Set DatetimeIndex on the intermediate result
-            index_backup = X.index.copy()
-            new_index = pd.DatetimeIndex(X[self.timecol].values)
-            X = X.set_index(new_index).drop(self.timecol, axis=1)
-            if self.keep_original:
-                result = result.set_index(new_index).drop(self.timecol, axis=1)
-            else:
-                result = pd.DataFrame(index=new_index)
-
-        result = self._generate_and_add_new_features(X, result)
+            result = pd.DataFrame(index=X_features.index, columns=new_feature_names)
+        if self.keep_original:
+            result = pd.concat([X_features, result], axis=1)
 
         self._feature_names = list(result.columns.values)
         if self.timecol is not None:
-            result = result.set_index(index_backup)
-        log_new_columns(result, X)
+            result = result.set_index(X.index.copy())
+        log_new_columns(result, X_features)
         log_dataframe_characteristics(result, logging.DEBUG)  # Log types as well
 
         return result
 
+    def transform_array(self, X: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+        """Transforms pandas dataframe `X` to apply rolling function, without creating a dataframe
+
+        This is identical to `transform`, but returns the raw array with the feature names,
+        so no dataframe has to be created. This is useful when the result is directly given to
+        a model, that only needs the values. If `keep_original` is True, the original columns
+        are copied into the same array.
+
+        Parameters
+        ----------
+        X: pandas dataframe, shape = `(n_rows, n_features)`
+           the pandas dataframe that you want to apply rolling functions on
+
+        Returns
+        -------
+        result: numpy array, shape = `(n_rows, n_features * (n_outputs + 1))`
+            the original columns (if `keep_original`) and the new features
+        feature_names: list of strings
+            the names of the columns in `result`
+        """
+        check_is_fitted(self, "window_size_")
+        X_features = self._set_time_index(X)
+
+        original_names = list(X_features.columns) if self.keep_original else []
+        feature_names = original_names + self._get_new_feature_names(X_features.columns)
+        result = self._allocate_output(X_features, len(feature_names))
+        result[:, : len(original_names)] = X_features[original_names].to_numpy()
+        if self._is_numeric(X_features):
+            self._generate_new_features_parallel(X_features, result[:, len(original_names) :])
+        else:
+            for positions, block in self._generate_blocks(X_features):
+                result[:, len(original_names) + positions] = block
+
+        self._feature_names = feature_names
+        return result, feature_names
+
     def get_feature_names_out(self, input_features=None) -> List[str]:
         """
-        Returns feature names for the outcome of the last transform call.
+        Returns feature names for the outcome of the last transform call. If transform was not
+        called yet, returns the feature names calculated during fit.
         """
         check_is_fitted(self, "_feature_names")
 
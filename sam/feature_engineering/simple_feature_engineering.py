@@ -3,7 +3,45 @@ from typing import List, Tuple, Union, Optional
 import numpy as np
 import pytz
 import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
 from sam.feature_engineering import BaseFeatureEngineer
+from sam.feature_engineering.calendar_cache import calendar_cache
+from sam.feature_engineering.rolling_features import _prefix_sums, _window_from_prefix_sums
+
+# Rolling methods that are computed from prefix sums, shared by all methods of a group
+_PREFIX_SUM_METHODS = ["sum", "mean", "var", "std"]
+
+
+def _rolling_group(series: pd.Series, window: Union[int, str], methods: List[str]) -> List:
+    """Computes all rolling features of a single column and window
+
+    The sum, mean, var and std of integer windows of numeric columns are computed from a single
+    set of prefix sums, see `sam.feature_engineering.rolling_features._prefix_sums`. The other
+    methods share one pandas rolling window.
+    Used to parallelize the rolling features, see `SimpleFeatureEngineer._compile_rolling_plan`
+    """
+    kernel_methods = []
+    if (
+        isinstance(window, (int, np.integer))
+        and window >= 1
+        and pd.api.types.is_numeric_dtype(series)
+    ):
+        values = series.to_numpy(dtype=float)[:, np.newaxis]
+        if not np.isinf(values).any():
+            kernel_methods = [method for method in methods if method in _PREFIX_SUM_METHODS]
+    if kernel_methods:
+        sums = _prefix_sums(values, kernel_methods)
+
+    rolling = series.rolling(window=window)
+    results = []
+    for method in methods:
+        if method == "lag":
+            results.append(series.shift(window).values)
+        elif method in kernel_methods:
+            results.append(_window_from_prefix_sums(sums, window, method)[:, 0])
+        else:
+            results.append(rolling.agg(method).values)
+    return results
 
 
 class SimpleFeatureEngineer(BaseFeatureEngineer):
@@ -35,6 +73,14 @@ class SimpleFeatureEngineer(BaseFeatureEngineer):
         Whether to drop the first value of time components (used for onehot encoding)
     keep_original : bool (default=False)
         Whether to keep the original columns in the dataframe.
+    sparse_output : bool (default=False)
+        Whether to return the onehot time features as sparse columns, backed by a scipy sparse
+        matrix. Use `X_out.sparse.to_coo()` on the onehot columns to get the scipy matrix.
+    n_jobs : int (default=None)
+        The number of jobs to compute the rolling features in parallel. The order of the output
+        columns does not depend on `n_jobs`. None means 1, and -1 means using all processors.
+        Threads are used by default, so the input is shared without copying. To use processes
+        instead, use `joblib.parallel_backend`.
 
     Example
     -------
@@ -91,6 +137,8 @@ class SimpleFeatureEngineer(BaseFeatureEngineer):
         timezone: Optional[str] = None,
         drop_first: bool = True,
         keep_original: bool = False,
+        sparse_output: bool = False,
+        n_jobs: Optional[int] = None,
     ) -> None:
         super().__init__()
         self.rolling_features = self._input_df_to_list(rolling_features)
@@ -99,6 +147,8 @@ class SimpleFeatureEngineer(BaseFeatureEngineer):
         self.timezone = timezone
         self.drop_first = drop_first
         self.keep_original = keep_original
+        self.sparse_output = sparse_output
+        self.n_jobs = n_jobs
 
     @staticmethod
     def _input_df_to_list(
@@ -114,19 +164,14 @@ class SimpleFeatureEngineer(BaseFeatureEngineer):
         else:
             raise ValueError(f"Invalid data type: {type(data)}, provide a list or dataframe")
 
-    def _fix_timezone(self, datetime):
-        """Change timezone before calculating components."""
-        if self.timezone is not None:
-            if datetime.dt.tz is not None:
-                if datetime.dt.tz != pytz.utc:
-                    raise ValueError(
-                        "Data should either be in UTC timezone or it should have no"
-                        " timezone information (assumed to be in UTC)"
-                    )
-            else:
-                datetime = datetime.dt.tz_localize("UTC")
-            datetime = datetime.dt.tz_convert(self.timezone)
-        return datetime
+    def _validate_timezone(self, datetime: pd.Series) -> None:
+        """Check that the times can be converted to the timezone"""
+        if self.timezone is not None and datetime.dt.tz is not None:
+            if datetime.dt.tz != pytz.utc:
+                raise ValueError(
+                    "Data should either be in UTC timezone or it should have no"
+                    " timezone information (assumed to be in UTC)"
+                )
 
     def _get_time_column(self, X: pd.DataFrame, component: str) -> pd.Series:
         """Get the time column."""
@@ -136,60 +181,158 @@ class SimpleFeatureEngineer(BaseFeatureEngineer):
         else:
             datetime = X.index.to_series().copy()
 
-        # Fix timezone
-        datetime = self._fix_timezone(datetime)
+        self._validate_timezone(datetime)
 
-        # Then select the component
+        # Then select the component, from the cache if the times are regular. The timezone is
+        # converted by the cache, only if the component is not cached
         if component in self.valid_components:
-            return self.component_function[component](datetime)
+            return calendar_cache.get(
+                datetime,
+                f"SimpleFeatureEngineer.{component}",
+                self.component_function[component],
+                timezone=self.timezone,
+            )
         else:
             raise ValueError(f"Invalid component: {component}")
 
+    def _compile_rolling_plan(self) -> Tuple[List[str], List[Tuple]]:
+        """Compiles the rolling features into a plan, grouped by column and window.
+
+        Duplicate features are only computed once. Every group is a tuple
+        `(column, window, methods, positions)`, where `positions` are the positions of the
+        methods in the output, which is in the order of `rolling_features`.
+
+        Returns
+        -------
+        feature_names: list of str
+            the unique names of the rolling features, in order
+        groups: list of tuples
+            the groups of features that share a column and window
+        """
+        feature_names = []
+        groups = {}
+        for col, method, window in self.rolling_features:
+            colname = f"{col}_{method}_{window}"
+            if colname in feature_names:
+                continue
+            methods, positions = groups.setdefault((col, window), ([], []))
+            methods.append(method)
+            positions.append(len(feature_names))
+            feature_names.append(colname)
+        groups = [(col, window, *group) for (col, window), group in groups.items()]
+        return feature_names, groups
+
     def _get_rolling_features(self, X: pd.DataFrame) -> pd.DataFrame:
         """Get the rolling features."""
-        X_out = pd.DataFrame(index=X.index, columns=[])
+        index = X.index
         # Rolling features
         if self.time_col is not None:
             X = X.set_index(self.time_col)
 
-        for col, method, window in self.rolling_features:
-            colname = f"{col}_{method}_{window}"
-            if method == "lag":
-                X_out[colname] = X[col].shift(window).values
-            else:
-                X_out[colname] = X[col].rolling(window=window).agg(method).values
+        if hasattr(self, "rolling_plan_"):
+            feature_names, groups = self.rolling_plan_
+        else:
+            feature_names, groups = self._compile_rolling_plan()
+        n_jobs = min(effective_n_jobs(self.n_jobs), max(len(groups), 1))
+        features = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(_rolling_group)(X[col], window, methods) for col, window, methods, _ in groups
+        )
 
-        if self.time_col is not None:
-            X = X.reset_index(drop=False)
+        # All features are written to a single preallocated array
+        columns = set(col for col, _, _, _ in groups)
+        numeric = all(pd.api.types.is_numeric_dtype(X[col]) for col in columns)
+        values = np.empty((X.shape[0], len(feature_names)), dtype=float if numeric else object)
+        for (_, _, _, positions), group_features in zip(groups, features):
+            for position, feature in zip(positions, group_features):
+                values[:, position] = feature
+        X_out = pd.DataFrame(values, index=index, columns=feature_names)
+        if not numeric:
+            X_out = X_out.infer_objects()
         return X_out
 
+    def _get_onehot_block(
+        self, comp_series: pd.Series, values: np.ndarray, colname: str
+    ) -> pd.DataFrame:
+        """One-hot encodes a time component, with an identity lookup instead of comparisons.
+
+        Every row selects a row of a uint8 identity matrix, by its position in `values`.
+        Components that are missing or not in `values` (like the dropped first value) select
+        the extra row of zeros. If `sparse_output` is True, the block is a sparse dataframe.
+        """
+        codes = comp_series.to_numpy(dtype=float, na_value=np.nan) - values[0]
+        valid = (codes >= 0) & (codes < values.size)
+        codes = np.where(valid, codes, values.size).astype(int)
+        columns = [f"{colname}_{value}" for value in values]
+
+        if self.sparse_output:
+            from scipy import sparse
+
+            rows = np.flatnonzero(valid)
+            onehot = sparse.csr_matrix(
+                (np.ones(rows.size, dtype=np.uint8), (rows, codes[valid])),
+                shape=(codes.size, values.size),
+            )
+            return pd.DataFrame.sparse.from_spmatrix(onehot, comp_series.index, columns)
+
+        lookup = np.eye(values.size + 1, values.size, dtype=np.uint8)
+        return pd.DataFrame(lookup[codes], index=comp_series.index, columns=columns)
+
     def _get_time_features(self, X: pd.DataFrame) -> pd.DataFrame:
         """Get the time features."""
-        X_out = pd.DataFrame(index=X.index, columns=[])
+        blocks = [pd.DataFrame(index=X.index, columns=[])]
+        components = {}
 
         for component, type in self.time_features:
             colname = f"{component}_{type}"
             comp_min, comp_max = self.component_range[component]
+            # Every component is only computed once, even if used by multiple features
+            if component not in components:
+                components[component] = self._get_time_column(X, component)
+            comp_series = components[component]
 
             if type == "onehot":
                 # we do not make a dummy of the last value because of collinearity
                 if self.drop_first:
                     comp_min += 1
-                for value in range(comp_min, comp_max + 1):
-                    comp_series = self._get_time_column(X, component)
-                    colname_ = f"{colname}_{value}"
-                    X_out[colname_] = (comp_series == value).astype(int)
+                values = np.arange(comp_min, comp_max + 1)
+                blocks.append(self._get_onehot_block(comp_series, values, colname))
 
             elif type == "cyclical":
-                comp_series = self._get_time_column(X, component)
                 # scale to 0,1, then to 0,2pi and then to -1,1
                 comp_norm = (comp_series - comp_min) / (comp_max - comp_min + 1)
-                X_out[colname + "_sin"] = np.sin(2 * np.pi * comp_norm).astype(float)
-                X_out[colname + "_cos"] = np.cos(2 * np.pi * comp_norm).astype(float)
+                cyclical = {
+                    colname + "_sin": np.sin(2 * np.pi * comp_norm).astype(float),
+                    colname + "_cos": np.cos(2 * np.pi * comp_norm).astype(float),
+                }
+                blocks.append(pd.DataFrame(cyclical, index=X.index))
             else:
                 raise ValueError(f"Invalid type: {type}")
 
-        return X_out
+        return pd.concat(blocks, axis=1)
+
+    def get_lookback(self) -> Tuple[int, pd.Timedelta]:
+        """
+        The history that is needed to compute the features of a new row. This is the largest
+        integer window (in rows), and the largest time offset window. Time features do not need
+        any history.
+
+        Returns
+        -------
+        tuple of (int, pd.Timedelta):
+            the number of previous rows, and the time span before the new row, that are needed
+        """
+        n_rows, timespan = 0, pd.Timedelta(0)
+        for _, _, window in self.rolling_features:
+            if isinstance(window, str):
+                timespan = max(timespan, pd.Timedelta(window))
+            else:
+                n_rows = max(n_rows, int(window))
+        return n_rows, timespan
+
+    def fit(self, X: pd.DataFrame, y=None):
+        """Compiles the rolling features into a plan, and calculates the feature names"""
+        self.rolling_plan_ = self._compile_rolling_plan()
+        return super().fit(X, y)
 
     def feature_engineer_(self, X: pd.DataFrame) -> pd.DataFrame:
         """Feature engineering function that creates rolling features and time components."""
@@ -0,0 +1,129 @@
+import unittest
+
+import pandas as pd
+from pandas.testing import assert_frame_equal, assert_series_equal
+from sam.feature_engineering import CalendarCache, SimpleFeatureEngineer, decompose_datetime
+from sam.feature_engineering.calendar_cache import calendar_cache
+
+
+def hour(timecol):
+    return timecol.dt.hour
+
+
+class TestCalendarCache(unittest.TestCase):
+    def setUp(self):
+        self.times = pd.Series(pd.date_range("2022-01-01", periods=96, freq="15min"))
+
+    def test_overlapping_slices(self):
+        cache = CalendarCache()
+        cache.get(self.times, "hour", hour)
+        for start, stop in [(0, 96), (10, 20), (95, 96), (40, 96)]:
+            part = self.times.iloc[start:stop]
+            assert_series_equal(cache.get(part, "hour", hour), hour(part))
+        info = cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.n_blocks), (4, 1, 1))
+
+        # Not aligned with the cached block, or outside of it
+        cache.get(self.times + pd.Timedelta("1min"), "hour", hour)
+        cache.get(pd.Series(pd.date_range("2022-01-01", periods=200, freq="15min")), "hour", hour)
+        self.assertEqual(cache.cache_info().misses, 3)
+
+    def test_key(self):
+        cache = CalendarCache()
+        cache.get(self.times, "hour", hour)
+        # Different component, frequency or timezone are all cached separately
+        cache.get(self.times, "minute", lambda x: x.dt.minute)
+        cache.get(self.times.iloc[::2], "hour", hour)
+        utc = self.times.dt.tz_localize("UTC")
+        cache.get(utc, "hour", hour)
+        amsterdam = utc.dt.tz_convert("Europe/Amsterdam")
+        assert_series_equal(cache.get(amsterdam, "hour", hour), hour(amsterdam))
+        self.assertEqual(cache.cache_info().misses, 5)
+        self.assertEqual(cache.cache_info().hits, 0)
+
+    def test_irregular_not_cached(self):
+        cache = CalendarCache()
+        irregular = self.times.drop(index=[3, 50])
+        for _ in range(2):
+            assert_series_equal(cache.get(irregular, "hour", hour), hour(irregular))
+        self.assertEqual(cache.cache_info(), (0, 0, 0, 0, cache.max_bytes))
+
+    def test_memory_cap(self):
+        # room for two blocks of 96 int64 values
+        cache = CalendarCache(max_bytes=2 * 96 * 8)
+        blocks = [self.times + pd.Timedelta(days=day) for day in range(3)]
+        for block in blocks:
+            cache.get(block, "hour", hour)
+        info = cache.cache_info()
+        self.assertEqual((info.n_blocks, info.nbytes), (2, 2 * 96 * 8))
+        # The first block was evicted, the last one is still cached
+        cache.get(blocks[0], "hour", hour)
+        cache.get(blocks[2], "hour", hour)
+        self.assertEqual(cache.cache_info().hits, 1)
+
+        cache.clear()
+        self.assertEqual(cache.cache_info(), (0, 0, 0, 0, 2 * 96 * 8))
+
+    def test_decompose_datetime(self):
+        df = pd.DataFrame({"TIME": self.times})
+        components = ["hour", "dayofweek", "week", "secondofday"]
+        expected = decompose_datetime(df, components=components)
+        calendar_cache.clear()
+        decompose_datetime(df, components=components)
+        result = decompose_datetime(df.iloc[30:60], components=components)
+        assert_frame_equal(result, expected.iloc[30:60])
+        self.assertEqual(calendar_cache.cache_info().hits, len(components))
+
+    def test_simple_feature_engineer(self):
+        X = pd.DataFrame({"value": range(96)}, index=self.times)
+        fe = SimpleFeatureEngineer(time_features=[("hour_of_day", "onehot")])
+        expected = fe.fit_transform(X)
+        calendar_cache.clear()
+        fe.transform(X)
+        assert_frame_equal(fe.transform(X.iloc[50:]), expected.iloc[50:])
+        self.assertEqual(calendar_cache.cache_info().hits, 1)
+
+    def test_callers_do_not_share_blocks(self):
+        # decompose_datetime and SimpleFeatureEngineer compute day_of_week differently
+        # A monday, which is 0 in decompose_datetime and 1 in SimpleFeatureEngineer
+        df = pd.DataFrame({"TIME": self.times + pd.Timedelta(days=2)})
+        X = pd.DataFrame({"value": range(96)}, index=df["TIME"])
+        fe = SimpleFeatureEngineer(time_features=[("day_of_week", "cyclical")])
+        for order in [(0, 1), (1, 0)]:
+            calendar_cache.clear()
+            expected = [
+                decompose_datetime(df, components=["day_of_week"]),
+                fe.fit_transform(X),
+            ]
+            calendar_cache.clear()
+            calls = [
+                lambda: decompose_datetime(df, components=["day_of_week"]),
+                lambda: fe.fit_transform(X),
+            ]
+            for i in order:
+                assert_frame_equal(calls[i](), expected[i])
+        self.assertEqual(expected[0]["TIME_day_of_week"].min(), 0)
+
+    def test_timezone(self):
+        df = pd.DataFrame({"TIME": self.times})
+        calendar_cache.clear()
+        expected = decompose_datetime(df, components=["hour"], timezone="Asia/Kolkata")
+        amsterdam = decompose_datetime(df, components=["hour"], timezone="Europe/Amsterdam")
+        result = decompose_datetime(df.iloc[10:], components=["hour"], timezone="Asia/Kolkata")
+        assert_frame_equal(result, expected.iloc[10:])
+        self.assertEqual(amsterdam["TIME_hour"].iloc[0], 1)
+        self.assertEqual(calendar_cache.cache_info().hits, 1)
+
+        # The same instants in UTC are cached, so the timezone is converted only once
+        utc = pd.DataFrame({"TIME": self.times.dt.tz_localize("UTC")})
+        result = decompose_datetime(utc, components=["hour"], timezone="Asia/Kolkata")
+        assert_series_equal(result["TIME_hour"], expected["TIME_hour"])
+        self.assertEqual(calendar_cache.cache_info().hits, 2)
+        with self.assertRaises(ValueError):
+            decompose_datetime(
+                pd.DataFrame({"TIME": utc["TIME"].dt.tz_convert("CET")}), timezone="UTC"
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
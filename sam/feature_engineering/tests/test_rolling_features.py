@@ -5,7 +5,7 @@ import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal
 from sam.feature_engineering import BuildRollingFeatures
-from scipy import signal
+from scipy.stats import trim_mean
 
 
 class TestRollingFeatures(unittest.TestCase):
@@ -168,10 +168,67 @@ class TestRollingFeatures(unittest.TestCase):
         result = self.simple_transform("fourier", 0, 4)
         assert_frame_equal(result, expected)
 
+    def test_prefix_sum_kernel(self):
+        # sum/mean/var/std/numpos use a single-pass kernel, which should match pandas rolling
+        rng = np.random.default_rng(42)
+        X = pd.DataFrame({"A": rng.normal(size=200), "B": np.round(rng.normal(size=200))})
+        X.iloc[20:23, 0] = np.nan
+        X.iloc[50:80, 1] = 3.0  # constant windows should have a variance of exactly 0
+        window_sizes = [1, 2, 5, 24, 300]
+
+        for rolling_type in ["sum", "mean", "var", "std", "numpos"]:
+            values = X.gt(0) if rolling_type == "numpos" else X
+            method = "sum" if rolling_type == "numpos" else rolling_type
+            expected = pd.concat(
+                [values.rolling(n).agg(method).shift(1) for n in window_sizes], axis=1
+            )
+            expected.columns = [
+                "%s#%s_%d" % (col, rolling_type, n) for n in window_sizes for col in X.columns
+            ]
+            roller = BuildRollingFeatures(rolling_type, 1, window_sizes, keep_original=False)
+            result = roller.fit_transform(X)
+            assert_frame_equal(result, expected)
+
+    def test_prefix_sum_kernel_large_offset(self):
+        # The compensated prefix sums should not lose precision on large values
+        rng = np.random.default_rng(42)
+        X = pd.DataFrame({"X": 1e6 + rng.normal(size=1000)})
+        roller = BuildRollingFeatures("std", 0, 3, keep_original=False)
+        result = roller.fit_transform(X)["X#std_3"].values[2:]
+        expected = [np.std(X.X.values[i - 2 : i + 1], ddof=1) for i in range(2, 1000)]
+        np.testing.assert_allclose(result, expected, rtol=1e-7)
+
+    def test_fourier_chunksize(self):
+        # The batched engine should give the same result regardless of the chunksize
+        rng = np.random.default_rng(42)
+        X = pd.DataFrame({"X": rng.normal(size=100)})
+        X.iloc[50, 0] = np.nan
+
+        expected = np.full((100, 5), np.nan)
+        for i in range(9, 100):
+            expected[i, :] = np.absolute(np.fft.fft(X.X.values[i - 9 : i + 1]))[1:6]
+        expected = pd.DataFrame(expected, columns=["X#fourier_10_%d" % i for i in range(1, 6)])
+
+        for chunksize in [1, 7, 4096]:
+            roller = BuildRollingFeatures(
+                "fourier", lookback=0, window_size=10, keep_original=False, chunksize=chunksize
+            )
+            result = roller.fit_transform(X)
+            assert_frame_equal(result, expected)
+
     def test_cwt(self):
         # Helper function to calculate a single row of cwt values
         def fastcwt(values, width):
-            return signal.cwt(values, signal.ricker, [width])[0]
+            # Same as the former scipy.signal.cwt(values, scipy.signal.ricker, [width])[0]
+            points = min(10 * width, len(values))
+            x = np.arange(0, points) - (points - 1.0) / 2
+            ricker = (
+                2
+                / (np.sqrt(3 * width) * np.pi**0.25)
+                * (1 - x**2 / width**2)
+                * np.exp(-(x**2) / (2 * width**2))
+            )
+            return np.convolve(values, ricker[::-1], mode="same")
 
         expected = [
             np.array([np.nan, np.nan, np.nan, np.nan]),
@@ -189,6 +246,28 @@ class TestRollingFeatures(unittest.TestCase):
         result = self.simple_transform("cwt", 0, 4, width=2.5)
         assert_frame_equal(result, expected)
 
+        # Multiple widths are computed in the same pass
+        rng = np.random.default_rng(42)
+        X = pd.DataFrame({"X": rng.normal(size=100)})
+        X.iloc[50, 0] = np.nan
+        roller = BuildRollingFeatures(
+            "cwt", lookback=1, window_size=[6, 24], width=[0.5, 2], keep_original=False
+        )
+        result = roller.fit_transform(X)
+        self.assertEqual(result.shape, (100, 2 * 6 + 2 * 24))
+        self.assertEqual(
+            list(result.columns[:7]),
+            [f"X#cwt_6_width_0.5_{k}" for k in range(6)] + ["X#cwt_6_width_2_0"],
+        )
+        for window_size in [6, 24]:
+            for width in [0.5, 2]:
+                columns = [f"X#cwt_{window_size}_width_{width}_{k}" for k in range(window_size)]
+                for row in [window_size, 40, 99]:
+                    window = X["X"].iloc[row - window_size : row].values
+                    np.testing.assert_allclose(result.loc[row, columns], fastcwt(window, width))
+        # Windows with a missing value are missing
+        self.assertTrue(result.iloc[51:57].isna().all().all())
+
     def test_withmissing(self):
         X = pd.DataFrame({"X": [10, 12, 15, np.nan, 0, 0, 1]})
         roller = BuildRollingFeatures("sum", lookback=0, window_size=2, keep_original=False)
@@ -300,6 +379,95 @@ class TestRollingFeatures(unittest.TestCase):
         expected = ["X", "X#lag_1", "X#lag_2", "X#lag_3"]
         self.assertEqual(result, expected)
 
+    def test_get_feature_names_after_fit(self):
+        # The column layout is already known after fitting, before transform is called
+        roller = BuildRollingFeatures("fourier", lookback=0, window_size=[4, 5])
+        roller.fit(self.X)
+        expected = ["X", "X#fourier_4_1", "X#fourier_4_2", "X#fourier_5_1", "X#fourier_5_2"]
+        self.assertEqual(roller.get_feature_names_out(), expected)
+        self.assertEqual(list(roller.transform(self.X).columns), expected)
+
+    def test_transform_array(self):
+        X = self.X.assign(Y=self.X.X * 2)
+        for rolling_type, window_size in [("lag", [1, 2]), ("mean", [2, 3]), ("fourier", 4)]:
+            roller = BuildRollingFeatures(rolling_type, lookback=1, window_size=window_size)
+            expected = roller.fit_transform(X)
+            result, feature_names = roller.transform_array(X)
+            self.assertEqual(feature_names, list(expected.columns))
+            np.testing.assert_array_equal(result, expected.values)
+
+    def test_mixed_dtypes(self):
+        # Features of numeric columns stay float when there are non-numeric columns
+        X = pd.DataFrame({"A": np.arange(6), "S": list("abcdef"), "B": np.linspace(0, 1, 6)})
+        roller = BuildRollingFeatures("lag", lookback=0, window_size=[1, 2], keep_original=True)
+        result = roller.fit_transform(X)
+        expected = pd.concat(
+            [X]
+            + [
+                X[column].shift(window).rename(f"{column}#lag_{window}")
+                for window in [1, 2]
+                for column in ["A", "S", "B"]
+            ],
+            axis=1,
+        )
+        expected[["A#lag_1", "A#lag_2"]] = expected[["A#lag_1", "A#lag_2"]].astype(float)
+        assert_frame_equal(result, expected)
+        self.assertEqual(result["S#lag_1"].dtype, object)
+
+        array, feature_names = roller.transform_array(X)
+        self.assertEqual(feature_names, list(expected.columns))
+        self.assertEqual(array[3, 4], "c")
+        self.assertEqual(array[3, 6], 1.0)
+
+    def test_n_jobs(self):
+        # The output should not depend on the number of jobs
+        X = pd.DataFrame({"A": np.arange(20.0), "B": np.arange(20.0) ** 2, "C": np.cos(range(20))})
+        for rolling_type, window_size in [("mean", [2, 3]), ("fourier", [4, 6]), ("median", 3)]:
+            roller = BuildRollingFeatures(rolling_type, window_size=window_size)
+            expected = roller.fit_transform(X)
+            roller = BuildRollingFeatures(rolling_type, window_size=window_size, n_jobs=2)
+            assert_frame_equal(roller.fit_transform(X), expected)
+
+    def test_partial_transform(self):
+        rng = np.random.default_rng(42)
+        X = pd.DataFrame(rng.normal(5, 10, size=(200, 2)), columns=["X", "Y"])
+        X.iloc[50:53, 0] = np.nan
+        X.iloc[120, 1] = np.nan
+        for rolling_type in ["lag", "diff", "sum", "mean", "var", "std", "numpos", "min", "max"]:
+            for lookback, deviation in [(0, None), (2, "subtract")]:
+                roller = BuildRollingFeatures(
+                    rolling_type, lookback=lookback, window_size=[1, 4], deviation=deviation
+                )
+                expected = roller.fit_transform(X)
+                roller.fit(X)
+                result = [roller.partial_transform(X.iloc[:30])]
+                result += [roller.partial_transform(X.iloc[i : i + 7]) for i in range(30, 200, 7)]
+                assert_frame_equal(pd.concat(result), expected, check_exact=False, atol=1e-9)
+
+        roller = BuildRollingFeatures("ewm", lookback=1, alpha=0.3, keep_original=False)
+        expected = roller.fit_transform(X)
+        roller.fit(X)
+        result = [roller.partial_transform(X.iloc[:100])]
+        result += [roller.partial_transform(X.iloc[[i]]) for i in range(100, 200)]
+        assert_frame_equal(pd.concat(result), expected, check_exact=False, atol=1e-9)
+
+    def test_partial_transform_incorrect_inputs(self):
+        roller = BuildRollingFeatures("median", window_size=2).fit(self.X)
+        self.assertRaises(ValueError, roller.partial_transform, self.X)
+        roller = BuildRollingFeatures("mean", window_size="2H").fit(self.X)
+        self.assertRaises(ValueError, roller.partial_transform, self.X)
+        roller = BuildRollingFeatures("mean", window_size=2).fit(self.X)
+        roller.partial_transform(self.X)
+        self.assertRaises(ValueError, roller.partial_transform, self.X.assign(Y=1))
+
+    def test_get_lookback(self):
+        roller = BuildRollingFeatures("mean", window_size=[2, 5], lookback=3).fit(self.X)
+        self.assertEqual(roller.get_lookback(), (8, pd.Timedelta(0)))
+        roller = BuildRollingFeatures("lag", window_size=[2, "2H"], lookback=0).fit(self.X)
+        self.assertEqual(roller.get_lookback(), (2, pd.Timedelta("2H")))
+        roller = BuildRollingFeatures("ewm", alpha=0.5).fit(self.X)
+        self.assertIsNone(roller.get_lookback())
+
     def test_get_feature_names_with_lookback(self):
         roller = BuildRollingFeatures(
             "lag", lookback=0, window_size=[1, 2, 3], add_lookback_to_colname=True
@@ -375,6 +543,84 @@ class TestRollingFeatures(unittest.TestCase):
 
         assert_frame_equal(result, expected)
 
+    def test_lag_diff_datetimeindex(self):
+        # The last value at or before 1 hour ago, without making the timestamps equidistant
+        for rolling_type, expected in [
+            ("lag", [np.nan, 10, 12, 15, 9, 0, 0]),
+            ("diff", [np.nan, 2, 3, -6, -9, 0, 1]),
+        ]:
+            roller = BuildRollingFeatures(
+                rolling_type, lookback=0, window_size=["1H", 1], keep_original=False
+            )
+            result = roller.fit_transform(self.X_times)
+            self.assertEqual(list(result.columns), [f"X#{rolling_type}_1H", f"X#{rolling_type}_1"])
+            np.testing.assert_array_equal(result[f"X#{rolling_type}_1H"], expected)
+
+        roller = BuildRollingFeatures("lag", lookback=0, window_size="90min", keep_original=False)
+        result = roller.fit_transform(self.X_times)
+        np.testing.assert_array_equal(result["X#lag_90min"], [np.nan, np.nan, 10, 15, 15, 9, 0])
+
+        # Non-numeric columns use the same positions
+        X = self.X_times.assign(S=list("abcdefg"))
+        roller = BuildRollingFeatures("lag", lookback=0, window_size="90min", keep_original=False)
+        result = roller.fit_transform(X)
+        np.testing.assert_array_equal(result["X#lag_90min"], [np.nan, np.nan, 10, 15, 15, 9, 0])
+        self.assertEqual(list(result["S#lag_90min"].iloc[2:]), list("accde"))
+        self.assertTrue(result["S#lag_90min"].iloc[:2].isna().all())
+
+        # A float window size is not read as a time offset of nanoseconds
+        for rolling_type in ["lag", "diff", "mean"]:
+            roller = BuildRollingFeatures(rolling_type, lookback=0, window_size=2.0)
+            self.assertRaises(ValueError, roller.fit_transform, self.X_times)
+
+    def test_ewm_halflife(self):
+        roller = BuildRollingFeatures("ewm", lookback=0, window_size="2H", keep_original=False)
+        result = roller.fit_transform(self.X_times)
+        expected = self.X_times["X"].ewm(halflife="2H", times=self.X_times.index).mean()
+        self.assertEqual(list(result.columns), ["X#ewm_2H"])
+        np.testing.assert_allclose(result["X#ewm_2H"], expected)
+
+        # The gap of 2 hours weighs 1 / 4 instead of 1 / 2
+        weights = np.array([0.5**3.5, 0.5**3, 0.5**2.5, 0.5**1.5, 0.5**1, 0.5**0.5, 1])
+        self.assertAlmostEqual(
+            result["X#ewm_2H"].iloc[-1], np.sum(weights * self.X_times["X"]) / np.sum(weights)
+        )
+
+    def test_trimmean_datetimeindex(self):
+        roller = BuildRollingFeatures(
+            "trimmean", lookback=0, window_size="3H", proportiontocut=0.3, keep_original=False
+        )
+        result = roller.fit_transform(self.X_times)
+        expected = pd.DataFrame(
+            {"X#trimmean_3H": [10, 11, 12 + 1 / 3, 12, 4.5, 3, 1 / 3]},
+            index=pd.DatetimeIndex(self.times),
+        )
+        assert_frame_equal(result, expected)
+
+        # A time offset window with a missing value is missing, even if the missing value would
+        # be sorted into the trimmed tail
+        index = pd.date_range("2020-01-01", periods=10, freq="H")
+        X = pd.DataFrame({"X": [1, 2, 3, np.nan, 5, 6, 7, 8, 9, 10]}, index=index)
+        roller = BuildRollingFeatures(
+            "trimmean", lookback=0, window_size="5H", proportiontocut=0.2, keep_original=False
+        )
+        result = roller.fit_transform(X)
+        expected = [1, 1.5, 2, np.nan, np.nan, np.nan, np.nan, np.nan, 7, 8]
+        np.testing.assert_array_equal(result["X#trimmean_5H"], expected)
+
+        # Compare to scipy on irregular data with missing values
+        rng = np.random.default_rng(42)
+        index = pd.date_range("2020-01-01", periods=500, freq="min").delete(np.arange(3, 500, 7))
+        X = pd.DataFrame({"X": rng.normal(size=index.size)}, index=index)
+        X.iloc[100:103] = np.nan
+        for window_size in [12, "12min"]:
+            roller = BuildRollingFeatures(
+                "trimmean", lookback=0, window_size=window_size, keep_original=False
+            )
+            result = roller.fit_transform(X)
+            expected = X["X"].rolling(window_size).apply(lambda w: trim_mean(w, 0.1), raw=True)
+            np.testing.assert_allclose(result.iloc[:, 0], expected, rtol=1e-12)
+
     def test_nfft(self):
         X = pd.DataFrame({"X": pd.concat([self.X.X] * 2)})  # length 14
         times = pd.Series(pd.to_datetime(self.times))
@@ -460,9 +706,11 @@ class TestRollingFeatures(unittest.TestCase):
         self.assertRaises(TypeError, validate, window_size=1, rolling_type=np.mean)
         self.assertRaises(TypeError, validate, window_size=1, lookback="2")
 
-        # width must be a positive number
+        # width must be a positive number, or a list of positive numbers
         self.assertRaises(TypeError, validate, window_size=1, width="2")
-        self.assertRaises(TypeError, validate, window_size=1, width=[2])
+        self.assertRaises(TypeError, validate, window_size=1, width=[2, "2"])
+        self.assertRaises(TypeError, validate, window_size=1, width=[])
+        self.assertRaises(ValueError, validate, window_size=1, width=[2, 0])
         self.assertRaises(ValueError, validate, window_size=1, width=0)
 
         # ewm must have alpha in (0, 1]
@@ -494,17 +742,18 @@ class TestRollingFeatures(unittest.TestCase):
         self.assertRaises(Exception, validate, rolling_type="trimmean", proportiontocut=0.8)
         self.assertRaises(Exception, validate, rolling_type="trimmean", proportiontocut=[0.1, 0.2])
 
-        # timeoffset can only be used with datetimeindex, and not with lag/ewm/fourier/diff
-        self.assertRaises(ValueError, validate, window_size="1H")
+        # chunksize must be a positive integer
+        self.assertRaises(ValueError, validate, window_size=4, rolling_type="fourier", chunksize=0)
         self.assertRaises(
-            ValueError, validate, X=self.X_times, window_size="1H", rolling_type="lag"
+            TypeError, validate, window_size=4, rolling_type="fourier", chunksize=[1]
         )
+
+        # timeoffset can only be used with datetimeindex, and not with fourier/cwt
+        self.assertRaises(ValueError, validate, window_size="1H")
+        self.assertRaises(ValueError, validate, window_size="1H", rolling_type="lag")
+        self.assertRaises(ValueError, validate, window_size=[1, "1H"], rolling_type="diff")
         self.assertRaises(
-            ValueError,
-            validate,
-            X=self.X_times,
-            window_size=[1, "1H"],
-            rolling_type="lag",
+            Exception, validate, X=self.X_times, window_size="1H", rolling_type="fourier"
         )
 
 
@@ -1,10 +1,11 @@
 import numpy as np
 import unittest
+from unittest import mock
 
 import pandas as pd
 from pandas.testing import assert_frame_equal
 
-from sam.feature_engineering import SimpleFeatureEngineer
+from sam.feature_engineering import SimpleFeatureEngineer, simple_feature_engineering
 
 
 class TestSimpleFeatureEngineer(unittest.TestCase):
@@ -59,6 +60,61 @@ class TestSimpleFeatureEngineer(unittest.TestCase):
         X_out = fe.fit_transform(self.X)
         assert_frame_equal(X_out, X_out_exp, check_dtype=False)
 
+    def test_rolling_plan(self):
+        rolling_features = [
+            ("A", "mean", 2),
+            ("A", "max", 2),
+            ("B", "lag", 1),
+            ("A", "mean", 2),  # duplicate
+            ("A", "std", 2),
+        ]
+        fe = SimpleFeatureEngineer(rolling_features=rolling_features)
+        X_out = fe.fit_transform(self.X)
+        feature_names, groups = fe.rolling_plan_
+        self.assertEqual(feature_names, ["A_mean_2", "A_max_2", "B_lag_1", "A_std_2"])
+        self.assertEqual(
+            groups, [("A", 2, ["mean", "max", "std"], [0, 1, 3]), ("B", 1, ["lag"], [2])]
+        )
+        X_out_exp = pd.DataFrame(
+            {
+                "A_mean_2": [np.nan, 1.5, 2.5, 3.5, 4.5],
+                "A_max_2": [np.nan, 2, 3, 4, 5],
+                "B_lag_1": [np.nan, 3, 4, 5, 6],
+                "A_std_2": [np.nan] + [np.sqrt(0.5)] * 4,
+            },
+            index=self.dates,
+        )
+        assert_frame_equal(X_out, X_out_exp)
+
+    def test_n_jobs(self):
+        rolling_features = [("A", "mean", 2), ("B", "lag", 1), ("A", "max", 3), ("B", "std", 2)]
+        X_out_exp = SimpleFeatureEngineer(rolling_features=rolling_features).fit_transform(self.X)
+        fe = SimpleFeatureEngineer(rolling_features=rolling_features, n_jobs=2)
+        X_out = fe.fit_transform(self.X)
+        assert_frame_equal(X_out, X_out_exp)
+
+    def test_rolling_group_prefix_sums(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=200)
+        values[[20, 21, 150]] = np.nan
+        X = pd.DataFrame({"A": values}, index=pd.date_range("2000-01-01", periods=200, freq="H"))
+        methods = ["sum", "mean", "var", "std", "max"]
+        rolling_features = [("A", method, 24) for method in methods] + [("A", "mean", "3H")]
+        fe = SimpleFeatureEngineer(rolling_features=rolling_features)
+        with mock.patch(
+            "sam.feature_engineering.simple_feature_engineering._prefix_sums",
+            wraps=simple_feature_engineering._prefix_sums,
+        ) as prefix_sums:
+            X_out = fe.fit_transform(X)
+        # All prefix sum methods of the integer window share one set of prefix sums
+        self.assertEqual(prefix_sums.call_count, 2)  # fit and transform
+        self.assertEqual(prefix_sums.call_args.args[1], ["sum", "mean", "var", "std"])
+        X_out_exp = pd.DataFrame(
+            {f"A_{method}_24": getattr(X["A"].rolling(24), method)() for method in methods}
+        )
+        X_out_exp["A_mean_3H"] = X["A"].rolling("3H").mean()
+        assert_frame_equal(X_out, X_out_exp, check_names=False)
+
     def test_rolling_feature_datestring(self):
         rolling_features = [
             ("A", "mean", "2D"),
@@ -117,8 +173,42 @@ class TestSimpleFeatureEngineer(unittest.TestCase):
                 "day_of_week_onehot_7": [0, 1, 0, 0, 0],
             },
             index=self.dates,
+            dtype=np.uint8,
         )
 
         fe = SimpleFeatureEngineer(time_features=time_features)
         X_out = fe.fit_transform(self.X)
         assert_frame_equal(X_out, X_out_exp)
+
+        fe = SimpleFeatureEngineer(time_features=time_features, sparse_output=True)
+        X_out = fe.fit_transform(self.X)
+        self.assertTrue(all(isinstance(dtype, pd.SparseDtype) for dtype in X_out.dtypes))
+        assert_frame_equal(X_out.sparse.to_dense(), X_out_exp)
+
+    def test_get_lookback(self):
+        rolling_features = [("X", "lag", 3), ("X", "mean", 12), ("X", "max", "1H")]
+        fe = SimpleFeatureEngineer(rolling_features, [("hour_of_day", "onehot")])
+        self.assertEqual(fe.get_lookback(), (12, pd.Timedelta("1H")))
+        fe = SimpleFeatureEngineer(time_features=[("hour_of_day", "onehot")])
+        self.assertEqual(fe.get_lookback(), (0, pd.Timedelta(0)))
+
+    def test_time_features_computed_once(self):
+        time_features = [
+            ("hour_of_day", "onehot"),
+            ("hour_of_day", "cyclical"),
+            ("minute_of_hour", "onehot"),
+        ]
+        fe = SimpleFeatureEngineer(time_features=time_features, drop_first=False)
+        X = pd.DataFrame(index=pd.date_range("2000-01-01", periods=500, freq="7min"))
+        calls = []
+        get_time_column = fe._get_time_column
+        fe._get_time_column = lambda X, component: calls.append(component) or get_time_column(
+            X, component
+        )
+        X_out = fe.fit_transform(X)
+        self.assertEqual(calls, ["hour_of_day", "minute_of_hour"] * 2)  # fit and transform
+        self.assertEqual(X_out.shape, (500, 24 + 2 + 60))
+        self.assertTrue((X_out.filter(like="_onehot_").sum(axis=1) == 2).all())
+        np.testing.assert_array_equal(
+            X_out["minute_of_hour_onehot_14"], (X.index.minute == 14).astype(np.uint8)
+        )
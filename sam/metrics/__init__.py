@@ -1,4 +1,5 @@
-from .custom_callbacks import R2Evaluation  # noqa: F401
+import importlib
+
 from .incident_recall import (
     incident_recall,
     make_incident_recall_scorer,
@@ -36,3 +37,13 @@ __all__ = [
     "compute_quantile_ratios",
     "compute_quantile_crossings",
 ]
+
+
+def __getattr__(name: str):
+    """
+    R2Evaluation is a keras callback, so importing it imports tensorflow. It is only imported
+    when it is accessed, so importing sam.metrics stays fast.
+    """
+    if name == "R2Evaluation":
+        return importlib.import_module(".custom_callbacks", __name__).R2Evaluation
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,4 @@
-from typing import Dict, Sequence
+from typing import Dict, Optional, Sequence
 
 import numpy as np
 import pandas as pd
@@ -12,6 +12,9 @@ class R2Evaluation(Callback):
         all_data: Dict[str, np.ndarray],
         prediction_cols: list,
         predict_ahead: Sequence[int],
+        frequency: int = 1,
+        max_train_rows: Optional[int] = None,
+        random_state: Optional[int] = None,
     ):
         """
         Custom keras callback that computes r2 compared to the training mean.
@@ -20,6 +23,11 @@ class R2Evaluation(Callback):
         We therefore implemented it as a callback, which is only evaluated at the end of each
         epoch.
 
+        The inputs, targets and output column indexes are converted to arrays once, and the
+        train and validation sets are predicted with a single call per evaluation. To make the
+        callback cheaper, it can be evaluated every `frequency` epochs only, and on a fixed
+        random subsample of the training set.
+
         NOTE: this should only be used with MLPTimeseriesRegressor models, not any custom keras
         model.
         NOTE-2: this function returns r2 with the keras_model.predict function. This means that
@@ -31,16 +39,64 @@ class R2Evaluation(Callback):
         all_data: dict
             Dictionary that should include X_train and y_train at least. If validation set is
             present should also include X_val and y_val. The training sets individually should
-            be numpy arrays, and should be the same as are input to the model for training.
+            be the same as are input to the model for training, and y_train should be a
+            dataframe with the target columns.
         prediction_cols: list
             List of columns that accompany a model.predict call
         predict_ahead: integer
             Number of timesteps ahead
+        frequency: integer, optional (default=1)
+            Evaluate every `frequency` epochs, and at the last epoch. In the other epochs, r2
+            is not added to the logs. This means that callbacks that monitor r2 or val_r2, like
+            `EarlyStopping(monitor="val_r2")`, only warn about the missing metric in those
+            epochs and never stop there, so use `frequency=1` with those callbacks.
+        max_train_rows: integer, optional (default=None)
+            If given, the training r2 is computed on a fixed random subsample of this many
+            training rows. The training mean is always computed on the full training set.
+        random_state: integer, optional (default=None)
+            Seed of the training subsample
 
         """
+        super().__init__()
         self.all_data = all_data
         self.prediction_cols = prediction_cols
         self.predict_ahead = predict_ahead
+        self.frequency = frequency
+        self.max_train_rows = max_train_rows
+        self.random_state = random_state
+
+        y_train = all_data["y_train"]
+        target_cols = [self._get_target_col(y_train.columns, p) for p in predict_ahead]
+        self._target_indices = [y_train.columns.get_loc(col) for col in target_cols]
+        self._prediction_indices = [
+            prediction_cols.index("predict_lead_%d_mean" % p) for p in predict_ahead
+        ]
+
+        y_train = np.asarray(y_train, dtype=float)[:, self._target_indices]
+        self._train_mean = y_train.mean(axis=0)
+        rows = np.arange(y_train.shape[0])
+        if max_train_rows is not None and max_train_rows < rows.size:
+            rng = np.random.default_rng(random_state)
+            rows = np.sort(rng.choice(rows, max_train_rows, replace=False))
+        self._n_train = rows.size
+
+        X = [np.asarray(all_data["X_train"], dtype=np.float32)[rows]]
+        y = [y_train[rows]]
+        self._val = "X_val" in all_data.keys()
+        if self._val:
+            X.append(np.asarray(all_data["X_val"], dtype=np.float32))
+            y_val = np.asarray(all_data["y_val"], dtype=float)
+            y.append(y_val[:, self._target_indices])
+        self._X = np.concatenate(X)
+        self._y = np.concatenate(y)
+
+    def _get_target_col(self, columns: pd.Index, p: int) -> str:
+        """The target column of y that belongs to predict ahead `p`"""
+        if len(self.predict_ahead) > 1:
+            # only add the predict ahead if needed
+            thiscol = "_".join(columns[0].split("_")[:-2])
+            return thiscol + "_lead_%d" % p
+        return columns[0]
 
     def on_epoch_end(self, epoch, logs=None):
         """
@@ -50,52 +106,27 @@ class R2Evaluation(Callback):
         if logs is None:
             logs = {}
 
-        val = "X_val" in self.all_data.keys()
-
-        y_hat_train = pd.DataFrame(
-            data=self.model.predict(self.all_data["X_train"]),
-            index=self.all_data["X_train"].index,
-            columns=self.prediction_cols,
-        )
-
-        if val:
-            y_hat_val = pd.DataFrame(
-                data=self.model.predict(self.all_data["X_val"]),
-                index=self.all_data["X_val"].index,
-                columns=self.prediction_cols,
-            )
-
-        r2s = []
-        r2s_val = []
-        for p in self.predict_ahead:
-
-            if len(self.predict_ahead) > 1:
-                # only add the predict ahead if needed
-                thiscol = "_".join(self.all_data["y_train"].columns[0].split("_")[:-2])
-                thiscol += "_lead_%d" % p
-            else:
-                thiscol = self.all_data["y_train"].columns[0]
+        last_epoch = self.params is not None and epoch + 1 == self.params.get("epochs")
+        if (epoch + 1) % self.frequency != 0 and not last_epoch:
+            return
 
-            these_y_train = self.all_data["y_train"].loc[:, thiscol].values
-            these_y_hat_train = y_hat_train["predict_lead_%d_mean" % p].values
-            train_mean = these_y_train.mean()
-
-            if val:
-                these_y_val = self.all_data["y_val"].loc[:, thiscol].values
-                these_y_hat_val = y_hat_val["predict_lead_%d_mean" % p].values
-
-            r2s.append(train_r2(these_y_train, these_y_hat_train, train_mean))
-
-            if val:
-                r2s_val.append(train_r2(these_y_val, these_y_hat_val, train_mean))
+        y_hat = self.model.predict(self._X, verbose=0)[:, self._prediction_indices]
+        n = self._n_train
 
+        r2s = [
+            train_r2(self._y[:n, i], y_hat[:n, i], self._train_mean[i])
+            for i in range(len(self.predict_ahead))
+        ]
         r2 = np.mean(r2s)
         logs["r2"] = r2
-        if val:
+
+        if self._val:
+            r2s_val = [
+                train_r2(self._y[n:, i], y_hat[n:, i], self._train_mean[i])
+                for i in range(len(self.predict_ahead))
+            ]
             r2_val = np.mean(r2s_val)
             logs["val_r2"] = r2_val
-
-        if val:
             print("r2: {:.6f} - val_r2: {:.6f}".format(r2, r2_val))
         else:
             print("r2: {:.6f}".format(r2))
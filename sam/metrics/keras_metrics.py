@@ -1,7 +1,15 @@
 import warnings
-from typing import List
+from typing import TYPE_CHECKING, List
 
-try:
+if TYPE_CHECKING:
+    import tensorflow as tf
+
+
+def _import_tensorflow():
+    """
+    Imports tensorflow and the keras backend. Tensorflow is an optional dependency, and is only
+    imported when one of the functions below runs, so importing sam stays fast.
+    """
     # Tensorflow often raises warnings when importing.
     # When importing sam, it is not necessary to show these warnings since they
     # are not relevant to sam
@@ -10,13 +18,10 @@ try:
         warnings.simplefilter("ignore", category=FutureWarning)
         import tensorflow as tf
         import tensorflow.keras.backend as K
-except ImportError:
-    # These are optional dependencies so it's not necessary to crash if they aren't found.
-    # However, this will crash once one of the functions below runs.
-    pass
+    return tf, K
 
 
-def keras_tilted_loss(y_true: tf.Tensor, y_pred: tf.Tensor, quantile: float = 0.5):
+def keras_tilted_loss(y_true: "tf.Tensor", y_pred: "tf.Tensor", quantile: float = 0.5):
     """
     Calculate tilted, or quantile loss in Keras. Given a quantile q, and an error e,
     tilted loss is defined as `(1-q) * |e|` if `e < 0`, and `q * |e|` if `e > 0`.
@@ -42,13 +47,14 @@ def keras_tilted_loss(y_true: tf.Tensor, y_pred: tf.Tensor, quantile: float = 0.
     >>> quantile = 0.5  # Quantile, in this case the median
     >>> model.compile(loss=lambda y,f: keras_tilted_loss(y, f, quantile))
     """
+    _, K = _import_tensorflow()
     e = y_true - y_pred
     return K.mean(K.maximum(quantile * e, (quantile - 1) * e), axis=-1)
 
 
 def keras_joint_mse_tilted_loss(
-    y_true: tf.Tensor,
-    y_pred: tf.Tensor,
+    y_true: "tf.Tensor",
+    y_pred: "tf.Tensor",
     quantiles: List[float] = None,
     n_targets: int = 1,
 ):
@@ -89,6 +95,7 @@ def keras_joint_mse_tilted_loss(
     if quantiles is None:
         quantiles = []
     # select the last column (nodes) of the output
+    tf, K = _import_tensorflow()
     k = len(quantiles)
     mean_pred = tf.slice(y_pred, [0, k * n_targets], [-1, n_targets])
     # The last node will be fit with regular mean squared error
@@ -105,8 +112,8 @@ def keras_joint_mse_tilted_loss(
 
 
 def keras_joint_mae_tilted_loss(
-    y_true: tf.Tensor,
-    y_pred: tf.Tensor,
+    y_true: "tf.Tensor",
+    y_pred: "tf.Tensor",
     quantiles: List[float] = None,
     n_targets: int = 1,
 ):
@@ -146,6 +153,7 @@ def keras_joint_mae_tilted_loss(
     if quantiles is None:
         quantiles = []
     # select the last column (nodes) of the output
+    tf, K = _import_tensorflow()
     k = len(quantiles)
     mean_pred = tf.slice(y_pred, [0, k * n_targets], [-1, n_targets])
     # The last node will be fit with 0.5 quantile
@@ -161,7 +169,7 @@ def keras_joint_mae_tilted_loss(
     return loss
 
 
-def keras_rmse(y_true: tf.Tensor, y_pred: tf.Tensor):
+def keras_rmse(y_true: "tf.Tensor", y_pred: "tf.Tensor"):
     """
     Calculate root mean squared error in Keras.
 
@@ -178,6 +186,7 @@ def keras_rmse(y_true: tf.Tensor, y_pred: tf.Tensor):
     >>> model = Sequential(...)  # Any keras model
     >>> model.compile(loss=keras_rmse)
     """
+    _, K = _import_tensorflow()
     return K.sqrt(K.mean(K.square(y_pred - y_true), axis=-1))
 
 
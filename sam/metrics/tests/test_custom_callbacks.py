@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_almost_equal
+from sam.metrics import train_r2
+
+skipkeras = False
+try:
+    import tensorflow as tf
+    from sam.metrics import R2Evaluation
+except ImportError:
+    skipkeras = True
+
+
+@pytest.mark.skipif(skipkeras, reason="Keras backend not found")
+class TestR2Evaluation(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.predict_ahead = [1, 2]
+        self.prediction_cols = [
+            "predict_lead_1_q_0.1",
+            "predict_lead_2_q_0.1",
+            "predict_lead_1_mean",
+            "predict_lead_2_mean",
+        ]
+        y_cols = ["y_diff_lead_1", "y_diff_lead_2"]
+        self.all_data = {
+            "X_train": pd.DataFrame(rng.normal(size=(50, 3))),
+            "y_train": pd.DataFrame(rng.normal(size=(50, 2)), columns=y_cols),
+            "X_val": pd.DataFrame(rng.normal(size=(20, 3))),
+            "y_val": pd.DataFrame(rng.normal(size=(20, 2)), columns=y_cols),
+        }
+        self.model = tf.keras.Sequential([tf.keras.layers.Dense(4, input_shape=(3,))])
+
+    def get_logs(self, epochs, **kwargs):
+        callback = R2Evaluation(self.all_data, self.prediction_cols, self.predict_ahead, **kwargs)
+        callback.set_model(self.model)
+        callback.set_params({"epochs": epochs})
+        all_logs = []
+        for epoch in range(epochs):
+            logs = {}
+            callback.on_epoch_end(epoch, logs)
+            all_logs.append(logs)
+        return all_logs
+
+    def test_r2(self):
+        logs = self.get_logs(epochs=1)[0]
+        train_mean = self.all_data["y_train"].mean()
+        for name, X, y in [("r2", "X_train", "y_train"), ("val_r2", "X_val", "y_val")]:
+            y_hat = self.model.predict(self.all_data[X], verbose=0)
+            expected = np.mean(
+                [
+                    train_r2(self.all_data[y].iloc[:, i].values, y_hat[:, 2 + i], train_mean[i])
+                    for i in range(2)
+                ]
+            )
+            assert_almost_equal(logs[name], expected, decimal=5)
+
+    def test_frequency(self):
+        logs = self.get_logs(epochs=5, frequency=2)
+        self.assertEqual([len(epoch_logs) for epoch_logs in logs], [0, 2, 0, 2, 2])
+
+    def test_subsample(self):
+        callback = R2Evaluation(
+            self.all_data, self.prediction_cols, self.predict_ahead, max_train_rows=10
+        )
+        self.assertEqual(callback._X.shape, (30, 3))
+        self.assertEqual(callback._X.dtype, np.float32)
+        # The training mean still uses all rows
+        assert_almost_equal(callback._train_mean, self.all_data["y_train"].mean().values)
+        logs = self.get_logs(epochs=1, max_train_rows=10, random_state=0)
+        self.assertEqual(logs, self.get_logs(epochs=1, max_train_rows=10, random_state=0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,39 @@
-from .benchmark import benchmark_wrapper
-from .benchmark import (
-    benchmark_model,
-    plot_score_dicts,
-    preprocess_data_for_benchmarking,
-)
-from .keras_templates import create_keras_autoencoder_rnn
-from .keras_templates import (
-    create_keras_autoencoder_mlp,
-    create_keras_quantile_mlp,
-    create_keras_quantile_rnn,
-)
-
-from .sam_shap_explainer import SamShapExplainer
+import importlib
+
 from .linear_model import LinearQuantileRegression
 from .base_model import BaseTimeseriesRegressor
 from .constant_model import ConstantTimeseriesRegressor
 from .lasso_model import LassoTimeseriesRegressor
-from .mlp_model import MLPTimeseriesRegressor
+from .gradient_boosting_model import GradientBoostingTimeseriesRegressor
+from .numpy_mlp import NumpyMLP
+from .fleet import fit_fleet
+
+# These modules (indirectly) use heavy optional dependencies like tensorflow, shap and eli5.
+# They are only imported when one of their attributes is accessed, so importing sam.models
+# stays fast when they are not needed.
+_LAZY_ATTRIBUTES = {
+    "benchmark_wrapper": ".benchmark",
+    "benchmark_model": ".benchmark",
+    "plot_score_dicts": ".benchmark",
+    "preprocess_data_for_benchmarking": ".benchmark",
+    "create_keras_autoencoder_rnn": ".keras_templates",
+    "create_keras_autoencoder_mlp": ".keras_templates",
+    "create_keras_quantile_mlp": ".keras_templates",
+    "create_keras_quantile_rnn": ".keras_templates",
+    "SamShapExplainer": ".sam_shap_explainer",
+    "MLPTimeseriesRegressor": ".mlp_model",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
+
 
 __all__ = [
     "benchmark_wrapper",
@@ -32,5 +49,8 @@ __all__ = [
     "BaseTimeseriesRegressor",
     "ConstantTimeseriesRegressor",
     "LassoTimeseriesRegressor",
+    "GradientBoostingTimeseriesRegressor",
     "MLPTimeseriesRegressor",
+    "fit_fleet",
+    "NumpyMLP",
 ]
@@ -1,15 +1,14 @@
 import warnings
 from abc import ABC, abstractmethod
-from operator import itemgetter
-from typing import Callable, List, Sequence, Tuple, Union
+from typing import Callable, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
 from sam.feature_engineering import BaseFeatureEngineer, IdentityFeatureEngineer
 from sam.models.utils import remove_target_nan, remove_until_first_value
 from sam.metrics import joint_mae_tilted_loss, joint_mse_tilted_loss
-from sam.preprocessing import inverse_differenced_target, make_shifted_target
-from sam.utils import assert_contains_nans, make_df_monotonic
+from sam.preprocessing import make_shifted_target
+from sam.utils import assert_contains_nans
 from sklearn.base import BaseEstimator, RegressorMixin, TransformerMixin
 from sklearn.utils.validation import check_is_fitted
 from sklearn.pipeline import Pipeline
@@ -123,7 +122,7 @@ class BaseTimeseriesRegressor(BaseEstimator, RegressorMixin, ABC):
         if len(np.unique(self.predict_ahead)) != len(self.predict_ahead):
             raise ValueError("predict_ahead contains double values")
 
-    def validate_data(self, X: pd.DataFrame) -> None:
+    def validate_data(self, X: pd.DataFrame, history: pd.DataFrame = None) -> None:
         """
         Validates the data and raises an exception if:
         - There is no time columns
@@ -133,7 +132,10 @@ class BaseTimeseriesRegressor(BaseEstimator, RegressorMixin, ABC):
         ----------
         x: pd.DataFrame
             The dataframe to validate
+        history: pd.DataFrame, optional (default=None)
+            Rows before X, that are validated together with X
         """
+        X = self._add_history(X, history)
         if self.timecol is None:
             if isinstance(X.index, pd.DatetimeIndex):
                 monospaced = X.index.to_series().diff().dropna().unique().size == 1
@@ -250,8 +252,11 @@ class BaseTimeseriesRegressor(BaseEstimator, RegressorMixin, ABC):
         ]
         self.prediction_cols_ += ["predict_lead_{}_mean".format(p) for p in self.predict_ahead]
         self.n_outputs_ = len(self.prediction_cols_)
+        self._monotonic_indices = self._get_monotonic_indices()
 
         X_transformed, y_transformed = self.preprocess(X, y, train=True)
+        # The end of the training data is the history of update_and_predict
+        self._history = None if self.get_lookback() is None else self._trim_history(X)
 
         assert_contains_nans(
             X_transformed, "Data cannot contain nans. Imputation not supported for now"
@@ -301,7 +306,11 @@ class BaseTimeseriesRegressor(BaseEstimator, RegressorMixin, ABC):
 
     @abstractmethod
     def predict(
-        self, X: pd.DataFrame, y: pd.Series = None, return_data: bool = False
+        self,
+        X: pd.DataFrame,
+        y: pd.Series = None,
+        return_data: bool = False,
+        history: pd.DataFrame = None,
     ) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
         """Predict on new data using a trained model
 
@@ -341,8 +350,13 @@ class BaseTimeseriesRegressor(BaseEstimator, RegressorMixin, ABC):
         raise NotImplementedError("Abstract method. Needs to be implemented by subclass")
 
     def preprocess_predict(
-        self, X: pd.DataFrame, y: pd.Series, dropna: bool = False
-    ) -> pd.DataFrame:
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        dropna: bool = False,
+        return_array: bool = False,
+        history: pd.DataFrame = None,
+    ) -> Union[pd.DataFrame, np.ndarray]:
         """
         Transform a DataFrame X so it can be fed to self.model_.
         This is useful for several usecases, where you want to use the underlying
@@ -357,6 +371,13 @@ class BaseTimeseriesRegressor(BaseEstimator, RegressorMixin, ABC):
             The target values.
         dropna: bool, optional (default=False)
             If True, delete the rows that contain NaN values.
+        return_array: bool, optional (default=False)
+            If True, return a numpy array instead of a dataframe. If the feature engineer
+            (or the last step of the feature engineering pipeline) has a `transform_array`
+            method, like `BuildRollingFeatures`, no intermediate dataframe is created at all.
+        history: pd.DataFrame, optional (default=None)
+            Rows before X, that are only used as context for the feature engineering. Only the
+            rows of X are returned.
         """
         # This function only works if the estimator is fitted
         check_is_fitted(self, "feature_engineer_")
@@ -364,30 +385,54 @@ class BaseTimeseriesRegressor(BaseEstimator, RegressorMixin, ABC):
         if y is not None:
             BaseTimeseriesRegressor.verify_same_indexes(X, y)
 
-        X_transformed = pd.DataFrame(
-            self.feature_engineer_.transform(X),
-            index=X.index,
-            columns=self.get_feature_names_out(),
-        )
+        X_context = self._add_history(X, history)
+        n_context = X_context.shape[0] - X.shape[0]
+
+        if return_array:
+            X_transformed = self._transform_array(X_context)[n_context:]
+        else:
+            X_transformed = pd.DataFrame(
+                self.feature_engineer_.transform(X_context),
+                index=X_context.index,
+                columns=self.get_feature_names_out(),
+            ).iloc[n_context:]
 
         if dropna:
             X_transformed = X_transformed[~np.isnan(X_transformed).any(axis=1)]
         return X_transformed
 
+    def _transform_array(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Applies the feature engineer to X and returns a numpy array. Uses `transform_array`
+        of the feature engineer or the last pipeline step if available.
+        """
+        feature_engineer = self.feature_engineer_
+        if hasattr(feature_engineer, "transform_array"):
+            return feature_engineer.transform_array(X)[0]
+        if isinstance(feature_engineer, Pipeline) and hasattr(
+            feature_engineer.steps[-1][-1], "transform_array"
+        ):
+            if len(feature_engineer.steps) > 1:
+                X = feature_engineer[:-1].transform(X)
+            return feature_engineer.steps[-1][-1].transform_array(X)[0]
+        return np.asarray(feature_engineer.transform(X))
+
     def postprocess_predict(
         self,
-        prediction: pd.DataFrame,
+        prediction: Union[np.ndarray, pd.DataFrame],
         X: pd.DataFrame,
         y: pd.Series,
         force_monotonic_quantiles: bool = False,
     ) -> pd.DataFrame:
         """
-        Postprocessing function for the prediction result.
+        Postprocessing function for the prediction result. Works on the raw array: undoes the
+        scaling of all outputs with a single call of the scaler, undoes the differencing of all
+        horizons at once, and only creates a dataframe at the end.
 
         Parameters
         ----------
-        prediction : pd.DataFrame
-            Dataframe containing the prediction.
+        prediction : np.ndarray or pd.DataFrame
+            The raw output of the model, with the columns `prediction_cols_`.
         X : pd.DataFrame
             The training input samples.
         y : pd.Series
@@ -405,33 +450,50 @@ class BaseTimeseriesRegressor(BaseEstimator, RegressorMixin, ABC):
         pd.DataFrame
             Postprocessed predictions.
         """
-        # Put the predictions in a dataframe so we can undo the differencing
-        prediction = pd.DataFrame(prediction, columns=self.prediction_cols_, index=X.index)
+        # The outputs are grouped per quantile (and the mean last), with one column per horizon
+        n_rows, n_horizons = X.shape[0], len(self.predict_ahead)
+        values = np.array(prediction, dtype=float).reshape(n_rows, -1)
 
-        # Undo the scaling per quantile
+        # Undo the scaling of all outputs at once, every group is a row for the scaler
         if self.y_scaler is not None:
-            for output_col in [f"q_{q}" for q in self.quantiles] + ["mean"]:
-                mask = prediction.columns.str.contains(output_col)
-                sub_prediction = prediction.loc[:, mask]
-                sub_prediction = pd.DataFrame(
-                    self.y_scaler.inverse_transform(sub_prediction.values),
-                    index=sub_prediction.index,
-                    columns=sub_prediction.columns,
-                )
-                prediction.loc[:, mask] = sub_prediction
+            values = self.y_scaler.inverse_transform(values.reshape(-1, n_horizons))
+            values = np.asarray(values, dtype=float).reshape(n_rows, -1)
 
-        # Undo the differencing
+        # Undo the differencing, by adding the present y to all outputs
         if self.use_diff_of_y:
-            prediction = inverse_differenced_target(prediction, y)
+            if y is None:
+                raise ValueError("You must provide y when using use_diff_of_y=True")
+            values += np.asarray(y, dtype=float).reshape(-1, 1)
 
         if force_monotonic_quantiles:
-            prediction = self.make_prediction_monotonic(prediction)
+            self._make_monotonic_array(values)
 
+        prediction = pd.DataFrame(values, columns=self.prediction_cols_, index=X.index)
         if prediction.shape[1] == 1:
             prediction = prediction.iloc[:, 0]
 
         return prediction
 
+    def _get_monotonic_indices(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The column indexes of the upper and lower band quantiles in `prediction_cols_`, each with
+        shape `(horizons, quantiles)`. Both bands are ordered from the inner to the outer
+        quantiles. Computed once in `preprocess_fit`.
+        """
+        upper = sorted(q for q in self.quantiles if q > 0.5)
+        lower = sorted((q for q in self.quantiles if q < 0.5), reverse=True)
+        positions = {col: i for i, col in enumerate(self.prediction_cols_)}
+        return tuple(
+            np.array(
+                [
+                    [positions["predict_lead_{}_q_{}".format(p, q)] for q in band]
+                    for p in self.predict_ahead
+                ],
+                dtype=int,
+            ).reshape(len(self.predict_ahead), len(band))
+            for band in (upper, lower)
+        )
+
     def make_prediction_monotonic(self, prediction: pd.DataFrame) -> pd.DataFrame:
         """
         When fitting multiple quantile regressions it is possible that individual quantile
@@ -443,44 +505,157 @@ class BaseTimeseriesRegressor(BaseEstimator, RegressorMixin, ABC):
         Parameters
         ----------
         prediction : pd.DataFrame
-            Dataframe containing a prediction containing several quantiles
+            Dataframe containing a prediction containing several quantiles, with the columns
+            `prediction_cols_`
 
         Returns
         -------
         pd.DataFrame
             Prediction for which the quantiles are (now) monotonic
         """
-        # Retrieve prediction columns and split them by group (predict ahead)
-        grouped_cols = {}
-        for p in self.predict_ahead:
-            grouped_cols[p] = [
-                [q, "predict_lead_{}_q_{}".format(p, q)]
-                for q in self.quantiles
-                if "predict_lead_{}_q_{}".format(p, q) in prediction.columns
+        values = prediction.to_numpy(dtype=float, copy=True)
+        self._make_monotonic_array(values)
+        return pd.DataFrame(values, index=prediction.index, columns=prediction.columns)
+
+    def _make_monotonic_array(self, values: np.ndarray) -> None:
+        """Makes the quantiles of a prediction array monotonic, in place"""
+        indices = getattr(self, "_monotonic_indices", None)
+        if indices is None:
+            indices = self._get_monotonic_indices()
+        upper, lower = indices
+
+        # values[:, upper] has shape (rows, horizons, quantiles). Upper band quantiles should
+        # monotonic increase, and lower band quantiles should monotonic decrease.
+        # fmax and fmin ignore missing values
+        if upper.size > 0:
+            values[:, upper] = np.fmax.accumulate(values[:, upper], axis=2)
+        if lower.size > 0:
+            values[:, lower] = np.fmin.accumulate(values[:, lower], axis=2)
+
+    def get_lookback(self) -> Optional[Tuple[int, pd.Timedelta]]:
+        """
+        The history that the feature engineer needs to compute the features of a new row.
+        This is derived from the `get_lookback` method of the feature engineer. For pipelines,
+        the lookbacks of the steps are added up, and steps without `get_lookback` are assumed
+        to only use the row itself, like scalers.
+
+        Returns
+        -------
+        tuple of (int, pd.Timedelta), or None:
+            the number of previous rows, and the time span before the new row, that are needed.
+            None if the entire history is needed, or if it is unknown.
+        """
+        if isinstance(self.feature_engineer_, Pipeline):
+            steps = [
+                step for _, step in self.feature_engineer_.steps if hasattr(step, "get_lookback")
             ]
+        elif hasattr(self.feature_engineer_, "get_lookback"):
+            steps = [self.feature_engineer_]
+        else:
+            return None
+
+        n_rows, timespan = 0, pd.Timedelta(0)
+        for step in steps:
+            lookback = step.get_lookback()
+            if lookback is None:
+                return None
+            n_rows += lookback[0]
+            timespan += lookback[1]
+        return n_rows, timespan
+
+    def _trim_history(self, X: pd.DataFrame) -> pd.DataFrame:
+        """
+        Keeps the last rows of X that are needed to compute the features of a new row.
+        If the lookback is unknown, all rows are kept.
+        """
+        lookback = self.get_lookback()
+        if lookback is None:
+            return X
+        n_rows, timespan = lookback
+        start = max(X.shape[0] - n_rows, 0)
+        if timespan > pd.Timedelta(0) and X.shape[0] > 0:
+            times = pd.DatetimeIndex(X.index if self.timecol is None else X[self.timecol])
+            # Time offset lags need the last row at or before the time span
+            first_needed = times.searchsorted(times[-1] - timespan, side="right") - 1
+            start = min(start, max(first_needed, 0))
+        return X.iloc[start:]
+
+    def update_and_predict(
+        self, X: pd.DataFrame, y: pd.Series = None, **predict_kwargs
+    ) -> Union[pd.Series, pd.DataFrame]:
+        """
+        Predicts only the new rows in X, and adds them to the history.
+
+        Forecasting the next step with `predict` requires passing enough history for every
+        lag and rolling window, only to throw away all but the last rows. Instead, the model
+        keeps a history buffer of the rows that the feature engineer needs (see `get_lookback`),
+        starting with the end of the training data. This function only accepts the new rows,
+        and only predicts those, with the history as context for the feature engineering.
+        The result is the same as calling `predict` on the history and the new rows, and taking
+        the last `len(X)` rows.
 
-        # Divide and order ascending
-        lower_band_groups = []
-        upper_band_groups = []
-        for predict_ahead in grouped_cols:
-            sorted_cols = grouped_cols[predict_ahead]
-            sorted_cols.sort(key=itemgetter(0))
-            upper_band = [x[1] for x in sorted_cols if x[0] > 0.5]
-            lower_band = [x[1] for x in sorted_cols if x[0] < 0.5][::-1]
-            if upper_band:
-                upper_band_groups.append(upper_band)
-            if lower_band:
-                lower_band_groups.append(lower_band)
-
-        # Upper band quantiles should monotonic increase, and lower band quantiles should
-        # monotonic decrease
-        for g in upper_band_groups:
-            prediction[g] = make_df_monotonic(prediction[g], aggregate_func="max")
-        for g in lower_band_groups:
-            prediction[g] = make_df_monotonic(prediction[g], aggregate_func="min")
+        The history is passed explicitly to `predict`, so `predict` can be used at the same
+        time. If the lookback of the feature engineer is unknown (None), for example with
+        exponentially weighted features, the history cannot be bounded, and a ValueError is
+        raised.
 
+        Parameters
+        ----------
+        X: pd.DataFrame
+            The new rows, with the same columns as during fit. Must be after the history in time
+        y: pd.Series, optional
+            The target values of the new rows. Required when `use_diff_of_y` is True.
+        predict_kwargs: dict
+            Other arguments for `predict`, like `force_monotonic_quantiles`
+
+        Returns
+        -------
+        pd.Series or pd.DataFrame:
+            The predictions of the new rows
+        """
+        history = self._get_stream_history()
+        prediction = self.predict(X, y, history=history, **predict_kwargs)
+        self._history = self._trim_history(self._add_history(X, history))
         return prediction
 
+    def predict_latest(
+        self, X: pd.DataFrame, y: pd.Series = None, **predict_kwargs
+    ) -> Union[pd.Series, pd.DataFrame]:
+        """
+        Same as `update_and_predict`, but without adding the new rows to the history.
+
+        Parameters
+        ----------
+        X: pd.DataFrame
+            The new rows, with the same columns as during fit. Must be after the history in time
+        y: pd.Series, optional
+            The target values of the new rows. Required when `use_diff_of_y` is True.
+        predict_kwargs: dict
+            Other arguments for `predict`, like `force_monotonic_quantiles`
+
+        Returns
+        -------
+        pd.Series or pd.DataFrame:
+            The predictions of the new rows
+        """
+        return self.predict(X, y, history=self._get_stream_history(), **predict_kwargs)
+
+    def _get_stream_history(self) -> pd.DataFrame:
+        """The history buffer of `update_and_predict`. Raises an error if the lookback of the
+        feature engineer is unknown, since the buffer would grow without bound"""
+        check_is_fitted(self, "model_")
+        if self.get_lookback() is None:
+            raise ValueError(
+                "The lookback of the feature engineer is unknown, so the history that is needed "
+                "to predict new rows is unknown. Use predict with all rows instead"
+            )
+        return self._history
+
+    @staticmethod
+    def _add_history(X: pd.DataFrame, history: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Prepends the history rows to X, if any"""
+        return X if history is None else pd.concat([history, X])
+
     def get_feature_names_out(self, input_features=None) -> List[str]:
         """
         Function for obtaining feature names. Generally used instead of the attribute, and more
@@ -236,7 +236,12 @@ class ConstantTimeseriesRegressor(BaseTimeseriesRegressor):
         return None
 
     def predict(
-        self, X: pd.DataFrame, y: pd.Series = None, return_data: bool = False, **predict_kwargs
+        self,
+        X: pd.DataFrame,
+        y: pd.Series = None,
+        return_data: bool = False,
+        history: pd.DataFrame = None,
+        **predict_kwargs,
     ) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
         """
         Predict using the ConstantTimeseriesRegressor
@@ -259,6 +264,9 @@ class ConstantTimeseriesRegressor(BaseTimeseriesRegressor):
         return_data: bool, optional (default=False)
             whether to return only the prediction, or to return both the prediction and the
             transformed input (X) dataframe.
+        history: pd.DataFrame, optional (default=None)
+            Rows before X, that are only used as context for the feature engineering, and are
+            not predicted. Used by `predict_latest` and `update_and_predict`
 
         Returns
         -------
@@ -267,9 +275,9 @@ class ConstantTimeseriesRegressor(BaseTimeseriesRegressor):
         X_transformed: pd.DataFrame, optional
             The transformed input data, when return_data is True, otherwise None
         """
-        self.validate_data(X)
+        self.validate_data(X, history=history)
 
-        X_transformed = self.preprocess_predict(X, y)
+        X_transformed = self.preprocess_predict(X, y, history=history)
         prediction = self.model_.predict(X_transformed)
 
         prediction = self.postprocess_predict(prediction, X, y)
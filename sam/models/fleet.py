@@ -0,0 +1,230 @@
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import time
+import traceback
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+from sam.models.base_model import BaseTimeseriesRegressor
+from sklearn.base import clone
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # Not available on Windows
+    resource = None
+
+
+def _peak_rss() -> float:
+    """The peak resident set size of the current process in bytes, or NaN if unknown"""
+    if resource is None:
+        return np.nan
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return float(peak) if sys.platform == "darwin" else float(peak) * 1024
+
+
+def _write_arrays(data: pd.DataFrame, folder: str) -> Tuple[list, list, np.ndarray]:
+    """
+    Writes the TIME, TYPE and VALUE columns of the long format `data` to .npy files in
+    `folder`, sorted by ID and TIME, so every series is a contiguous block.
+
+    Returns the unique ids (with their original values), the unique types, and the offsets of
+    the blocks of the ids.
+    """
+    data = data.sort_values(["ID", "TIME"], kind="mergesort")
+    # After sorting, the codes are increasing, in the order of the blocks
+    id_codes, ids = pd.factorize(data["ID"])
+    type_codes, types = pd.factorize(data["TYPE"])
+    offsets = np.searchsorted(id_codes, np.arange(ids.size + 1))
+
+    np.save(os.path.join(folder, "TIME.npy"), pd.DatetimeIndex(data["TIME"]).asi8)
+    np.save(os.path.join(folder, "TYPE.npy"), type_codes)
+    np.save(os.path.join(folder, "VALUE.npy"), data["VALUE"].to_numpy(dtype=float))
+    return list(ids), list(types), offsets
+
+
+# Names that cannot be used as a file or folder name on Windows, with or without an extension
+_RESERVED_NAMES = {"CON", "PRN", "AUX", "NUL"} | {
+    f"{name}{i}" for name in ["COM", "LPT"] for i in range(1, 10)
+}
+
+
+def _folder_names(ids: list) -> list:
+    """
+    Safe and unique folder names for the given ids. Characters other than letters, digits,
+    underscores and dashes are replaced by underscores, so an id cannot contain a path
+    separator or refer to a parent folder. If an id had to be changed, was too long, is empty,
+    is a reserved name, or only differs by case from another id, a hash of the original id is
+    appended to keep the names unique (also on case-insensitive file systems).
+    """
+    names = pd.Series([re.sub(r"[^\w\-]", "_", str(series_id))[:100] for series_id in ids])
+    changed = (names != pd.Series([str(series_id) for series_id in ids])) | (names == "")
+    changed |= names.str.upper().isin(_RESERVED_NAMES)
+    # Unchanged names that only differ by case would share a folder on some file systems
+    changed |= ~changed & names.str.lower().where(~changed).duplicated(keep=False)
+    return [
+        f"{name}_{hashlib.sha1(str(series_id).encode()).hexdigest()[:8]}" if needs_hash else name
+        for series_id, name, needs_hash in zip(ids, names, changed)
+    ]
+
+
+def _read_series(
+    folder: str, start: int, stop: int, types: list, tz: Optional[str]
+) -> pd.DataFrame:
+    """
+    Reads the rows `start:stop` from the memory mapped arrays in `folder`, and converts them to
+    wide format: a DatetimeIndex and one column per TYPE
+    """
+    arrays = {
+        name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r")[start:stop]
+        for name in ["TIME", "TYPE", "VALUE"]
+    }
+    times = pd.DatetimeIndex(np.asarray(arrays["TIME"]).view("datetime64[ns]"))
+    if tz is not None:
+        times = times.tz_localize("UTC").tz_convert(tz)
+    series = pd.DataFrame(
+        {
+            "TIME": times,
+            "TYPE": np.asarray(types, dtype=object)[arrays["TYPE"]],
+            "VALUE": np.asarray(arrays["VALUE"]),
+        }
+    )
+    wide = pd.pivot_table(series, values="VALUE", index="TIME", columns="TYPE")
+    wide.columns.name = None
+    return wide
+
+
+def _fit_series(
+    model: BaseTimeseriesRegressor,
+    folder: str,
+    start: int,
+    stop: int,
+    series_id: Any,
+    model_folder: str,
+    types: list,
+    tz: Optional[str],
+    target: str,
+    fit_kwargs: dict,
+) -> dict:
+    """
+    Fits a clone of `model` on a single series, and dumps it in `model_folder`. Runs in a
+    worker process. Exceptions are caught and reported, so a single series cannot stop the
+    whole run.
+    """
+    start_time = time.perf_counter()
+    report = {
+        "ID": series_id,
+        "folder": model_folder,
+        "n_rows": stop - start,
+        "success": True,
+        "error": None,
+    }
+    try:
+        X = _read_series(folder, start, stop, types, tz)
+        model = clone(model)
+        model.fit(X, X[target], **fit_kwargs)
+        os.makedirs(model_folder, exist_ok=True)
+        model.dump(model_folder, prefix="model")
+    except Exception:
+        report["success"] = False
+        report["error"] = traceback.format_exc()
+    report["wall_time"] = time.perf_counter() - start_time
+    report["peak_rss"] = _peak_rss()
+    return report
+
+
+def fit_fleet(
+    data: pd.DataFrame,
+    model: BaseTimeseriesRegressor,
+    target: str,
+    foldername: str,
+    n_jobs: Optional[int] = None,
+    fit_kwargs: Optional[dict] = None,
+    verbose: int = 0,
+) -> pd.DataFrame:
+    """
+    Fits one model per ID of a long format dataframe, in parallel worker processes.
+
+    The series of every ID are converted to wide format, with one column per TYPE and a
+    DatetimeIndex, and a clone of `model` is fitted with the `target` column as y (the target
+    is also kept in X, for lag features). Every fitted model is saved with its `dump` method in
+    a subfolder of `foldername`, given in the `folder` column of the report, and can be loaded
+    with `model.load(folder)`. The subfolder is named after the ID, with characters that are
+    not safe in a folder name (like path separators) replaced by underscores. If the ID had to
+    be changed, a hash of the ID is appended to keep the folder names unique.
+
+    The data is not pickled to the workers. Instead, the TIME, TYPE and VALUE columns are
+    written once to NumPy files in a temporary folder, sorted by ID, and every worker reads the
+    rows of its series from memory mapped views of those files.
+
+    Failures are caught per series, and reported instead of stopping the run.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        data in SAM format (TIME, ID, TYPE, VALUE columns)
+    model: BaseTimeseriesRegressor
+        the model to use as a template for every series. It is cloned with
+        `sklearn.base.clone`, so only its parameters are used
+    target: str
+        the TYPE to use as the target
+    foldername: str
+        the folder where the fitted models are saved, in a subfolder per ID
+    n_jobs: int, optional (default=None)
+        the number of worker processes. None means 1, and -1 means using all processors.
+    fit_kwargs: dict, optional (default=None)
+        other arguments for the `fit` method of the model
+    verbose: int, optional (default=0)
+        the verbosity of the joblib progress messages
+
+    Returns
+    -------
+    pd.DataFrame:
+        a report with one row per ID, with columns ID (the original ID), folder (the folder
+        of the fitted model), n_rows, success, error, wall_time
+        (the time to read, fit and dump the series in seconds) and peak_rss (the peak resident
+        memory of the worker process so far, in bytes). Sorted like the fitted IDs.
+
+    Examples
+    --------
+    >>> from sam.models import LassoTimeseriesRegressor, fit_fleet
+    >>> from sam.feature_engineering import SimpleFeatureEngineer
+    >>> fe = SimpleFeatureEngineer(rolling_features=[("flow", "lag", 1)], keep_original=True)
+    >>> model = LassoTimeseriesRegressor(predict_ahead=(1,), feature_engineer=fe)
+    >>> report = fit_fleet(data, model, target="flow", foldername="models", n_jobs=-1)
+    >>> report[~report["success"]]
+    >>> model = LassoTimeseriesRegressor.load(report["folder"].iloc[0])
+    """
+    if not set(["TIME", "ID", "TYPE", "VALUE"]).issubset(data.columns):
+        raise ValueError("data must be in SAM format, with TIME, ID, TYPE and VALUE columns")
+    times = pd.DatetimeIndex(data["TIME"])
+    tz = None if times.tz is None else str(times.tz)
+    os.makedirs(foldername, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix="sam_fleet_") as folder:
+        ids, types, offsets = _write_arrays(data, folder)
+        n_jobs = min(effective_n_jobs(n_jobs), max(len(ids), 1))
+        reports = Parallel(n_jobs=n_jobs, backend="loky", verbose=verbose)(
+            delayed(_fit_series)(
+                model,
+                folder,
+                offsets[i],
+                offsets[i + 1],
+                series_id,
+                os.path.join(foldername, folder_name),
+                types,
+                tz,
+                target,
+                fit_kwargs or {},
+            )
+            for i, (series_id, folder_name) in enumerate(zip(ids, _folder_names(ids)))
+        )
+
+    columns = ["ID", "folder", "n_rows", "success", "error", "wall_time", "peak_rss"]
+    return pd.DataFrame(reports, columns=columns)
@@ -0,0 +1,439 @@
+import inspect
+import os
+import time
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sam.feature_engineering import BaseFeatureEngineer
+from sam.models.base_model import BaseTimeseriesRegressor
+from sklearn.base import TransformerMixin, clone
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.utils.validation import check_is_fitted
+
+
+def _supports_validation_data() -> bool:
+    """Whether `HistGradientBoostingRegressor.fit` accepts `X_val` and `y_val`, which were
+    added in scikit-learn 1.7"""
+    return "X_val" in inspect.signature(HistGradientBoostingRegressor.fit).parameters
+
+
+def _fit_output(
+    estimator: HistGradientBoostingRegressor,
+    X: np.ndarray,
+    y: np.ndarray,
+    X_val: Optional[np.ndarray],
+    y_val: Optional[np.ndarray],
+    sample_weight: Optional[np.ndarray],
+) -> Tuple[HistGradientBoostingRegressor, float]:
+    """
+    Fits a clone of `estimator` on a single output, with early stopping on the validation data
+    if given. Returns the fitted estimator and the seconds the fit took.
+    """
+    start_time = time.perf_counter()
+    estimator = clone(estimator)
+    if X_val is None:
+        estimator.fit(X, y, sample_weight=sample_weight)
+    else:
+        estimator.set_params(early_stopping=True)
+        estimator.fit(X, y, sample_weight=sample_weight, X_val=X_val, y_val=y_val)
+    return estimator, time.perf_counter() - start_time
+
+
+class GradientBoostingTimeseriesRegressor(BaseTimeseriesRegressor):
+    """Histogram gradient boosting quantile regression model for time series
+
+    This model combines several approaches to time series data:
+    Multiple outputs for forecasting, quantile regression, and feature engineering.
+    This class fits a sklearn `HistGradientBoostingRegressor` for every quantile and every
+    horizon, with the quantile loss. The average is fitted with the squared error if
+    average_type is 'mean', or as the 0.5 quantile if it is 'median'.
+
+    The features are binned once, and the same binned feature table is shared by all outputs,
+    that are fitted in parallel worker processes if `n_jobs` is given. Boosted trees train much
+    faster than the MLP on CPU, especially on tabular lag features.
+
+    Parameters
+    ----------
+    predict_ahead: tuple of integers, optional (default=(0,))
+        how many steps to predict ahead. For example, if (1, 2), the model will predict both 1 and
+        2 timesteps into the future. If (0,), predict the present.
+    quantiles: tuple of floats, optional (default=())
+        The quantiles to predict. Values between 0 and 1. Keep in mind that the mean will be
+        predicted regardless of this parameter
+    use_diff_of_y: bool, optional (default=False)
+        If True differencing is used (the difference between y now and shifted y),
+        else differencing is not used (shifted y is used).
+    timecol: string, optional (default=None)
+        If not None, the column to use for constructing time features. For now,
+        creating features from a DateTimeIndex is not supported yet.
+    y_scaler: object, optional (default=None)
+        Should be an sklearn-type transformer that has a transform and inverse_transform method.
+        E.g.: StandardScaler() or PowerTransformer()
+    average_type: str (default='mean')
+        Determines what to fit as the average: 'mean', or 'median'. The average is the last
+        node in the output layer and does not reflect a quantile, but rather estimates the central
+        tendency of the data. Setting to 'mean' results in fitting that node with MSE, and
+        setting this to 'median' results in fitting that node with MAE (equal to 0.5 quantile).
+    feature_engineering: object, optional (default=None)
+        Should be an sklearn-type transformer that has a transform method, e.g.
+        `sam.feature_engineering.SimpleFeatureEngineer`.
+    learning_rate : float, optional (default=0.1)
+        The learning rate of the boosting
+    max_iter : int, optional (default=100)
+        The maximum number of trees per output
+    max_leaf_nodes : int, optional (default=31)
+        The maximum number of leaves of every tree
+    max_bins : int, optional (default=255)
+        The maximum number of bins of every feature, at most 255
+    n_jobs : int, optional (default=None)
+        The number of worker processes to fit the outputs with. None means 1, and -1 means using
+        all processors.
+    random_state : int, optional (default=None)
+        Seed of the early stopping split and the feature subsampling of the boosting
+    boosting_options : dict, optional (default=None)
+        Other options for `sklearn.ensemble.HistGradientBoostingRegressor`.
+    kwargs: dict, optional
+        Not used. Just for compatibility of models that inherit from this class.
+
+    Attributes
+    ----------
+    feature_engineer_: Sklearn transformer
+        The transformer used on the raw data before prediction
+    n_inputs_: integer
+        The number of inputs used for the underlying models
+    n_outputs_: integer
+        The number of outputs (columns) from the model
+    prediction_cols_: array of strings
+        The names of the output columns from the model.
+    bin_edges_ : list of np.ndarray
+        The edges of the bins of every feature
+    model_ : list
+        The fitted `HistGradientBoostingRegressor` of every output, in the order of
+        `prediction_cols_`
+    fit_times_ : pd.Series
+        The seconds it took to fit every output, with the prediction columns as index.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from sam.models import GradientBoostingTimeseriesRegressor
+    >>> from sam.feature_engineering import SimpleFeatureEngineer
+
+    >>> data = pd.read_parquet("../data/rainbow_beach.parquet").set_index("TIME")
+    >>> X, y = data, data["water_temperature"]
+
+    >>> simple_features = SimpleFeatureEngineer(
+    ...     rolling_features=[
+    ...         ("wave_height", "mean", 24),
+    ...         ("wave_height", "mean", 12),
+    ...     ],
+    ...     time_features=[
+    ...         ("hour_of_day", "cyclical"),
+    ...     ],
+    ...     keep_original=False,
+    ... )
+
+    >>> model = GradientBoostingTimeseriesRegressor(
+    ...     predict_ahead=(1, 2, 3),
+    ...     quantiles=(0.1, 0.9),
+    ...     feature_engineer=simple_features,
+    ...     n_jobs=-1,
+    ... )
+    >>> model.fit(X, y)
+    """
+
+    def __init__(
+        self,
+        predict_ahead: Sequence[int] = (0,),
+        quantiles: Sequence[float] = (),
+        use_diff_of_y: bool = False,
+        timecol: str = None,
+        y_scaler: TransformerMixin = None,
+        average_type: str = "mean",
+        feature_engineer: BaseFeatureEngineer = None,
+        learning_rate: float = 0.1,
+        max_iter: int = 100,
+        max_leaf_nodes: int = 31,
+        max_bins: int = 255,
+        n_jobs: Optional[int] = None,
+        random_state: Optional[int] = None,
+        boosting_options: dict = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(
+            predict_ahead=predict_ahead,
+            quantiles=quantiles,
+            use_diff_of_y=use_diff_of_y,
+            timecol=timecol,
+            y_scaler=y_scaler,
+            feature_engineer=feature_engineer,
+            **kwargs,
+        )
+        self.average_type = average_type
+        self.learning_rate = learning_rate
+        self.max_iter = max_iter
+        self.max_leaf_nodes = max_leaf_nodes
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.boosting_options = boosting_options
+
+        if self.average_type == "median" and 0.5 in self.quantiles:
+            raise ValueError(
+                "average_type is mean, but 0.5 is also in quantiles (duplicate). "
+                "Either set average_type to mean or remove 0.5 from quantiles"
+            )
+
+    def get_untrained_model(self, quantile: float = None) -> Callable:
+        """Returns a gradient boosting model with the quantile loss, or the squared error loss
+        if quantile is None"""
+        loss = "squared_error" if quantile is None else "quantile"
+        return HistGradientBoostingRegressor(
+            loss=loss,
+            quantile=quantile,
+            learning_rate=self.learning_rate,
+            max_iter=self.max_iter,
+            max_leaf_nodes=self.max_leaf_nodes,
+            max_bins=self.max_bins,
+            random_state=self.random_state,
+            **(self.boosting_options or {}),
+        )
+
+    def _get_untrained_models(self) -> List[HistGradientBoostingRegressor]:
+        """The untrained model of every quantile and the average, in the order of the outputs"""
+        models = [self.get_untrained_model(quantile) for quantile in self.quantiles]
+        if self.average_type == "mean":
+            models.append(self.get_untrained_model())
+        elif self.average_type == "median":
+            models.append(self.get_untrained_model(0.5))
+        else:
+            raise ValueError(f"Unknown average_type: {self.average_type}")
+        return models
+
+    def _fit_bins(self, X: np.ndarray) -> None:
+        """
+        Computes the bin edges of every feature: the midpoints between the unique values if
+        there are at most `max_bins` of them, and quantiles otherwise
+        """
+        self.bin_edges_ = []
+        for values in X.T:
+            values = np.unique(values[~np.isnan(values)])
+            if values.size <= self.max_bins:
+                edges = (values[:-1] + values[1:]) / 2
+            else:
+                edges = np.unique(np.quantile(values, np.linspace(0, 1, self.max_bins + 1)[1:-1]))
+            self.bin_edges_.append(edges)
+
+    def _bin(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """
+        Converts the features to the numbers of their bins. Missing values stay missing. The
+        boosting models only see at most `max_bins` distinct values per feature, so their own
+        binning is trivial, and gives the same splits as binning the original features.
+        """
+        X = np.asarray(X, dtype=float)
+        X_binned = np.empty(X.shape, dtype=np.float32)
+        for i, edges in enumerate(self.bin_edges_):
+            X_binned[:, i] = np.searchsorted(edges, X[:, i], side="right")
+        X_binned[np.isnan(X)] = np.nan
+        return X_binned
+
+    def _bin_validation_data(
+        self, X_val: pd.DataFrame, y_val: pd.DataFrame
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Bins the preprocessed validation data. Like the training rows, only the validation
+        rows with all features and targets are used"""
+        X_val, y_val = self._bin(X_val), pd.DataFrame(y_val).to_numpy(dtype=float)
+        complete = ~(np.isnan(X_val).any(axis=1) | np.isnan(y_val).any(axis=1))
+        return X_val[complete], y_val[complete]
+
+    def fit(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        validation_data: Tuple[pd.DataFrame, pd.Series] = None,
+        sample_weight: Union[pd.Series, np.ndarray] = None,
+        **fit_kwargs,
+    ) -> Callable:
+        """
+        Fits a gradient boosting model for every quantile and horizon, on the same binned
+        feature table.
+
+        This function does the following:
+        - Validate that the input is monospaced and has enough rows
+        - Perform differencing on the target
+        - Fitting/applying the feature engineer
+        - Bookkeeping to create the output columns
+        - Remove rows with nan that can't be used for fitting
+        - Bin the features once, and fit the model of every output in parallel
+        - Optionally, use the validation data for early stopping
+
+        For compatibility with the other models, the method accepts fit_kwargs, but raises a
+        TypeError if any are given, since the boosting models have no other fit arguments.
+
+        Parameters
+        ----------
+        X: pd.DataFrame
+            The independent variables used to 'train' the model
+        y: pd.Series
+            Target data (dependent variable) used to 'train' the model.
+        validation_data: tuple(pd.DataFrame, pd.Series) (X_val, y_val respectively)
+            Data used for early stopping. Every model stops adding trees when its loss on the
+            validation data does not improve anymore. Requires scikit-learn 1.7 or later.
+        sample_weight: pd.Series or np.ndarray, optional (default=None)
+            The weight of every row of X, passed to `HistGradientBoostingRegressor.fit` for the
+            rows that are used for fitting
+
+        Returns
+        -------
+        GradientBoostingTimeseriesRegressor:
+            The fitted model
+        """
+        if fit_kwargs:
+            raise TypeError(f"Unexpected arguments for fit: {', '.join(fit_kwargs)}")
+        if validation_data is not None and not _supports_validation_data():
+            raise ValueError(
+                "validation_data requires scikit-learn 1.7 or later. Use "
+                "boosting_options={'early_stopping': True, 'validation_fraction': ...} to stop "
+                "early on a random part of the training data instead"
+            )
+        if sample_weight is not None:
+            sample_weight = pd.Series(np.asarray(sample_weight, dtype=float), index=X.index)
+        X, y, X_val, y_val = self.preprocess_fit(X, y, validation_data)
+        if sample_weight is not None:
+            # Only the rows that are left after preprocessing
+            sample_weight = sample_weight.loc[X.index].to_numpy()
+        X, y = X.to_numpy(dtype=float), pd.DataFrame(y).to_numpy(dtype=float)
+        self._fit_bins(X)
+        X = self._bin(X)
+        if validation_data is not None:
+            X_val, y_val = self._bin_validation_data(X_val, y_val)
+
+        jobs = [
+            (estimator, horizon)
+            for estimator in self._get_untrained_models()
+            for horizon in range(y.shape[1])
+        ]
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_output)(
+                estimator,
+                X,
+                y[:, horizon],
+                None if validation_data is None else X_val,
+                None if validation_data is None else y_val[:, horizon],
+                sample_weight,
+            )
+            for estimator, horizon in jobs
+        )
+        self.model_ = [estimator for estimator, _ in results]
+        self.fit_times_ = pd.Series(
+            [seconds for _, seconds in results], index=self.prediction_cols_, name="fit_time"
+        )
+        return self
+
+    def predict(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series = None,
+        return_data: bool = False,
+        force_monotonic_quantiles: bool = False,
+        history: pd.DataFrame = None,
+    ) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
+        """
+        Make a prediction, and undo differencing in the case it was used
+
+        Rows with missing features, for example at the start of rolling features, are
+        predicted as missing, like in the other models.
+
+        Parameters
+        ----------
+        X: pd.DataFrame
+            The independent variables used to predict.
+        y: pd.Series
+            The target values
+        return_data: bool, optional (default=False)
+            whether to return only the prediction, or to return both the prediction and the
+            transformed input (X) dataframe.
+        force_monotonic_quantiles: bool, optional (default=False)
+            whether to force quantiles to not overlap. When fitting multiple quantile regressions
+            it is possible that individual quantile regression lines over-lap, or in other words,
+            a quantile regression line fitted to a lower quantile predicts higher that a line
+            fitted to a higher quantile. If this occurs for a certain prediction, the output
+            distribution is invalid. We can force monotonicity by making the outer quantiles
+            at least as high as the inner quantiles.
+        history: pd.DataFrame, optional (default=None)
+            Rows before X, that are only used as context for the feature engineering, and are
+            not predicted. Used by `predict_latest` and `update_and_predict`
+
+        Returns
+        -------
+        prediction: pd.DataFrame
+            The predictions coming from the model
+        X_transformed: pd.DataFrame, optional
+            The transformed input data, when return_data is True, otherwise None
+        """
+        self.validate_data(X, history=history)
+
+        if y is None and self.use_diff_of_y:
+            raise ValueError("You must provide y when using use_diff_of_y=True")
+
+        X_transformed = self.preprocess_predict(
+            X, y, return_array=not return_data, history=history
+        )
+        X_binned = self._bin(X_transformed)
+        prediction = np.stack([model.predict(X_binned) for model in self.model_], axis=1)
+        prediction[np.isnan(X_binned).any(axis=1)] = np.nan
+
+        prediction = self.postprocess_predict(
+            prediction, X, y, force_monotonic_quantiles=force_monotonic_quantiles
+        )
+
+        if return_data:
+            return prediction, X_transformed
+        else:
+            return prediction
+
+    def dump(self, foldername: str, prefix: str = "model") -> None:
+        """Save a model to disk
+
+        This abstract method needs to be implemented by any class inheriting from
+        SamQuantileRegressor. This function dumps the SAM model to disk.
+
+        Parameters
+        ----------
+        foldername : str
+            The folder location where to save the model
+        prefix : str, optional
+           The prefix used in the filename, by default "model"
+        """
+        # This function only works if the estimator is fitted
+        check_is_fitted(self, "model_")
+
+        import joblib
+
+        if not os.path.exists(foldername):
+            os.makedirs(foldername)
+        joblib.dump(self, os.path.join(foldername, f"{prefix}.pkl"))
+
+    @classmethod
+    def load(cls, foldername, prefix="model") -> Callable:
+        """Load a model from disk
+
+        This abstract method needs to be implemented by any class inheriting from
+        SamQuantileRegressor. This function loads a SAM model from disk.
+
+        Parameters
+        ----------
+        foldername : str
+            The folder location where the model is stored
+        prefix : str, optional
+           The prefix used in the filename, by default "model"
+
+        Returns
+        -------
+        The SAM model that has been loaded from disk
+        """
+        import joblib
+
+        return joblib.load(os.path.join(foldername, f"{prefix}.pkl"))
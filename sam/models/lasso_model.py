@@ -1,15 +1,38 @@
 import os
-from typing import Callable, Sequence, Tuple, Union
+import time
+from typing import Callable, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 from sam.feature_engineering import BaseFeatureEngineer
 from sam.models import BaseTimeseriesRegressor
-from sklearn.base import TransformerMixin
+from sam.models.quantile_admm import admm_quantile_regression
+from sklearn.base import RegressorMixin, TransformerMixin, clone
 from sklearn.linear_model import Lasso, QuantileRegressor
 from sklearn.multioutput import MultiOutputRegressor
 
 
+def _fit_outputs(
+    estimator: RegressorMixin, X: pd.DataFrame, Y: pd.DataFrame, warm_start: bool, fit_kwargs: dict
+) -> List[Tuple[RegressorMixin, float]]:
+    """
+    Fits a clone of `estimator` on every column of Y, and returns the fitted estimators with
+    the seconds every fit took. If `warm_start` is True, every fit starts from the coefficients
+    of the previous column.
+    """
+    results = []
+    for column in Y.columns:
+        start_time = time.perf_counter()
+        model = clone(estimator)
+        if warm_start and results:
+            model.set_params(warm_start=True)
+            model.coef_ = results[-1][0].coef_.copy()
+        model.fit(X, Y[column], **fit_kwargs)
+        results.append((model, time.perf_counter() - start_time))
+    return results
+
+
 class LassoTimeseriesRegressor(BaseTimeseriesRegressor):
     """Linear quantile regression model (Lasso) for time series
 
@@ -55,6 +78,27 @@ class LassoTimeseriesRegressor(BaseTimeseriesRegressor):
         Options for `sklearn.linear_model.QuantileRegressor`.
     mean_options : dict, optional (default=None)
         Options for `sklearn.linear_model.Lasso`.
+    n_jobs : int, optional (default=None)
+        The number of worker processes to fit the outputs with. Every combination of a
+        quantile (or the average) and a horizon is a separate job, and the feature table is
+        shared with the workers as a read-only memory map. None means 1, and -1 means using all
+        processors.
+    warm_start : bool, optional (default=False)
+        Whether to fit the horizons of the mean (`Lasso`) model one after another, each starting
+        from the coefficients of the previous horizon. Neighbouring horizons usually have
+        similar coefficients, so this needs fewer iterations. The quantile models are solved as
+        linear programs, which do not support warm starts.
+    solver : str, optional (default='linprog')
+        How to fit the quantile models. 'linprog' fits a `QuantileRegressor` per quantile and
+        horizon, which solves a linear program. 'admm' fits all quantiles and horizons at once
+        with `sam.models.quantile_admm.admm_quantile_regression`, which shares one matrix
+        factorization between all outputs, and scales much better with the number of rows. Its
+        solution is approximate, with the accuracy set by `solver_options`.
+    non_crossing : bool, optional (default=False)
+        Whether to constrain the quantile models to not cross on the training data. Only
+        supported with solver='admm'.
+    solver_options : dict, optional (default=None)
+        Options for `admm_quantile_regression`, like `max_iter` and `tol`, if solver='admm'.
     kwargs: dict, optional
         Not used. Just for compatibility of models that inherit from this class.
 
@@ -70,6 +114,13 @@ class LassoTimeseriesRegressor(BaseTimeseriesRegressor):
         The names of the output columns from the model.
     model_ : object
         List of sklearn models, one for each quantile.
+    fit_times_ : pd.Series
+        The seconds it took to fit every output, with the prediction columns as index.
+    coef_ : np.ndarray
+        The coefficients of all models, with shape (n_inputs, n_outputs), in the order of
+        `prediction_cols_`. Used by `predict`, which is a single matrix product.
+    intercept_ : np.ndarray
+        The intercepts of all models, with shape (n_outputs,)
 
     Examples
     --------
@@ -102,6 +153,11 @@ class LassoTimeseriesRegressor(BaseTimeseriesRegressor):
         fit_intercept: bool = True,
         quantile_options: dict = None,
         mean_options: dict = None,
+        n_jobs: Optional[int] = None,
+        warm_start: bool = False,
+        solver: str = "linprog",
+        non_crossing: bool = False,
+        solver_options: dict = None,
         **kwargs,
     ) -> None:
         super().__init__(
@@ -118,6 +174,11 @@ class LassoTimeseriesRegressor(BaseTimeseriesRegressor):
         self.fit_intercept = fit_intercept
         self.quantile_options = quantile_options
         self.mean_options = mean_options
+        self.n_jobs = n_jobs
+        self.warm_start = warm_start
+        self.solver = solver
+        self.non_crossing = non_crossing
+        self.solver_options = solver_options
         self.feature_engineer = feature_engineer
 
         if self.average_type == "median" and 0.5 in self.quantiles:
@@ -159,26 +220,129 @@ class LassoTimeseriesRegressor(BaseTimeseriesRegressor):
         else:
             raise ValueError(f"Unknown average_type: {self.average_type}")
 
-        for model in self.model_:
-            model.fit(X, y, **fit_kwargs)
+        if self.solver not in ("linprog", "admm"):
+            raise ValueError(f"Unknown solver: {self.solver}")
+        if self.non_crossing and self.solver != "admm":
+            raise ValueError("non_crossing is only supported with solver='admm'")
+
+        # With the admm solver, all quantile models are fitted jointly
+        y = pd.DataFrame(y)
+        joint = [
+            self.solver == "admm" and isinstance(model.estimator, QuantileRegressor)
+            for model in self.model_
+        ]
+        separate_models = [model for model, is_joint in zip(self.model_, joint) if not is_joint]
+        joint_models = [model for model, is_joint in zip(self.model_, joint) if is_joint]
+        separate_results = iter(self._fit_separately(X, y, separate_models, fit_kwargs))
+        joint_results = iter(self._fit_jointly(X, y, joint_models))
+        results = [
+            next(joint_results) if is_joint else next(separate_results) for is_joint in joint
+        ]
+
+        # Collect the estimators per quantile, like MultiOutputRegressor.fit
+        for model, model_results in zip(self.model_, results):
+            model.estimators_ = [estimator for estimator, _ in model_results]
+            model.n_features_in_ = X.shape[1]
+            model.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.fit_times_ = pd.Series(
+            [seconds for model_results in results for _, seconds in model_results],
+            index=self.prediction_cols_,
+            name="fit_time",
+        )
+        self._stack_coefficients()
         return self
 
+    def _fit_separately(
+        self,
+        X: pd.DataFrame,
+        y: pd.DataFrame,
+        models: List[MultiOutputRegressor],
+        fit_kwargs: dict,
+    ) -> List[List[Tuple[RegressorMixin, float]]]:
+        """
+        Fits the estimator of every model on every horizon in a separate job, except for warm
+        started models, that fit all horizons in one job. Returns the fitted estimators and fit
+        times per model.
+        """
+        jobs = []
+        for model in models:
+            warm_start = self.warm_start and isinstance(model.estimator, Lasso)
+            columns = [y.columns] if warm_start else [[column] for column in y.columns]
+            jobs += [(model.estimator, y[cols], warm_start) for cols in columns]
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_outputs)(estimator, X, Y, warm_start, fit_kwargs)
+            for estimator, Y, warm_start in jobs
+        )
+        results = [result for job_results in results for result in job_results]
+        n_horizons = y.shape[1]
+        return [results[i : i + n_horizons] for i in range(0, len(results), n_horizons)]
+
+    def _fit_jointly(
+        self, X: pd.DataFrame, y: pd.DataFrame, models: List[MultiOutputRegressor]
+    ) -> List[List[Tuple[RegressorMixin, float]]]:
+        """
+        Fits the quantile regressors of all models and horizons at once with
+        `admm_quantile_regression`. Returns `QuantileRegressor` estimators with the fitted
+        coefficients, and fit times per model. The time of the joint fit is divided evenly
+        over the outputs.
+        """
+        if not models:
+            return []
+        start_time = time.perf_counter()
+        coef, intercept, n_iter = admm_quantile_regression(
+            X.to_numpy(dtype=float),
+            y.to_numpy(dtype=float),
+            [model.estimator.quantile for model in models],
+            alpha=self.alpha,
+            fit_intercept=self.fit_intercept,
+            non_crossing=self.non_crossing,
+            **(self.solver_options or {}),
+        )
+        seconds = (time.perf_counter() - start_time) / coef.shape[1]
+
+        results = []
+        for i, model in enumerate(models):
+            model_results = []
+            for output in range(i * y.shape[1], (i + 1) * y.shape[1]):
+                estimator = clone(model.estimator)
+                estimator.coef_, estimator.intercept_ = coef[:, output], intercept[output]
+                estimator.n_iter_ = n_iter
+                estimator.n_features_in_ = X.shape[1]
+                estimator.feature_names_in_ = np.asarray(X.columns, dtype=object)
+                model_results.append((estimator, seconds))
+            results.append(model_results)
+        return results
+
+    def _stack_coefficients(self) -> None:
+        """
+        All models are linear, so their coefficients and intercepts are stacked into one matrix
+        `coef_` and one vector `intercept_` for prediction, in the order of `prediction_cols_`
+        """
+        estimators = [estimator for model in self.model_ for estimator in model.estimators_]
+        self.coef_ = np.stack([estimator.coef_ for estimator in estimators], axis=1)
+        self.intercept_ = np.array([estimator.intercept_ for estimator in estimators], dtype=float)
+
     def predict(
         self,
         X: pd.DataFrame,
         y: pd.Series = None,
         return_data: bool = False,
         force_monotonic_quantiles: bool = False,
+        history: pd.DataFrame = None,
     ) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
 
-        self.validate_data(X)
+        self.validate_data(X, history=history)
 
         if y is None and self.use_diff_of_y:
             raise ValueError("You must provide y when using use_diff_of_y=True")
 
-        X_transformed = self.preprocess_predict(X, y)
-        prediction = [model.predict(X_transformed) for model in self.model_]
-        prediction = np.concatenate(prediction, axis=1)
+        if not hasattr(self, "coef_"):
+            # Models saved by older versions only have model_
+            self._stack_coefficients()
+        X_transformed = self.preprocess_predict(
+            X, y, return_array=not return_data, history=history
+        )
+        prediction = np.asarray(X_transformed, dtype=float) @ self.coef_ + self.intercept_
 
         prediction = self.postprocess_predict(
             prediction, X, y, force_monotonic_quantiles=force_monotonic_quantiles
@@ -189,7 +353,7 @@ class LassoTimeseriesRegressor(BaseTimeseriesRegressor):
         else:
             return prediction
 
-    def dump(self, foldername: str, prefix: str = "model") -> None:
+    def dump(self, foldername: str, prefix: str = "model", compact: bool = False) -> None:
         """Save a model to disk
 
         This abstract method needs to be implemented by any class inheriting from
@@ -201,12 +365,23 @@ class LassoTimeseriesRegressor(BaseTimeseriesRegressor):
             The folder location where to save the model
         prefix : str, optional
            The prefix used in the filename, by default "model"
+        compact : bool, optional
+            Whether to leave out the sklearn models in `model_`, and only save the stacked
+            `coef_` and `intercept_`, which is all that is needed for prediction. This makes the
+            file much smaller and faster to load. `model_` is None after loading. By default
+            False
         """
         import joblib
 
         if not os.path.exists(foldername):
             os.makedirs(foldername)
-        joblib.dump(self, os.path.join(foldername, f"{prefix}.pkl"))
+        backup = self.model_
+        if compact:
+            self.model_ = None
+        try:
+            joblib.dump(self, os.path.join(foldername, f"{prefix}.pkl"))
+        finally:
+            self.model_ = backup
 
     @classmethod
     def load(cls, foldername, prefix="model") -> Callable:
@@ -4,12 +4,6 @@ from sam.metrics import tilted_loss
 from sklearn.base import BaseEstimator, RegressorMixin
 from sam.utils.warnings import add_future_warning
 
-# Keep package independent of statsmodels
-try:
-    from statsmodels.regression.quantile_regression import QuantReg
-except ImportError:
-    pass
-
 
 class LinearQuantileRegression(BaseEstimator, RegressorMixin):
     """
@@ -78,6 +72,9 @@ class LinearQuantileRegression(BaseEstimator, RegressorMixin):
         X = X.copy()
         if self.fit_intercept:
             X = X.assign(const=1)  # f(x) = a + bX = a*const + b*X
+        # Keep package independent of statsmodels, only import it when fitting
+        from statsmodels.regression.quantile_regression import QuantReg
+
         model_ = QuantReg(y, X)
         model_result_ = model_.fit(q, p_tol=self.tol, max_iter=self.max_iter)
         coef = model_result_.params
@@ -1,18 +1,69 @@
+import inspect
+import warnings
 from pathlib import Path
-from typing import Callable, Sequence, Tuple, Union
+from typing import Callable, Iterable, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
 from sam.feature_engineering import BaseFeatureEngineer
-from sam.metrics import R2Evaluation, keras_joint_mse_tilted_loss
+from sam.metrics import keras_joint_mse_tilted_loss
 from sam.models import create_keras_quantile_mlp
 from sam.models.base_model import BaseTimeseriesRegressor
+from sam.models.numpy_mlp import NumpyMLP
 from sam.preprocessing import make_shifted_target
-from sklearn import __version__ as skversion
 from sklearn.base import TransformerMixin
 from sklearn.utils.validation import check_is_fitted
 from sam.models.sam_shap_explainer import SamShapExplainer
 
+# The shuffle buffer of streamed chunks, in batches
+_CHUNK_SHUFFLE_BATCHES = 64
+
+
+def _batched_permutation_losses(
+    predict: Callable[..., np.ndarray],
+    loss: Callable[[np.ndarray], np.ndarray],
+    X: np.ndarray,
+    n_iter: int,
+    rng: np.random.Generator,
+    max_batch_bytes: int,
+) -> np.ndarray:
+    """
+    Computes the loss of `n_iter` random permutations of every column of X. Permuted copies of
+    X are stacked into batches of at most `max_batch_bytes` (but at least one copy), and every
+    batch is predicted with a single call of `predict`. `loss` maps the predictions of a batch,
+    with shape (n_copies, n_rows, n_outputs), to losses with shape (n_copies, n_outputs).
+
+    Returns an array with shape (n_iter, n_features, n_outputs).
+    """
+    n_rows, n_features = X.shape
+    jobs = [(i, feature) for i in range(n_iter) for feature in range(n_features)]
+    copies_per_batch = int(max(1, min(len(jobs), max_batch_bytes // max(X.nbytes, 1))))
+
+    losses = []
+    for start in range(0, len(jobs), copies_per_batch):
+        batch_jobs = jobs[start : start + copies_per_batch]
+        batch = np.tile(X, (len(batch_jobs), 1, 1))
+        for copy, (_, feature) in zip(batch, batch_jobs):
+            copy[:, feature] = X[rng.permutation(n_rows), feature]
+        prediction = predict(batch.reshape(-1, n_features), verbose=0)
+        losses.append(loss(prediction.reshape(len(batch_jobs), n_rows, -1)))
+    return np.concatenate(losses).reshape(n_iter, n_features, -1)
+
+
+def _is_legacy_score(score: Callable) -> bool:
+    """Whether `score` has the old signature score(X, y, model) of eli5, instead of
+    score(y_true, y_pred)"""
+    try:
+        parameters = inspect.signature(score).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    positional = [
+        parameter
+        for parameter in parameters
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+    ]
+    return len(positional) >= 3 or "model" in [parameter.name for parameter in parameters]
+
 
 class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
     """Multi-layer Perceptron Regressor for time series
@@ -71,11 +122,21 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
     r2_callback_report: boolean (default=False)
         Whether to add train and validation r2 to each epoch as a callback.
         This also changes self.verbose to 2 to prevent log print mess up.
+    r2_callback_kwargs: dict, optional (default=None)
+        Other arguments for the r2 callback, see `sam.metrics.R2Evaluation`. For example,
+        `{"frequency": 5, "max_train_rows": 10000, "random_state": 42}` evaluates r2 every 5
+        epochs only, on a fixed subsample of 10000 training rows. Only used when
+        `r2_callback_report` is True.
     average_type: str (default='mean')
         Determines what to fit as the average: 'mean', or 'median'. The average is the last
         node in the output layer and does not reflect a quantile, but rather estimates the central
         tendency of the data. Setting to 'mean' results in fitting that node with MSE, and
         setting this to 'median' results in fitting that node with MAE (equal to 0.5 quantile).
+    use_tf_data: bool (default=False)
+        Whether to feed the training and validation data to keras as a `tf.data.Dataset`, built
+        once from float32 copies of the preprocessed data, and shuffled, batched, cached and
+        prefetched in the pipeline. This avoids converting and copying the data every epoch.
+        Streaming chunks with the `chunks` argument of `fit` always uses a `tf.data.Dataset`.
     kwargs: dict, optional
         Not used. Just for compatibility with other SAM models.
 
@@ -90,7 +151,8 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
     prediction_cols_: array of strings
         The names of the output columns from the model.
     model_: Keras model
-        The underlying keras model
+        The underlying keras model. For prediction, this can be replaced by
+        `sam.models.NumpyMLP.from_keras(model.model_)`, which does the forward pass in NumPy.
 
     Examples
     --------
@@ -136,7 +198,9 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
         momentum: float = None,
         verbose: int = 1,
         r2_callback_report: bool = False,
+        r2_callback_kwargs: dict = None,
         average_type: str = "mean",
+        use_tf_data: bool = False,
         **kwargs,
     ) -> None:
         super().__init__(
@@ -157,7 +221,9 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
         self.dropout = dropout
         self.verbose = verbose
         self.r2_callback_report = r2_callback_report
+        self.r2_callback_kwargs = r2_callback_kwargs
         self.average_type = average_type
+        self.use_tf_data = use_tf_data
 
         if self.average_type == "median" and 0.5 in self.quantiles:
             raise ValueError(
@@ -190,6 +256,7 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
         X: pd.DataFrame,
         y: pd.Series,
         validation_data: Tuple[pd.DataFrame, pd.Series] = None,
+        chunks: Callable[[], Iterable[Tuple[pd.DataFrame, pd.Series]]] = None,
         **fit_kwargs,
     ) -> Callable:
         """
@@ -215,6 +282,14 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
             Target data (dependent variable) used to 'train' the model.
         validation_data: tuple(pd.DataFrame, pd.Series) (X_val, y_val respectively)
             Data used for validation step
+        chunks: callable, optional (default=None)
+            Function without arguments that returns an iterable of (X, y) chunks of training
+            data, for example a generator that reads them from disk. It is called once per epoch.
+            If given, the model is trained on the chunks instead of on X and y, which are only
+            used to fit the feature engineer and y_scaler, and to set up the model. Every chunk
+            is preprocessed with the fitted feature engineer, so rows at the start of a chunk
+            that are missing features are dropped. This allows training sets that are larger
+            than memory, since only a few chunks are in memory at the same time.
 
         Returns
         -------
@@ -234,6 +309,7 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
             validation_data = (X_val_transformed, y_val_transformed)
 
         if self.r2_callback_report:
+            from sam.metrics import R2Evaluation
 
             all_data = {"X_train": X_transformed, "y_train": y_transformed}
 
@@ -241,16 +317,14 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
                 all_data["X_val"] = X_val_transformed
                 all_data["y_val"] = y_val_transformed
 
-            # append to the callbacks argument
-            if "callbacks" in fit_kwargs.keys():
-                # early stopping should be last callback to work properly
-                fit_kwargs["callbacks"] = [
-                    R2Evaluation(all_data, self.prediction_cols_, self.predict_ahead)
-                ] + fit_kwargs["callbacks"]
-            else:
-                fit_kwargs["callbacks"] = [
-                    R2Evaluation(all_data, self.prediction_cols_, self.predict_ahead)
-                ]
+            r2_callback = R2Evaluation(
+                all_data,
+                self.prediction_cols_,
+                self.predict_ahead,
+                **(self.r2_callback_kwargs or {}),
+            )
+            # prepend to the callbacks argument, early stopping should be last to work properly
+            fit_kwargs["callbacks"] = [r2_callback] + list(fit_kwargs.get("callbacks") or [])
 
             # Keras verbosity can be in [0, 1, 2].
             # If verbose is 1, this means that the user wants to display messages.
@@ -260,11 +334,22 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
             if self.verbose == 1:
                 self.verbose = 2
 
+        if chunks is not None:
+            train_data = {"x": self._make_chunk_dataset(chunks)}
+        elif self.use_tf_data:
+            train_data = {"x": self._make_dataset(X_transformed, y_transformed)}
+        else:
+            train_data = {
+                "x": X_transformed.values,
+                "y": y_transformed,
+                "batch_size": self.batch_size,
+            }
+        if validation_data is not None and (chunks is not None or self.use_tf_data):
+            validation_data = self._make_dataset(*validation_data, shuffle=False)
+
         # Fit model
         history = self.model_.fit(
-            X_transformed.values,
-            y_transformed,
-            batch_size=self.batch_size,
+            **train_data,
             epochs=self.epochs,
             verbose=self.verbose,
             validation_data=validation_data,
@@ -272,12 +357,49 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
         )
         return history
 
+    def _make_dataset(self, X: pd.DataFrame, y: pd.DataFrame, shuffle: bool = True):
+        """
+        Creates a batched `tf.data.Dataset` from float32 copies of the preprocessed X and y.
+        The rows are shuffled every epoch if shuffle is True.
+        """
+        import tensorflow as tf
+
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        dataset = tf.data.Dataset.from_tensor_slices((X, y)).cache()
+        if shuffle:
+            dataset = dataset.shuffle(X.shape[0], reshuffle_each_iteration=True)
+        return dataset.batch(self.batch_size).prefetch(tf.data.AUTOTUNE)
+
+    def _make_chunk_dataset(self, chunks: Callable[[], Iterable[Tuple[pd.DataFrame, pd.Series]]]):
+        """
+        Creates a batched `tf.data.Dataset` that streams the (X, y) chunks returned by `chunks`,
+        preprocessed with the fitted feature engineer. The rows are shuffled within a buffer of
+        `_CHUNK_SHUFFLE_BATCHES` batches, and not cached, so they do not need to fit in memory.
+        """
+        import tensorflow as tf
+
+        def generator():
+            for X_chunk, y_chunk in chunks():
+                self.validate_data(X_chunk)
+                X_chunk, y_chunk = self.preprocess(X_chunk, y_chunk, train=False)
+                yield X_chunk.to_numpy(dtype=np.float32), y_chunk.to_numpy(dtype=np.float32)
+
+        signature = (
+            tf.TensorSpec(shape=(None, self.n_inputs_), dtype=tf.float32),
+            tf.TensorSpec(shape=(None, len(self.predict_ahead)), dtype=tf.float32),
+        )
+        dataset = tf.data.Dataset.from_generator(generator, output_signature=signature)
+        dataset = dataset.unbatch().shuffle(_CHUNK_SHUFFLE_BATCHES * self.batch_size)
+        return dataset.batch(self.batch_size).prefetch(tf.data.AUTOTUNE)
+
     def predict(
         self,
         X: pd.DataFrame,
         y: pd.Series = None,
         return_data: bool = False,
         force_monotonic_quantiles: bool = False,
+        history: pd.DataFrame = None,
     ) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
         """
         Make a prediction, and undo differencing in the case it was used
@@ -309,6 +431,9 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
             fitted to a higher quantile. If this occurs for a certain prediction, the output
             distribution is invalid. We can force monotonicity by making the outer quantiles
             at least as high as the inner quantiles.
+        history: pd.DataFrame, optional (default=None)
+            Rows before X, that are only used as context for the feature engineering, and are
+            not predicted. Used by `predict_latest` and `update_and_predict`
 
         Returns
         -------
@@ -317,12 +442,15 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
         X_transformed: pd.DataFrame, optional
             The transformed input data, when return_data is True, otherwise None
         """
-        self.validate_data(X)
+        self.validate_data(X, history=history)
 
         if y is None and self.use_diff_of_y:
             raise ValueError("You must provide y when using use_diff_of_y=True")
 
-        X_transformed = self.preprocess_predict(X, y)
+        # The keras model only needs the values, so only create a dataframe if it is returned
+        X_transformed = self.preprocess_predict(
+            X, y, return_array=not return_data, history=history
+        )
         prediction = self.model_.predict(X_transformed)
 
         prediction = self.postprocess_predict(
@@ -334,11 +462,14 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
         else:
             return prediction
 
-    def dump(self, foldername: Union[str, Path], prefix: str = "model") -> None:
+    def dump(
+        self, foldername: Union[str, Path], prefix: str = "model", numpy_runtime: bool = False
+    ) -> None:
         """
         Writes the following files:
         * prefix.pkl
         * prefix.h5
+        * prefix.npz, if numpy_runtime is True
 
         to the folder given by foldername. prefix is configurable, and is
         'model' by default
@@ -351,6 +482,10 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
             The name of the folder to save the model
         prefix: str, optional (Default='model')
             The name of the model
+        numpy_runtime: bool, optional (Default=False)
+            Whether to also write the weights to a `.npz` file, so the model can be loaded with
+            `load(..., numpy_runtime=True)`, without TensorFlow. If `model_` is already a
+            `NumpyMLP`, only the `.npz` file is written.
         """
         # This function only works if the estimator is fitted
         check_is_fitted(self, "model_")
@@ -359,8 +494,13 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
 
         foldername = Path(foldername)
 
-        # TEMPORARY
-        self.model_.save(foldername / (prefix + ".h5"))
+        if isinstance(self.model_, NumpyMLP):
+            self.model_.save(foldername / (prefix + ".npz"))
+        else:
+            # TEMPORARY
+            self.model_.save(foldername / (prefix + ".h5"))
+            if numpy_runtime:
+                NumpyMLP.from_keras(self.model_).save(foldername / (prefix + ".npz"))
 
         # Set the models to None temporarily, because they can't be pickled
         backup, self.model_ = self.model_, None
@@ -372,11 +512,11 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
         self.model_ = backup
 
     @classmethod
-    def load(cls, foldername: Union[str, Path], prefix="model"):
+    def load(cls, foldername: Union[str, Path], prefix="model", numpy_runtime: bool = False):
         """
         Reads the following files:
         * prefix.pkl
-        * prefix.h5
+        * prefix.h5, or prefix.npz if numpy_runtime is True
 
         from the folder given by foldername. prefix is configurable, and is
         'model' by default
@@ -384,17 +524,33 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
 
         Overwrites the abstract method from SamQuantileRegressor
 
+        Parameters
+        ----------
+        foldername: str
+            The name of the folder where the model is saved
+        prefix: str, optional (Default='model')
+            The name of the model
+        numpy_runtime: bool, optional (Default=False)
+            Whether to load the weights from the `.npz` file into a `NumpyMLP`, which does the
+            forward pass in NumPy. This does not import TensorFlow, and the model can only be
+            used for prediction.
+
         Returns
         -------
         Keras model
         """
         import cloudpickle
-        from tensorflow import keras
 
         foldername = Path(foldername)
         with open(foldername / (prefix + ".pkl"), "rb") as f:
             obj = cloudpickle.load(f)
 
+        if numpy_runtime:
+            obj.model_ = NumpyMLP.load(foldername / (prefix + ".npz"))
+            return obj
+
+        from tensorflow import keras
+
         loss = obj._get_loss()
         obj.model_ = keras.models.load_model(
             foldername / (prefix + ".h5"), custom_objects={"mse_tilted": loss}
@@ -436,27 +592,33 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
         self,
         X: pd.DataFrame,
         y: pd.Series,
-        score: Union[str, Callable] = None,
+        score: Callable[[np.ndarray, np.ndarray], float] = None,
         n_iter: int = 5,
         sum_time_components: bool = False,
+        per_output: bool = False,
+        random_state: Union[int, np.random.Generator] = None,
+        max_batch_bytes: int = 256 * 1024**2,
     ) -> pd.DataFrame:
         """
-        Computes feature importances based on the loss function used to estimate the average.
-        This function uses ELI5's `get_score_importances:
-        <https://eli5.readthedocs.io/en/latest/autodocs/permutation_importance.html>`
-        to compute feature importances. It is a method that measures how the score decreases when
-        a feature is not available.
-        This is essentially a model-agnostic type of feature importance that works with
-        every model, including keras MLP models.
-
-        Note that we compute feature importance over the average (the central trace, and the last
-        output node, either median or mean depending on self.average_type), and do not include
-        the quantiles in the loss calculation. Initially, the quantiles were included, but
-        experimentation showed that importances behaved very badly when including the
-        quantiles in the loss: importances were sometimes consistently negative (i.e. in all
-        random iterations), while these features should have been important according to theory,
-        and excluding them indeed lead to much worse model performance. This behavior goes away
-        when only using the mean trace to estimate feature importance.
+        Computes permutation feature importances: how the loss of the model changes when the
+        values of a single feature are randomly shuffled, so the feature is not informative
+        anymore. This is a model-agnostic type of feature importance that works with every model,
+        including keras MLP models.
+
+        Instead of predicting every permuted dataset separately, several permuted copies of the
+        data are stacked into one array, up to `max_batch_bytes`, and predicted with a single
+        call. All permutations are drawn from one random generator, and the loss of every output
+        of the model (all horizons and quantiles) is computed from the same predictions. Quantile
+        outputs are scored with the tilted loss, and the average outputs with MSE or MAE,
+        depending on self.average_type.
+
+        By default, the result is the score decrease of the average output (the last output
+        node, either median or mean depending on self.average_type), averaged over the horizons.
+        The quantiles are not included in this loss: experimentation showed that importances
+        behaved very badly when including the quantiles in the loss: importances were sometimes
+        consistently negative (i.e. in all random iterations), while these features should have
+        been important according to theory, and excluding them indeed lead to much worse model
+        performance. Use `per_output=True` to get the score decreases of every output.
 
         Parameters
         ----------
@@ -464,25 +626,39 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
             dataframe with test or train features
         y: pd.Series
             dataframe with test or train target
-        score: str or function, optional (default=None)
-            Either a function with signature score(X, y, model)
-            that returns a scalar. Will be used to measure score decreases for ELI5.
-            If None, defaults to MSE or MAE depending on self.average_type.
+        score: function, optional (default=None)
+            A function with signature score(y_true, y_pred) that returns a scalar loss, for
+            1d arrays of the target and the average output of a single horizon. If None,
+            defaults to MSE or MAE depending on self.average_type.
+            The old signature score(X, y, model) is deprecated, and still supported with a
+            FutureWarning for a single horizon, without batching and `per_output`.
             Note that if score computes a loss (i.e. higher is worse), negative values indicate
             positive contribution to model performance (i.e. negative score decrease means that
             removing this feature will increase the metric, which is a bad thing with MAE/MSE).
         n_iter: int, optional (default=5)
-            Number of iterations to use for ELI5. Since ELI5 results can vary wildly, increasing
-            this parameter may provide more stability at the cost of a longer runtime
+            Number of random permutations of every feature. Since the results can vary wildly,
+            increasing this parameter may provide more stability at the cost of a longer runtime
         sum_time_components: bool, optional (default=False)
             if set to true, sums feature importances of the different subfeatures of each time
-            component (i.e. weekday_1, weekday_2 etc. in one 'weekday' importance)
+            component (i.e. hour_of_day_onehot_1, hour_of_day_onehot_2 etc. in one
+            'hour_of_day_onehot' importance). Requires a feature engineer with `time_features`,
+            like `sam.feature_engineering.SimpleFeatureEngineer`.
+        per_output: bool, optional (default=False)
+            if set to true, returns the score decreases of every output of the model, with a
+            row for every combination of output column and iteration.
+        random_state: int or np.random.Generator, optional (default=None)
+            Seed or generator of the permutations
+        max_batch_bytes: int, optional (default=256 * 1024 ** 2)
+            The maximum size of a stacked batch of permuted copies of the data, in bytes. At
+            least one copy is predicted at a time.
 
         Returns
         -------
         score_decreases: Pandas dataframe,  shape (n_iter x n_features)
             The score decreases when leaving out each feature per iteration. The larger the
-            magnitude, the more important each feature is considered by the model.
+            magnitude, the more important each feature is considered by the model. If
+            `per_output` is True, the index is a MultiIndex of the output column and the
+            iteration.
 
         Examples
         --------
@@ -507,57 +683,192 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
         # Model must be fitted for this method
         check_is_fitted(self, "model_")
 
-        if len(self.predict_ahead) > 1:
-            raise NotImplementedError(
-                "This method is currently not implemented " "for multiple targets"
-            )
-
-        if int(skversion.split(".")[1]) >= 24:
-            raise Exception("This feature requires sklearn version < 0.24.0!")
-
-        from eli5.permutation_importance import get_score_importances
-
-        if score is None:
+        X_transformed = self.preprocess_predict(X, y, return_array=True).astype(np.float32)
+        y_target = make_shifted_target(y, self.use_diff_of_y, self.predict_ahead)
+        if self.y_scaler is not None:
+            y_target = self.y_scaler.transform(y_target)
+        y_target = np.asarray(y_target, dtype=float)
 
-            def score(X, y, model=self.model_):
-                if self.average_type == "median":
-                    return np.mean(np.abs(y - model.predict(X)[:, -1]))
-                elif self.average_type == "mean":
-                    return np.mean((y - model.predict(X)[:, -1]) ** 2)
+        # Remove rows with missings in either of the two arrays
+        missings = np.isnan(y_target).any(axis=1) | np.isnan(X_transformed).any(axis=1)
+        X_transformed, y_target = X_transformed[~missings], y_target[~missings]
+
+        # The target and quantile of every output, like self.prediction_cols_
+        n_horizons, n_quantiles = len(self.predict_ahead), len(self.quantiles)
+        y_outputs = np.tile(y_target, n_quantiles + 1)
+        output_quantiles = np.repeat(self.quantiles, n_horizons)
+
+        def loss(prediction: np.ndarray) -> np.ndarray:
+            """The loss of every output, for predictions of shape (n_copies, n_rows, n_outputs)"""
+            error = y_outputs - prediction
+            losses = np.empty((prediction.shape[0], self.n_outputs_))
+            quantile_error = error[:, :, : output_quantiles.size]
+            losses[:, : output_quantiles.size] = np.maximum(
+                output_quantiles * quantile_error, (output_quantiles - 1) * quantile_error
+            ).mean(axis=1)
+            mean_error = error[:, :, output_quantiles.size :]
+            if score is not None:
+                losses[:, output_quantiles.size :] = [
+                    [score(y_target[:, h], copy[:, h]) for h in range(n_horizons)]
+                    for copy in prediction[:, :, output_quantiles.size :]
+                ]
+            elif self.average_type == "median":
+                losses[:, output_quantiles.size :] = np.abs(mean_error).mean(axis=1)
+            else:
+                losses[:, output_quantiles.size :] = (mean_error**2).mean(axis=1)
+            return losses
 
-        X_transformed = self.preprocess_predict(X, y)
+        rng = np.random.default_rng(random_state)
+        if score is not None and _is_legacy_score(score):
+            decreases_df = self._legacy_score_decreases(
+                score, X_transformed, y_target, n_iter, rng, per_output
+            )
+            if sum_time_components:
+                decreases_df = self._sum_time_components(decreases_df)
+            return decreases_df
 
-        if self.predict_ahead != [0]:
-            y_target = make_shifted_target(y, self.use_diff_of_y, self.predict_ahead).iloc[:, 0]
+        base_loss = loss(self.model_.predict(X_transformed, verbose=0)[np.newaxis])[0]
+        permuted_loss = _batched_permutation_losses(
+            self.model_.predict, loss, X_transformed, n_iter, rng, max_batch_bytes
+        )
+        # shape (n_iter, n_features, n_outputs)
+        score_decreases = base_loss - permuted_loss
+
+        if per_output:
+            decreases_df = pd.DataFrame(
+                score_decreases.transpose(2, 0, 1).reshape(-1, X_transformed.shape[1]),
+                index=pd.MultiIndex.from_product(
+                    [self.prediction_cols_, range(n_iter)], names=["output", "iteration"]
+                ),
+                columns=self.get_feature_names_out(),
+            )
         else:
-            y_target = y.copy().astype(float)
+            decreases_df = pd.DataFrame(
+                score_decreases[:, :, output_quantiles.size :].mean(axis=2),
+                columns=self.get_feature_names_out(),
+            )
 
-        # Remove rows with missings in either of the two arrays
-        missings = np.isnan(y_target) | np.isnan(X_transformed).any(axis=1)
-        X_transformed = X_transformed[~missings, :]
-        y_target = y_target[~missings]
+        if sum_time_components:
+            decreases_df = self._sum_time_components(decreases_df)
+
+        return decreases_df
 
-        # use eli5 to compute feature importances:
-        base_scores, score_decreases = get_score_importances(
-            score, X_transformed, y_target, n_iter=n_iter
+    def _legacy_score_decreases(
+        self,
+        score: Callable[[np.ndarray, np.ndarray, Callable], float],
+        X: np.ndarray,
+        y: np.ndarray,
+        n_iter: int,
+        rng: np.random.Generator,
+        per_output: bool,
+    ) -> pd.DataFrame:
+        """The permutation importances with a score function with the deprecated signature
+        score(X, y, model), used by the eli5 implementation. Every permuted copy is scored
+        separately"""
+        warnings.warn(
+            "A score function with signature score(X, y, model) is deprecated, and will not be "
+            "supported in a future version. Use a function with signature score(y_true, y_pred) "
+            "instead, that gets the average output of a single horizon as y_pred",
+            FutureWarning,
         )
+        if len(self.predict_ahead) > 1 or per_output:
+            raise NotImplementedError(
+                "A score function with signature score(X, y, model) only supports a single "
+                "horizon and per_output=False"
+            )
+        base_score = score(X, y[:, 0], self.model_)
+        score_decreases = np.empty((n_iter, X.shape[1]))
+        for i in range(n_iter):
+            for feature in range(X.shape[1]):
+                X_permuted = X.copy()
+                X_permuted[:, feature] = X[rng.permutation(X.shape[0]), feature]
+                score_decreases[i, feature] = base_score - score(X_permuted, y[:, 0], self.model_)
+        return pd.DataFrame(score_decreases, columns=self.get_feature_names_out())
+
+    def _sum_time_components(self, importances: pd.DataFrame) -> pd.DataFrame:
+        """Sums the columns of every time feature of the feature engineer into a single column"""
+        time_features = getattr(self.feature_engineer_, "time_features", None)
+        if time_features is None:
+            raise ValueError(
+                "sum_time_components requires a feature engineer with time_features, like "
+                "sam.feature_engineering.SimpleFeatureEngineer"
+            )
+        for component, type in time_features:
+            name = f"{component}_{type}"
+            these_cols = [c for c in importances.columns if c.startswith(name + "_")]
+            importances[name] = importances[these_cols].sum(axis=1)
+            importances = importances.drop(these_cols, axis=1)
+        return importances
+
+    def fit_background(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series = None,
+        method: str = "kmeans",
+        n_samples: int = 100,
+        random_state: int = None,
+    ) -> np.ndarray:
+        """
+        Summarizes the preprocessed X into a small background set for the shap explainer, and
+        stores it in the `shap_background_` attribute. The background is computed once, and
+        saved with the rest of the model by `dump`. `get_explainer` uses it when it is called
+        without X.
 
-        decreases_df = pd.DataFrame(score_decreases, columns=self.get_feature_names_out())
+        Parameters
+        ----------
+        X: pd.DataFrame
+            The data to summarize, for example the training data
+        y: pd.Series, optional (default=None)
+            Target data. Only required when the feature engineer uses y.
+        method: str, optional (default='kmeans')
+            How to summarize the data:
+
+            - 'kmeans': the centroids of `n_samples` k-means clusters
+            - 'time_of_day': a sample stratified by the time of day of the rows, so every time
+              of the day is represented proportionally
+            - 'sample': a simple random sample
+        n_samples: integer, optional (default=100)
+            The number of rows of the background. If the data has fewer rows, all rows are used.
+        random_state: integer, optional (default=None)
+            Seed of the k-means initialization or the sample
 
-        if sum_time_components:
-            for component in self.time_components:
-                these_cols = [
-                    c
-                    for c in decreases_df.columns
-                    if c.startswith("%s_%s_" % (self.timecol, component))
-                ]
-                decreases_df[component] = decreases_df[these_cols].sum(axis=1)
-                decreases_df = decreases_df.drop(these_cols, axis=1)
+        Returns
+        -------
+        np.ndarray:
+            The background, with shape (n_samples, n_features)
+        """
+        X_transformed = self.preprocess_predict(X, y, return_array=True)
+        complete = ~np.isnan(X_transformed).any(axis=1)
+        X_transformed = X_transformed[complete]
+        n_rows = X_transformed.shape[0]
+        n_samples = min(n_samples, n_rows)
+        rng = np.random.default_rng(random_state)
+
+        if method == "kmeans":
+            from sklearn.cluster import KMeans
+
+            kmeans = KMeans(n_clusters=n_samples, n_init=10, random_state=random_state)
+            background = kmeans.fit(X_transformed).cluster_centers_
+        elif method == "time_of_day":
+            times = pd.DatetimeIndex(X.index if self.timecol is None else X[self.timecol])
+            seconds = (times - times.normalize()).total_seconds().to_numpy()[complete]
+            # Sort by time of day, randomly within equal times, and take evenly spaced rows
+            order = np.lexsort((rng.random(n_rows), seconds))
+            background = X_transformed[order[np.linspace(0, n_rows - 1, n_samples).astype(int)]]
+        elif method == "sample":
+            background = X_transformed[rng.choice(n_rows, n_samples, replace=False)]
+        else:
+            raise ValueError("method must be one of 'kmeans', 'time_of_day' or 'sample'")
 
-        return decreases_df
+        self.shap_background_ = background.astype(np.float32)
+        return self.shap_background_
 
     def get_explainer(
-        self, X: pd.DataFrame, y: pd.Series = None, sample_n: int = None
+        self,
+        X: pd.DataFrame = None,
+        y: pd.Series = None,
+        sample_n: int = None,
+        use_cache: bool = True,
     ) -> SamShapExplainer:
         """
         Obtain a shap explainer-like object. This object can be used to
@@ -568,15 +879,24 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
         To help with this, the explainer comes with a `test_values()` attribute
         that calculates the test values corresponding to the shap values
 
+        If X is None, the background computed by `fit_background` is used. Creating a shap
+        explainer is expensive, so this explainer is cached on the model (but not pickled), and
+        reused by the next calls as long as the underlying keras model and the background are the
+        same.
+
         Parameters
         ----------
-        X: pd.DataFrame
-            The dataframe used to 'train' the explainer
+        X: pd.DataFrame, optional (default=None)
+            The dataframe used to 'train' the explainer. If None, `self.shap_background_` is used
         y: pd.Series, optional (default=None)
             Target data used to 'train' the explainer. Only required when self.predict_ahead > 0.
         sample_n: integer, optional (default=None)
             The number of samples to give to the explainer. It is recommended that
             if your background set is greater than 5000, to sample for performance reasons.
+            Use `fit_background` for a better summary of a large background set.
+        use_cache: bool, optional (default=True)
+            Whether to reuse the cached explainer of the background of `fit_background`, or
+            cache the new one
 
         Returns
         -------
@@ -591,13 +911,40 @@ class MLPTimeseriesRegressor(BaseTimeseriesRegressor):
 
         >>> shap.force_plot(explainer.expected_value[0], shap_values[0][-1,:],
         >>>                 test_values.iloc[-1,:], matplotlib=True)
+
+        >>> # Summarize the background once, and reuse the explainer
+        >>> model.fit_background(X_train, y_train, method="kmeans", n_samples=100)
+        >>> explainer = model.get_explainer()
         """
+        if X is None:
+            check_is_fitted(self, "shap_background_")
+            background = self.shap_background_
+            # The explainer of the background, see `__getstate__`
+            cached = getattr(self, "_explainer_cache_", None)
+            if use_cache and cached is not None:
+                if cached[0] is self.model_ and cached[1] is background:
+                    return cached[2]
+        else:
+            background = self.preprocess_predict(X, y, dropna=True, return_array=True)
+            if sample_n is not None:
+                # Sample some rows to increase performance later
+                sampled = np.random.choice(background.shape[0], sample_n, replace=False)
+                background = background[sampled, :]
+
         import shap
 
-        X_transformed = self.preprocess_predict(X, y, dropna=True)
-        if sample_n is not None:
-            # Sample some rows to increase performance later
-            sampled = np.random.choice(X_transformed.shape[0], sample_n, replace=False)
-            X_transformed = X_transformed[sampled, :]
-        explainer = shap.DeepExplainer(self.model_, X_transformed)
-        return SamShapExplainer(explainer, self, preprocess_predict=self.preprocess_predict)
+        explainer = SamShapExplainer(
+            shap.DeepExplainer(self.model_, background),
+            self,
+            preprocess_predict=self.preprocess_predict,
+            n_background=background.shape[0],
+        )
+        if X is None and use_cache:
+            self._explainer_cache_ = (self.model_, background, explainer)
+        return explainer
+
+    def __getstate__(self) -> dict:
+        """The cached explainer of `get_explainer` is not pickled"""
+        state = super().__getstate__()
+        state.pop("_explainer_cache_", None)
+        return state
@@ -0,0 +1,146 @@
+from pathlib import Path
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+
+# Only NumPy is imported here, so fitted MLP models can be used for prediction without TensorFlow
+_ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+    "elu": lambda x: np.where(x > 0, x, np.expm1(x)),
+    "softplus": lambda x: np.logaddexp(x, 0),
+}
+
+
+class NumpyMLP:
+    """Inference runtime for dense keras networks, with the forward pass in NumPy
+
+    Supports networks that are a chain of Dense, BatchNormalization, Activation and Dropout
+    layers, like the networks created by `sam.models.create_keras_quantile_mlp`.
+    Batch normalization is folded into the weights of the preceding Dense layer, and dropout is
+    skipped, since it is not used for inference. The result is a list of affine layers, each
+    followed by an activation function.
+
+    The runtime has a `predict` method like a keras model, so it can be used as a drop-in
+    `model_` of `MLPTimeseriesRegressor`, and it is saved as a compact `.npz` file.
+
+    Parameters
+    ----------
+    weights: list of np.ndarray
+        The weight matrix of every layer, with shape `(n_inputs, n_outputs)`
+    biases: list of np.ndarray
+        The bias vector of every layer, with shape `(n_outputs,)`
+    activations: list of str
+        The name of the activation function of every layer, one of 'linear', 'relu', 'sigmoid',
+        'tanh', 'elu' or 'softplus'
+
+    Examples
+    --------
+    >>> from sam.models import NumpyMLP
+    >>> runtime = NumpyMLP.from_keras(model.model_)
+    >>> runtime.save("model.npz")
+    >>> runtime = NumpyMLP.load("model.npz")
+    >>> prediction = runtime.predict(X_transformed)
+    """
+
+    def __init__(
+        self, weights: List[np.ndarray], biases: List[np.ndarray], activations: List[str]
+    ):
+        if not len(weights) == len(biases) == len(activations):
+            raise ValueError("weights, biases and activations must have the same length")
+        unknown = set(activations) - set(_ACTIVATIONS)
+        if unknown:
+            raise NotImplementedError(f"Activation functions {unknown} are not supported")
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+
+    @classmethod
+    def from_keras(cls, keras_model) -> "NumpyMLP":
+        """
+        Converts a fitted keras model to the runtime
+
+        Parameters
+        ----------
+        keras_model: keras model
+            A chain of Dense, BatchNormalization, Activation and Dropout layers
+
+        Returns
+        -------
+        NumpyMLP:
+            The runtime, with the same predictions within float tolerance
+        """
+        weights, biases, activations = [], [], []
+        for layer in keras_model.layers:
+            kind = layer.__class__.__name__
+            config = layer.get_config()
+            if kind in ("InputLayer", "Dropout"):
+                continue
+            elif kind == "Dense":
+                kernel = layer.get_weights()[0]
+                bias = layer.get_weights()[1] if config["use_bias"] else np.zeros(kernel.shape[1])
+                weights.append(kernel)
+                biases.append(bias)
+                activations.append(config["activation"])
+            elif kind == "BatchNormalization" and activations and activations[-1] == "linear":
+                # Fold the normalization into the weights of the Dense layer
+                mean, variance = layer.moving_mean.numpy(), layer.moving_variance.numpy()
+                gamma = layer.gamma.numpy() if config["scale"] else 1.0
+                beta = layer.beta.numpy() if config["center"] else 0.0
+                scale = gamma / np.sqrt(variance + config["epsilon"])
+                weights[-1] = weights[-1] * scale
+                biases[-1] = (biases[-1] - mean) * scale + beta
+            elif kind == "Activation" and activations and activations[-1] == "linear":
+                activations[-1] = config["activation"]
+            else:
+                raise NotImplementedError(f"Layer {layer.name} of type {kind} is not supported")
+        return cls(weights, biases, activations)
+
+    def predict(self, X: np.ndarray, **kwargs) -> np.ndarray:
+        """
+        The forward pass of the network
+
+        Parameters
+        ----------
+        X: np.ndarray
+            The input, with shape `(n_rows, n_inputs)`
+        kwargs: dict
+            Not used. For compatibility with the `predict` method of keras models, like
+            `batch_size` and `verbose`
+
+        Returns
+        -------
+        np.ndarray:
+            The output, with shape `(n_rows, n_outputs)`
+        """
+        output = np.asarray(X, dtype=np.float32)
+        for weight, bias, activation in zip(self.weights, self.biases, self.activations):
+            output = _ACTIVATIONS[activation](output @ weight + bias)
+        return output
+
+    def summary(self, print_fn: Callable = print) -> None:
+        """Prints the shape, activation and number of parameters of every layer"""
+        for i, (weight, activation) in enumerate(zip(self.weights, self.activations)):
+            n_params = weight.size + weight.shape[1]
+            print_fn(
+                f"layer {i}: {weight.shape[0]} -> {weight.shape[1]} ({activation}), {n_params}"
+            )
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Saves the weights to a `.npz` file"""
+        arrays = {"activations": np.array(self.activations)}
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"weight_{i}"] = weight
+            arrays[f"bias_{i}"] = bias
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "NumpyMLP":
+        """Loads the weights from a `.npz` file, created by `save`"""
+        with np.load(path) as arrays:
+            activations = [str(activation) for activation in arrays["activations"]]
+            weights = [arrays[f"weight_{i}"] for i in range(len(activations))]
+            biases = [arrays[f"bias_{i}"] for i in range(len(activations))]
+        return cls(weights, biases, activations)
@@ -0,0 +1,220 @@
+import warnings
+from typing import Sequence, Tuple
+
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+from sklearn.exceptions import ConvergenceWarning
+
+# The penalty parameter is only balanced during the first iterations. Changing it only a finite
+# number of times keeps the convergence guarantee of ADMM
+_RHO_UPDATE_ITERATIONS = 200
+
+
+def _isotonic_projection(values: np.ndarray) -> np.ndarray:
+    """
+    Projects every row of `values` (shape (..., n)) on the non-decreasing sequences, which is
+    isotonic regression with equal weights. Uses the min-max formula with the means of all
+    intervals, which is fast for the small n of a quantile grid.
+    """
+    n = values.shape[-1]
+    cumsum = np.concatenate([np.zeros(values.shape[:-1] + (1,)), np.cumsum(values, -1)], -1)
+
+    def mean(start, stop):
+        return (cumsum[..., stop + 1] - cumsum[..., start]) / (stop - start + 1)
+
+    projection = np.empty_like(values)
+    for j in range(n):
+        projection[..., j] = np.maximum.reduce(
+            [np.minimum.reduce([mean(i, k) for k in range(j, n)]) for i in range(j + 1)]
+        )
+    return projection
+
+
+def _project_non_crossing(
+    fitted: np.ndarray, quantile_order: np.ndarray, n_quantiles: int
+) -> np.ndarray:
+    """
+    Projects fitted values with shape (n_rows, n_quantiles * n_targets), ordered by quantile
+    first, on the values that are non-decreasing in the quantile, for every row and target
+    """
+    n_rows = fitted.shape[0]
+    fitted = fitted.reshape(n_rows, n_quantiles, -1)[:, quantile_order].transpose(0, 2, 1)
+    projection = np.empty_like(fitted)
+    projection[:, :, quantile_order] = _isotonic_projection(fitted)
+    return projection.transpose(0, 2, 1).reshape(n_rows, -1)
+
+
+def admm_quantile_regression(
+    X: np.ndarray,
+    Y: np.ndarray,
+    quantiles: Sequence[float],
+    alpha: float = 1.0,
+    fit_intercept: bool = True,
+    non_crossing: bool = False,
+    rho: float = 1.0,
+    max_iter: int = 1000,
+    tol: float = 1e-3,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Fits linear quantile regressions for all quantiles and all columns of Y at once, with the
+    alternating direction method of multipliers (ADMM).
+
+    Every output minimizes the same objective as `sklearn.linear_model.QuantileRegressor`:
+    the mean tilted loss plus `alpha` times the L1 norm of the coefficients (not the
+    intercept). Instead of one linear program per output, all outputs are updated together in
+    every iteration, with a single Cholesky factorization of the (standardized) X^T X. This
+    scales much better with the number of rows, at the cost of an approximate solution.
+
+    With `non_crossing`, the fitted quantiles of every column of Y are constrained to be
+    non-decreasing in the quantile for every row of X, so the quantile lines do not cross on
+    the training data, up to the tolerance of the solver.
+
+    Parameters
+    ----------
+    X: np.ndarray
+        The features, with shape (n_rows, n_features)
+    Y: np.ndarray
+        The targets, with shape (n_rows, n_targets)
+    quantiles: sequence of floats
+        The quantiles to fit, between 0 and 1
+    alpha: float, optional (default=1.0)
+        Regularization constant that multiplies the L1 penalty term
+    fit_intercept: bool, optional (default=True)
+        Whether or not to fit the intercept
+    non_crossing: bool, optional (default=False)
+        Whether to constrain the fitted quantiles to not cross on the training data
+    rho: float, optional (default=1.0)
+        The ADMM penalty parameter, for standardized data
+    max_iter: int, optional (default=1000)
+        The maximum number of iterations
+    tol: float, optional (default=1e-3)
+        The tolerance of the relative primal and dual residuals of all outputs
+
+    Returns
+    -------
+    coef: np.ndarray
+        The coefficients, with shape (n_features, n_quantiles * n_targets). The outputs are
+        ordered by quantile first, and then by target, like `prediction_cols_` of the sam models
+    intercept: np.ndarray
+        The intercepts, with shape (n_quantiles * n_targets,)
+    n_iter: int
+        The number of iterations that were run
+
+    Warns
+    -----
+    ConvergenceWarning
+        If the tolerance is not reached within `max_iter` iterations
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from sam.models.quantile_admm import admm_quantile_regression
+    >>> X = np.random.normal(size=(1000, 3))
+    >>> Y = X @ np.array([[1.0], [2.0], [0.0]]) + np.random.normal(size=(1000, 1))
+    >>> coef, intercept, n_iter = admm_quantile_regression(X, Y, [0.1, 0.5, 0.9], alpha=0.01)
+    """
+    X, Y = np.asarray(X, dtype=float), np.asarray(Y, dtype=float)
+    quantiles = np.asarray(quantiles, dtype=float)
+    n_rows, n_features = X.shape
+    n_quantiles, n_targets = quantiles.size, Y.shape[1]
+
+    # Standardize X and Y. The L1 penalty of the original coefficients becomes a penalty
+    # weighted by 1 / x_scale, and scaling Y scales the whole objective
+    x_mean = X.mean(axis=0) if fit_intercept else np.zeros(n_features)
+    x_scale = X.std(axis=0)
+    x_scale[x_scale == 0] = 1
+    y_center = np.median(Y, axis=0) if fit_intercept else np.zeros(n_targets)
+    y_scale = np.abs(Y - y_center).mean(axis=0)
+    y_scale[y_scale == 0] = 1
+    A = (X - x_mean) / x_scale
+    if fit_intercept:
+        A = np.hstack([np.ones((n_rows, 1)), A])
+    n_coef = A.shape[1]
+    penalized = slice(n_coef - n_features, n_coef)
+
+    # Every output is a combination of a quantile and a target, quantiles first
+    Y = np.tile((Y - y_center) / y_scale, n_quantiles)
+    tau = np.repeat(quantiles, n_targets)
+    quantile_order = np.argsort(quantiles)
+
+    # The objective is multiplied by n_rows, so the loss is a sum and X^T X scales with n_rows
+    threshold = n_rows * alpha / x_scale[:, np.newaxis]
+    gram = (2 if non_crossing else 1) * A.T @ A
+    # The constraint theta = z is weighted by n_rows as well, to balance it with the residuals
+    gram[penalized, penalized] += n_rows * np.eye(n_features)
+    factor = cho_factor(gram)
+
+    n_outputs = Y.shape[1]
+    rho = np.full(n_outputs, float(rho))
+    theta = np.zeros((n_coef, n_outputs))
+    residual, z = Y.copy(), np.zeros((n_features, n_outputs))
+    # The scaled dual variables of the constraints on the residual, z and g
+    u, w, v = np.zeros_like(Y), np.zeros_like(z), np.zeros_like(Y)
+    g = np.zeros_like(Y)
+
+    for n_iter in range(1, max_iter + 1):
+        rhs = A.T @ (Y - residual + u)
+        rhs[penalized] += n_rows * (z - w)
+        if non_crossing:
+            rhs += A.T @ (g - v)
+        theta = cho_solve(factor, rhs)
+        fitted = A @ theta
+
+        # Proximal operator of the tilted loss
+        residual_old = residual
+        residual = Y - fitted + u
+        residual = residual - np.clip(residual, (tau - 1) / rho, tau / rho)
+
+        # Soft thresholding for the L1 penalty
+        z_old = z
+        z = theta[penalized] + w
+        z = np.sign(z) * np.maximum(np.abs(z) - threshold / (n_rows * rho), 0)
+
+        if non_crossing:
+            g_old = g
+            g = _project_non_crossing(fitted + v, quantile_order, n_quantiles)
+            v += fitted - g
+
+        primal = Y - fitted - residual
+        u += primal
+        w += theta[penalized] - z
+        primal_norm = np.sqrt(
+            (primal**2).sum(axis=0) + n_rows * ((theta[penalized] - z) ** 2).sum(axis=0)
+        )
+        dual_change = A.T @ (residual - residual_old)
+        dual_change[penalized] += n_rows * (z - z_old)
+        if non_crossing:
+            primal_norm = np.sqrt(primal_norm**2 + ((fitted - g) ** 2).sum(axis=0))
+            dual_change -= A.T @ (g - g_old)
+        dual_norm = rho * np.sqrt((dual_change**2).sum(axis=0))
+
+        y_norm = np.sqrt((Y**2).sum(axis=0)) + 1
+        converged = np.all(primal_norm <= tol * y_norm) and np.all(dual_norm <= tol * y_norm)
+        if converged:
+            break
+
+        if n_iter % 10 != 0 or n_iter > _RHO_UPDATE_ITERATIONS:
+            continue
+        # Balance the primal and dual residuals. The factorization does not depend on rho
+        factor_rho = np.where(
+            primal_norm > 10 * dual_norm, 2.0, np.where(dual_norm > 10 * primal_norm, 0.5, 1.0)
+        )
+        rho *= factor_rho
+        u /= factor_rho
+        w /= factor_rho
+        v /= factor_rho
+
+    if not converged:
+        warnings.warn(
+            f"The ADMM solver did not converge within max_iter={max_iter} iterations. "
+            "Increase max_iter or tol",
+            ConvergenceWarning,
+        )
+
+    # Back to the original scale
+    output_scale = np.tile(y_scale, n_quantiles)
+    coef = z / x_scale[:, np.newaxis] * output_scale
+    intercept = np.tile(y_center, n_quantiles).astype(float)
+    if fit_intercept:
+        intercept += theta[0] * output_scale - x_mean @ coef
+    return coef, intercept, n_iter
@@ -20,16 +20,27 @@ class SamShapExplainer(object):
         A shap explainer object. This will be used to generate the actual shap values
     model: BaseTimeseriesRegressor model
         This will be used to do the preprocessing before calling explainer.shap_values
+    preprocess_predict: Callable
+        The preprocessing function of the model
+    n_background: int, optional (default=1)
+        The number of rows of the background data of the explainer. Used to estimate the memory
+        needed to explain a row in `shap_values`.
     """
 
-    def __init__(self, explainer: Callable, model: Callable, preprocess_predict: Callable) -> None:
+    def __init__(
+        self,
+        explainer: Callable,
+        model: Callable,
+        preprocess_predict: Callable,
+        n_background: int = 1,
+    ) -> None:
         self.explainer = explainer
         self.preprocess_predict = preprocess_predict
+        self.n_background = n_background
 
         # Create a proxy model that can call only 3 attributes we need
         class SamProxyModel:
             fit = None
-            use_y_as_feature = model.use_y_as_feature
             feature_names_ = model.get_feature_names_out()
             preprocess_predict = self.preprocess_predict
 
@@ -39,11 +50,21 @@ class SamShapExplainer(object):
         # Will likely be somewhere around 0
         self.expected_value = explainer.expected_value
 
-    def shap_values(self, X: pd.DataFrame, y: pd.Series = None, *args, **kwargs) -> np.array:
+    def shap_values(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series = None,
+        *args,
+        max_batch_bytes: int = 256 * 1024**2,
+        **kwargs,
+    ) -> np.array:
         """
         Imitates explainer.shap_values, but combined with the preprocessing from the model.
-        Returns a similar format as a regular shap explainer: a list of numpy arrays, one
-        for each output of the model.
+        Returns the same format as the underlying shap explainer, for example a list of numpy
+        arrays, one for each output of the model.
+
+        The explainer evaluates every row against all rows of the background data, so large X
+        are explained in chunks of rows, that need at most about `max_batch_bytes` each.
 
         Parameters
         ----------
@@ -51,9 +72,24 @@ class SamShapExplainer(object):
             The dataframe used to 'train' the explainer
         y: pd.Series, optional (default=None)
             Target data used to 'train' the explainer.
+        max_batch_bytes: int, optional (default=256 * 1024 ** 2)
+            The approximate memory limit of a chunk of rows. At least one row is explained at a
+            time.
         """
-        X_transformed = self.model.preprocess_predict(X, y, dropna=False)
-        return self.explainer.shap_values(X_transformed, *args, **kwargs)
+        X_transformed = np.asarray(self.model.preprocess_predict(X, y, dropna=False))
+        bytes_per_row = max(X_transformed[:1].nbytes * self.n_background, 1)
+        batch_size = max(1, max_batch_bytes // bytes_per_row)
+        if X_transformed.shape[0] <= batch_size:
+            return self.explainer.shap_values(X_transformed, *args, **kwargs)
+
+        batches = [
+            self.explainer.shap_values(X_transformed[start : start + batch_size], *args, **kwargs)
+            for start in range(0, X_transformed.shape[0], batch_size)
+        ]
+        if isinstance(batches[0], list):
+            # One array per output of the model
+            return [np.concatenate(output) for output in zip(*batches)]
+        return np.concatenate(batches)
 
     def attributions(self, X: pd.DataFrame, y: pd.Series = None, *args, **kwargs) -> np.array:
         """
@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_array_almost_equal
+from pandas.testing import assert_frame_equal
+from sam.feature_engineering import SimpleFeatureEngineer
+from sam.models import LassoTimeseriesRegressor, fit_fleet
+from sam.models.fleet import _folder_names, _read_series, _write_arrays
+from sam.preprocessing import wide_to_sam_format
+
+
+def get_fleet_data():
+    times = pd.date_range("2022-01-01", periods=50, freq="15min", tz="Europe/Amsterdam")
+    frames = []
+    for i, series_id in enumerate(["a", "b", "c"]):
+        wide = pd.DataFrame(
+            {
+                "TIME": times,
+                "flow": np.sin(np.arange(50) / (i + 3)),
+                "level": np.linspace(0, i, 50),
+            }
+        )
+        frames.append(wide_to_sam_format(wide, sep=None, idvalue=series_id))
+    # Shuffle the rows, the trainer should sort them
+    return pd.concat(frames).sample(frac=1, random_state=42)
+
+
+def get_model():
+    fe = SimpleFeatureEngineer(rolling_features=[("flow", "lag", 1)], keep_original=True)
+    return LassoTimeseriesRegressor(predict_ahead=(1,), feature_engineer=fe, alpha=1e-4)
+
+
+def test_read_series(tmp_path):
+    data = get_fleet_data()
+    ids, types, offsets = _write_arrays(data, str(tmp_path))
+    assert ids == ["a", "b", "c"]
+    assert_array_almost_equal(offsets, [0, 100, 200, 300])
+
+    series = _read_series(str(tmp_path), offsets[1], offsets[2], types, "Europe/Amsterdam")
+    expected = (
+        data[data["ID"] == "b"]
+        .pivot_table(values="VALUE", index="TIME", columns="TYPE")
+        .rename_axis(columns=None)
+    )
+    assert_frame_equal(series, expected, check_freq=False, check_names=False)
+
+
+def test_write_arrays_integer_ids(tmp_path):
+    # The original ids are kept, and the blocks follow their order, not their string order
+    data = get_fleet_data()
+    data["ID"] = data["ID"].map({"a": 2, "b": 10, "c": 1})
+    ids, _, offsets = _write_arrays(data, str(tmp_path))
+    assert ids == [1, 2, 10]
+    assert_array_almost_equal(offsets, [0, 100, 200, 300])
+
+
+def test_fit_fleet(tmp_path):
+    data = get_fleet_data()
+    # A series without the target fails, but does not stop the others
+    data.loc[(data["ID"] == "c") & (data["TYPE"] == "flow"), "TYPE"] = "other"
+    report = fit_fleet(data, get_model(), target="flow", foldername=str(tmp_path), n_jobs=2)
+
+    assert report["ID"].tolist() == ["a", "b", "c"]
+    assert report["success"].tolist() == [True, True, False]
+    assert "KeyError" in report["error"].iloc[2]
+    assert (report["wall_time"] > 0).all()
+    assert (report["peak_rss"] > 0).all()
+
+    assert report["folder"].tolist() == [str(tmp_path / series_id) for series_id in "abc"]
+    model = LassoTimeseriesRegressor.load(str(tmp_path / "a"))
+    X = _read_series_from_frame(data, "a")
+    expected = get_model().fit(X, X["flow"])
+    assert_array_almost_equal(
+        model.model_[0].estimators_[0].coef_, expected.model_[0].estimators_[0].coef_
+    )
+
+
+def test_fit_fleet_unsafe_ids(tmp_path):
+    data = get_fleet_data()
+    data["ID"] = data["ID"].map({"a": "../a", "b": "B/1", "c": "c"})
+    # The template is cloned, so it may already be fitted
+    model = get_model()
+    X = _read_series_from_frame(data, "c")
+    model.fit(X, X["flow"])
+    report = fit_fleet(data, model, target="flow", foldername=str(tmp_path / "models"))
+
+    assert report["ID"].tolist() == ["../a", "B/1", "c"]
+    assert report["success"].all()
+    assert not (tmp_path / "a").exists()
+    for folder in report["folder"]:
+        assert os.path.dirname(folder) == str(tmp_path / "models")
+        LassoTimeseriesRegressor.load(folder)
+
+
+def test_folder_names():
+    names = _folder_names(["a", "../a", "a/b", "a_b", "CON", "", "X", "x", 10])
+    assert names[0] == "a"
+    assert names[3] == "a_b"
+    assert names[8] == "10"
+    assert all(
+        name.startswith(prefix)
+        for name, prefix in zip([names[i] for i in [1, 2, 4, 5]], ["___a_", "a_b_", "CON_", "_"])
+    )
+    # Unique, also on case-insensitive file systems, and without path separators or dots
+    assert len({name.lower() for name in names}) == len(names)
+    assert not any(set("/\\.") & set(name) for name in names)
+
+
+def _read_series_from_frame(data, series_id):
+    X = data[data["ID"] == series_id].pivot_table(values="VALUE", index="TIME", columns="TYPE")
+    return X.rename_axis(columns=None)
@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+from pandas.testing import assert_frame_equal
+from sam.feature_engineering.simple_feature_engineering import SimpleFeatureEngineer
+from sam.models import GradientBoostingTimeseriesRegressor, gradient_boosting_model
+from sam.models.tests.utils import (
+    assert_get_actual,
+    assert_performance,
+    assert_prediction,
+    get_dataset,
+    set_seed,
+)
+from sklearn.preprocessing import StandardScaler
+
+
+@set_seed
+def train_gradient_boosting(
+    X, y, predict_ahead, quantiles, average_type, use_diff_of_y, y_scaler, **kwargs
+):
+    fe = SimpleFeatureEngineer(keep_original=True)
+    model = GradientBoostingTimeseriesRegressor(
+        predict_ahead=predict_ahead,
+        quantiles=quantiles,
+        use_diff_of_y=use_diff_of_y,
+        y_scaler=y_scaler,
+        feature_engineer=fe,
+        average_type=average_type,
+        boosting_options={"min_samples_leaf": 2},  # make sure it can overfit for testing
+        **kwargs,
+    )
+    model.fit(X, y)
+    return model
+
+
+@pytest.mark.parametrize(
+    "predict_ahead,quantiles,average_type,use_diff_of_y,y_scaler,max_mae",
+    [
+        ((0,), (), "mean", False, None, 3),  # plain regression
+        ((0,), (0.1, 0.9), "mean", False, None, 3.0),  # quantile regression
+        ((0,), (), "median", False, None, 3.0),  # median prediction
+        ((0,), (), "mean", False, StandardScaler(), 3.0),  # scaler
+        ((1,), (), "mean", False, None, 3.0),  # forecast
+        ((1,), (), "mean", True, None, 3.0),  # use_diff_of_y
+        ((1, 2, 3), (), "mean", False, None, 3.0),  # multiforecast
+        ((1, 2, 3), (), "mean", True, None, 3.0),  # multiforecast with use_diff_of_y
+        ((1, 2, 3), (0.1, 0.5, 0.9), "mean", True, StandardScaler(), 3.0),  # all options
+    ],
+)
+def test_gradient_boosting(
+    predict_ahead,
+    quantiles,
+    average_type,
+    use_diff_of_y,
+    y_scaler,
+    max_mae,
+):
+    X, y = get_dataset()
+    model = train_gradient_boosting(
+        X, y, predict_ahead, quantiles, average_type, use_diff_of_y, y_scaler
+    )
+    assert_get_actual(model, X, y, predict_ahead)
+    for force_monotonic_quantiles in (False, True):
+        assert_prediction(
+            model=model,
+            X=X,
+            y=y,
+            quantiles=quantiles,
+            predict_ahead=predict_ahead,
+            force_monotonic_quantiles=force_monotonic_quantiles,
+        )
+    assert_performance(
+        pred=model.predict(X, y),
+        predict_ahead=predict_ahead,
+        actual=model.get_actual(y),
+        average_type=average_type,
+        max_mae=max_mae,
+    )
+
+
+def test_binning():
+    X, y = get_dataset()
+    model = train_gradient_boosting(X, y, (1,), (), "mean", False, None, max_bins=10)
+    assert len(model.bin_edges_) == 1
+    assert model.bin_edges_[0].size == 9
+
+    # The binned features have at most max_bins values, and keep their order
+    X_binned = model._bin(model.preprocess_predict(X, y))
+    assert np.unique(X_binned).size == 10
+    assert (np.diff(X_binned[:, 0]) >= 0).all()
+
+
+def test_n_jobs_and_validation_data():
+    X, y = get_dataset()
+    kwargs = dict(
+        predict_ahead=(1, 2),
+        quantiles=(0.1, 0.9),
+        feature_engineer=SimpleFeatureEngineer(keep_original=True),
+        boosting_options={"min_samples_leaf": 2},
+        random_state=42,
+    )
+    expected = GradientBoostingTimeseriesRegressor(**kwargs).fit(X, y)
+    model = GradientBoostingTimeseriesRegressor(n_jobs=2, **kwargs).fit(X, y)
+    assert_frame_equal(model.predict(X, y), expected.predict(X, y))
+    assert list(model.fit_times_.index) == model.prediction_cols_
+    assert (model.fit_times_ >= 0).all()
+
+    kwargs["boosting_options"] = {"min_samples_leaf": 2, "n_iter_no_change": 5}
+    model = GradientBoostingTimeseriesRegressor(max_iter=1000, **kwargs)
+    model.fit(X.iloc[:70], y.iloc[:70], validation_data=(X.iloc[70:], y.iloc[70:]))
+    assert all(estimator.n_iter_ < 1000 for estimator in model.model_)
+
+
+def test_fit_arguments(monkeypatch):
+    X, y = get_dataset()
+    kwargs = dict(
+        predict_ahead=(1, 2),
+        feature_engineer=SimpleFeatureEngineer(keep_original=True),
+        boosting_options={"min_samples_leaf": 2},
+    )
+    expected = GradientBoostingTimeseriesRegressor(**kwargs).fit(X, y).predict(X, y)
+    model = GradientBoostingTimeseriesRegressor(**kwargs)
+    model.fit(X, y, sample_weight=np.ones(len(X)))
+    assert_frame_equal(model.predict(X, y), expected)
+
+    with pytest.raises(TypeError, match="epochs"):
+        model.fit(X, y, epochs=10)
+    monkeypatch.setattr(gradient_boosting_model, "_supports_validation_data", lambda: False)
+    with pytest.raises(ValueError, match="scikit-learn 1.7"):
+        model.fit(X, y, validation_data=(X, y))
+
+
+def test_dump_load(tmp_path):
+    X, y = get_dataset()
+    model = train_gradient_boosting(X, y, (1, 2), (0.1, 0.9), "mean", False, None)
+    model.dump(tmp_path)
+    loaded = GradientBoostingTimeseriesRegressor.load(tmp_path)
+    assert_frame_equal(loaded.predict(X, y), model.predict(X, y))
+
+
+def test_median_in_quantiles():
+    with pytest.raises(ValueError):
+        GradientBoostingTimeseriesRegressor(quantiles=(0.5,), average_type="median")
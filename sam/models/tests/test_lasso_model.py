@@ -1,4 +1,9 @@
+import numpy as np
+import pandas as pd
 import pytest
+from numpy.testing import assert_array_equal
+from pandas.testing import assert_frame_equal
+from sam.feature_engineering import FeatureEngineer
 from sam.feature_engineering.simple_feature_engineering import SimpleFeatureEngineer
 from sam.models import LassoTimeseriesRegressor
 from sam.models.tests.utils import (
@@ -81,3 +86,182 @@ def test_lasso(
         average_type=average_type,
         max_mae=max_mae,
     )
+
+
+def test_preprocess_predict_array():
+    X, y = get_dataset()
+    model = train_lasso(X, y, (0,), (), "mean", False, None)
+    expected = model.preprocess_predict(X, y)
+    result = model.preprocess_predict(X, y, return_array=True)
+    assert_array_equal(result, expected.values)
+
+
+@pytest.mark.parametrize(
+    "rolling_features,use_diff_of_y,n_history",
+    [
+        ([("x", "lag", 3), ("x", "mean", 5)], False, 5),
+        ([("x", "lag", 2), ("x", "max", "10min")], True, 11),
+    ],
+)
+def test_update_and_predict(rolling_features, use_diff_of_y, n_history):
+    X, y = get_dataset()
+    fe = SimpleFeatureEngineer(rolling_features=rolling_features, keep_original=True)
+    model = LassoTimeseriesRegressor(
+        predict_ahead=(1, 2), use_diff_of_y=use_diff_of_y, feature_engineer=fe, alpha=1e-6
+    )
+    model.fit(X.iloc[:80], y.iloc[:80])
+    assert_frame_equal(model._history, X.iloc[80 - n_history : 80])
+
+    # The first rows have missing features, which the model does not accept
+    X_transformed = model.preprocess_predict(X, y).iloc[80:]
+    prediction = np.concatenate([m.predict(X_transformed) for m in model.model_], axis=1)
+    expected = model.postprocess_predict(prediction, X.iloc[80:], y.iloc[80:])
+    predictions = [
+        model.update_and_predict(X.iloc[start : start + 7], y.iloc[start : start + 7])
+        for start in (80, 87)
+    ]
+    assert_frame_equal(model._history, X.iloc[94 - n_history : 94])
+
+    # predict_latest does not change the history
+    predictions.append(model.predict_latest(X.iloc[94:], y.iloc[94:]))
+    assert_frame_equal(pd.concat(predictions), expected)
+    assert_frame_equal(model._history, X.iloc[94 - n_history : 94])
+
+    # The history is passed explicitly, so predict is not affected by streaming
+    history = model._history
+    assert_frame_equal(model.predict(X.iloc[94:], y.iloc[94:], history=history), predictions[-1])
+    assert_frame_equal(model.predict(X, y).iloc[94:], predictions[-1])
+
+
+def test_update_and_predict_unknown_lookback():
+    X, y = get_dataset()
+    # Exponentially weighted features depend on the entire history
+    fe = FeatureEngineer(lambda X: X.ewm(alpha=0.5).mean())
+    model = LassoTimeseriesRegressor(predict_ahead=(1,), feature_engineer=fe, alpha=1e-6)
+    model.fit(X.iloc[:80], y.iloc[:80])
+    assert model.get_lookback() is None
+    with pytest.raises(ValueError, match="lookback"):
+        model.update_and_predict(X.iloc[80:], y.iloc[80:])
+    with pytest.raises(ValueError, match="lookback"):
+        model.predict_latest(X.iloc[80:], y.iloc[80:])
+
+
+def test_make_prediction_monotonic():
+    X, y = get_dataset()
+    quantiles = (0.9, 0.1, 0.75, 0.25, 0.5, 0.95)
+    model = train_lasso(X, y, (1, 2, 3), quantiles, "mean", False, None)
+    rng = np.random.default_rng(42)
+    values = rng.normal(size=(50, len(model.prediction_cols_)))
+    values[3, 0] = np.nan
+    prediction = pd.DataFrame(values, columns=model.prediction_cols_)
+
+    # Reference: aggregate every prefix of the quantiles of each horizon
+    expected = prediction.copy()
+    for p in model.predict_ahead:
+        upper = [f"predict_lead_{p}_q_{q}" for q in (0.75, 0.9, 0.95)]
+        lower = [f"predict_lead_{p}_q_{q}" for q in (0.25, 0.1)]
+        for band, func in [(upper, "max"), (lower, "min")]:
+            for i in range(1, len(band)):
+                expected[band[i]] = getattr(expected[band[: i + 1]], func)(axis=1)
+
+    assert_frame_equal(model.make_prediction_monotonic(prediction), expected)
+
+
+def test_postprocess_predict():
+    X, y = get_dataset()
+    quantiles = (0.1, 0.15, 0.9)
+    model = train_lasso(X, y, (1, 2), quantiles, "mean", True, StandardScaler())
+    rng = np.random.default_rng(42)
+    raw = rng.normal(size=(X.shape[0], len(model.prediction_cols_)))
+
+    # Reference: inverse scale every output group separately, then add y
+    expected = pd.DataFrame(raw, columns=model.prediction_cols_, index=X.index)
+    for output in [f"q_{q}" for q in quantiles] + ["mean"]:
+        cols = [f"predict_lead_{p}_{output}" for p in (1, 2)]
+        expected[cols] = model.y_scaler.inverse_transform(expected[cols].values)
+    expected = expected.add(y, axis=0)
+
+    result = model.postprocess_predict(raw, X, y)
+    assert_frame_equal(result, expected)
+    result = model.postprocess_predict(raw, X, y, force_monotonic_quantiles=True)
+    assert_frame_equal(result, model.make_prediction_monotonic(expected))
+
+
+def test_n_jobs_and_warm_start():
+    X, y = get_dataset()
+    kwargs = dict(
+        predict_ahead=(1, 2, 3),
+        quantiles=(0.1, 0.9),
+        feature_engineer=SimpleFeatureEngineer(keep_original=True),
+        alpha=1e-6,
+    )
+    expected = LassoTimeseriesRegressor(**kwargs).fit(X, y)
+    model = LassoTimeseriesRegressor(n_jobs=2, **kwargs).fit(X, y)
+    assert_frame_equal(model.predict(X, y), expected.predict(X, y))
+    assert list(model.fit_times_.index) == model.prediction_cols_
+    assert (model.fit_times_ >= 0).all()
+
+    warm_started = LassoTimeseriesRegressor(warm_start=True, **kwargs).fit(X, y)
+    assert_frame_equal(warm_started.predict(X, y), expected.predict(X, y), atol=1e-3)
+
+
+def test_stacked_coefficients(tmp_path):
+    X, y = get_dataset()
+    model = LassoTimeseriesRegressor(
+        predict_ahead=(1, 2),
+        quantiles=(0.1, 0.9),
+        feature_engineer=SimpleFeatureEngineer(keep_original=True),
+        alpha=1e-6,
+    ).fit(X, y)
+    assert model.coef_.shape == (1, 6)
+    assert model.intercept_.shape == (6,)
+
+    X_transformed = model.preprocess_predict(X, y).iloc[1:]
+    prediction = np.concatenate([m.predict(X_transformed) for m in model.model_], axis=1)
+    expected = model.postprocess_predict(prediction, X.iloc[1:], y.iloc[1:])
+    assert_frame_equal(model.predict(X.iloc[1:], y.iloc[1:]), expected)
+
+    # A compact dump only has the stacked coefficients
+    model.dump(tmp_path / "full")
+    model.dump(tmp_path / "compact", compact=True)
+    assert model.model_ is not None
+    full_size = (tmp_path / "full" / "model.pkl").stat().st_size
+    assert (tmp_path / "compact" / "model.pkl").stat().st_size < full_size
+    loaded = LassoTimeseriesRegressor.load(tmp_path / "compact")
+    assert loaded.model_ is None
+    assert_frame_equal(loaded.predict(X.iloc[1:], y.iloc[1:]), expected)
+
+    # Models without stacked coefficients, saved by older versions, can still predict
+    del model.coef_, model.intercept_
+    assert_frame_equal(model.predict(X.iloc[1:], y.iloc[1:]), expected)
+
+
+@pytest.mark.parametrize("average_type", ["mean", "median"])
+def test_admm_solver(average_type):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {"x": rng.normal(size=500), "z": rng.normal(size=500)},
+        index=pd.date_range("2020-01-01", periods=500, freq="h"),
+    )
+    y = pd.Series(3 * X["x"] + rng.normal(size=500) * (1 + X["z"].abs()), index=X.index)
+    kwargs = dict(
+        predict_ahead=(1, 2),
+        quantiles=(0.1, 0.9),
+        average_type=average_type,
+        feature_engineer=SimpleFeatureEngineer(keep_original=True),
+        alpha=0.01,
+    )
+    linprog = LassoTimeseriesRegressor(**kwargs).fit(X, y)
+    admm = LassoTimeseriesRegressor(
+        solver="admm", solver_options={"tol": 1e-4, "max_iter": 5000}, **kwargs
+    )
+    admm.fit(X, y)
+    assert_frame_equal(admm.predict(X, y), linprog.predict(X, y), atol=0.1)
+    assert admm.model_[0].estimators_[0].n_iter_ > 0
+
+    non_crossing = LassoTimeseriesRegressor(solver="admm", non_crossing=True, **kwargs)
+    prediction = non_crossing.fit(X, y).predict(X, y)
+    assert (prediction["predict_lead_1_q_0.1"] <= prediction["predict_lead_1_q_0.9"]).all()
+
+    with pytest.raises(ValueError):
+        LassoTimeseriesRegressor(non_crossing=True, **kwargs).fit(X, y)
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+
+import pytest
+from sam.models.tests.utils import get_dataset
+
+# If tensorflow is not available, skip the tests that need to fit a keras model
+skipkeras = False
+try:
+    import tensorflow as tf  # noqa: F401
+except ImportError:
+    skipkeras = True
+
+HEAVY_MODULES = ["tensorflow", "shap", "eli5", "plotly", "matplotlib", "statsmodels"]
+
+
+def imported_modules(code):
+    """Runs code in a new python process, and returns the heavy modules that were imported"""
+    code += f"\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return [module for module in result.stdout.strip().split(",") if module]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import sam.models",
+        "import sam.validation",
+        "import sam.metrics",
+        "from sam.models import LassoTimeseriesRegressor, NumpyMLP",
+        "from sam.validation import MADValidator",
+    ],
+)
+def test_no_heavy_imports(code):
+    assert imported_modules(code) == []
+
+
+@pytest.mark.skipif(skipkeras, reason="Keras backend not found")
+def test_lazy_attributes():
+    assert "tensorflow" in imported_modules("from sam.metrics import R2Evaluation")
+    from sam.models import MLPTimeseriesRegressor, create_keras_quantile_mlp  # noqa: F401
+
+
+@pytest.mark.skipif(skipkeras, reason="Keras backend not found")
+def test_load_numpy_runtime_without_tensorflow(tmp_path):
+    from sam.models import MLPTimeseriesRegressor
+
+    X, y = get_dataset()
+    model = MLPTimeseriesRegressor(n_neurons=4, epochs=1, verbose=0)
+    model.fit(X, y)
+    model.dump(tmp_path, numpy_runtime=True)
+    code = (
+        "from sam.models import MLPTimeseriesRegressor\n"
+        f"model = MLPTimeseriesRegressor.load({str(tmp_path)!r}, numpy_runtime=True)"
+    )
+    assert imported_modules(code) == []
@@ -1,6 +1,12 @@
+import gc
+import weakref
+
+import numpy as np
 import pytest
+from numpy.testing import assert_array_almost_equal
+from pandas.testing import assert_frame_equal
 from sam.feature_engineering.simple_feature_engineering import SimpleFeatureEngineer
-from sam.models import MLPTimeseriesRegressor
+from sam.models import MLPTimeseriesRegressor, NumpyMLP
 from sam.models.tests.utils import (
     assert_get_actual,
     assert_performance,
@@ -17,6 +23,12 @@ try:
 except ImportError:
     skipkeras = True
 
+skipshap = False
+try:
+    import shap  # noqa: F401
+except ImportError:
+    skipshap = True
+
 
 @set_seed
 def train_mlp(X, y, predict_ahead, quantiles, average_type, use_diff_of_y, y_scaler):
@@ -91,3 +103,160 @@ def test_mlp(
         average_type=average_type,
         max_mae=max_mae,
     )
+
+
+@pytest.mark.skipif(skipkeras, reason="Keras backend not found")
+def test_numpy_runtime(tmp_path):
+    X, y = get_dataset()
+    fe = SimpleFeatureEngineer(keep_original=True)
+    model = MLPTimeseriesRegressor(
+        predict_ahead=(1, 2),
+        quantiles=(0.1, 0.9),
+        feature_engineer=fe,
+        n_neurons=8,
+        momentum=0.9,
+        dropout=0.2,
+        epochs=2,
+        verbose=0,
+    )
+    model.fit(X, y)
+    expected = model.predict(X, y)
+    X_transformed = model.preprocess_predict(X, y, return_array=True)
+
+    runtime = NumpyMLP.from_keras(model.model_)
+    assert len(runtime.weights) == 3  # batch normalization and dropout are folded away
+    assert_array_almost_equal(runtime.predict(X_transformed), model.model_.predict(X_transformed))
+
+    model.dump(tmp_path, numpy_runtime=True)
+    loaded = MLPTimeseriesRegressor.load(tmp_path, numpy_runtime=True)
+    assert isinstance(loaded.model_, NumpyMLP)
+    assert_frame_equal(loaded.predict(X, y), expected, atol=1e-4)
+
+    # A model with the runtime as model_ can be dumped and loaded again
+    (tmp_path / "runtime").mkdir()
+    loaded.dump(tmp_path / "runtime")
+    loaded = MLPTimeseriesRegressor.load(tmp_path / "runtime", numpy_runtime=True)
+    assert_frame_equal(loaded.predict(X, y), expected, atol=1e-4)
+
+
+@pytest.mark.skipif(skipkeras, reason="Keras backend not found")
+def test_tf_data():
+    X, y = get_dataset()
+    X_train, y_train, X_val, y_val = X.iloc[:70], y.iloc[:70], X.iloc[70:], y.iloc[70:]
+
+    def chunks():
+        for start in range(0, 70, 35):
+            yield X_train.iloc[start : start + 35], y_train.iloc[start : start + 35]
+
+    for use_tf_data, fit_kwargs in [(True, {}), (False, {"chunks": chunks})]:
+        model = MLPTimeseriesRegressor(
+            predict_ahead=(1, 2),
+            quantiles=(0.1, 0.9),
+            feature_engineer=SimpleFeatureEngineer(keep_original=True),
+            n_neurons=8,
+            epochs=2,
+            verbose=0,
+            r2_callback_report=True,
+            use_tf_data=use_tf_data,
+        )
+        history = model.fit(X_train, y_train, validation_data=(X_val, y_val), **fit_kwargs)
+        assert len(history.history["val_loss"]) == 2
+        assert len(history.history["val_r2"]) == 2
+        assert model.predict(X_val, y_val).shape == (30, 6)
+
+
+@pytest.mark.skipif(skipkeras, reason="Keras backend not found")
+def test_r2_callback_kwargs():
+    X, y = get_dataset()
+    model = MLPTimeseriesRegressor(
+        predict_ahead=(1,),
+        feature_engineer=SimpleFeatureEngineer(keep_original=True),
+        n_neurons=8,
+        epochs=3,
+        verbose=0,
+        r2_callback_report=True,
+        r2_callback_kwargs={"frequency": 2, "max_train_rows": 20, "random_state": 42},
+    )
+    history = model.fit(X.iloc[:70], y.iloc[:70], validation_data=(X.iloc[70:], y.iloc[70:]))
+    # Evaluated at the second and the last epoch only
+    assert len(history.history["val_loss"]) == 3
+    assert len(history.history["r2"]) == 2
+    assert len(history.history["val_r2"]) == 2
+
+
+@pytest.mark.skipif(skipkeras, reason="Keras backend not found")
+def test_quantile_feature_importances():
+    X, y = get_dataset()
+    X["noise"] = np.random.default_rng(0).normal(size=X.shape[0])
+    model = train_mlp(X, y, (1, 2), (0.1, 0.9), "mean", False, None)
+
+    importances = model.quantile_feature_importances(X, y, n_iter=3, random_state=0)
+    assert importances.shape == (3, 2)
+    # The target is 17 times x, so x must be by far the most important feature
+    assert importances.mean().idxmin() == "x"
+
+    # The batch size does not change the result
+    small_batches = model.quantile_feature_importances(
+        X, y, n_iter=3, random_state=0, max_batch_bytes=1
+    )
+    assert_frame_equal(small_batches, importances)
+
+    per_output = model.quantile_feature_importances(X, y, n_iter=2, per_output=True)
+    assert per_output.shape == (6 * 2, 2)
+    assert list(per_output.index.unique("output")) == model.prediction_cols_
+
+
+def test_quantile_feature_importances_legacy_score():
+    X, y = get_dataset()
+    model = train_mlp(X, y, (1,), (), "mean", False, None)
+
+    def mse(y_true, y_pred):
+        return np.mean((y_true - y_pred) ** 2)
+
+    def legacy_mse(X, y, model):
+        return np.mean((y - model.predict(X, verbose=0)[:, -1]) ** 2)
+
+    expected = model.quantile_feature_importances(X, y, score=mse, n_iter=2, random_state=0)
+    with pytest.warns(FutureWarning):
+        result = model.quantile_feature_importances(
+            X, y, score=legacy_mse, n_iter=2, random_state=0
+        )
+    assert_frame_equal(result, expected, rtol=1e-3)
+
+
+@pytest.mark.skipif(skipkeras or skipshap, reason="Keras backend or shap not found")
+@pytest.mark.parametrize("method", ["kmeans", "time_of_day", "sample"])
+def test_explainer(tmp_path, method):
+    X, y = get_dataset()
+    model = MLPTimeseriesRegressor(
+        predict_ahead=(1, 2),
+        feature_engineer=SimpleFeatureEngineer(keep_original=True),
+        n_neurons=8,
+        epochs=1,
+        verbose=0,
+    )
+    model.fit(X, y)
+
+    background = model.fit_background(X, y, method=method, n_samples=10, random_state=0)
+    assert background.shape == (10, 1)
+    explainer = model.get_explainer()
+    assert model.get_explainer() is explainer
+    assert model.get_explainer(use_cache=False) is not explainer
+    assert model.get_explainer() is explainer
+
+    # Explaining in small chunks gives the same result
+    shap_values = explainer.shap_values(X.iloc[:20], y.iloc[:20])
+    chunked = explainer.shap_values(X.iloc[:20], y.iloc[:20], max_batch_bytes=1)
+    assert_array_almost_equal(np.asarray(chunked), np.asarray(shap_values), decimal=5)
+
+    # The background is saved with the model
+    model.dump(tmp_path)
+    loaded = MLPTimeseriesRegressor.load(tmp_path)
+    assert_array_almost_equal(loaded.shap_background_, background)
+    assert not hasattr(loaded, "_explainer_cache_")
+
+    # The cached explainer does not keep the model alive
+    model_ref = weakref.ref(model)
+    del model, explainer
+    gc.collect()
+    assert model_ref() is None
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_almost_equal
+from sam.metrics import tilted_loss
+from sam.models.quantile_admm import _isotonic_projection, admm_quantile_regression
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.isotonic import isotonic_regression
+from sklearn.linear_model import QuantileRegressor
+
+
+def test_isotonic_projection():
+    values = np.random.default_rng(0).normal(size=(50, 5))
+    expected = np.array([isotonic_regression(row) for row in values])
+    assert_array_almost_equal(_isotonic_projection(values), expected)
+
+
+@pytest.mark.parametrize("fit_intercept", [True, False])
+def test_admm_quantile_regression(fit_intercept):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 3)) * [1, 10, 0.1] + [0, 5, 0]
+    Y = X @ rng.normal(size=(3, 2)) + rng.normal(size=(500, 2)) * (1 + np.abs(X[:, [0]])) + 3
+    quantiles, alpha = [0.1, 0.5, 0.9], 0.01
+    coef, intercept, _ = admm_quantile_regression(
+        X, Y, quantiles, alpha=alpha, fit_intercept=fit_intercept, tol=1e-4, max_iter=2000
+    )
+    assert coef.shape == (3, 6)
+
+    # The objective is close to the exact solution of the linear program
+    for output, quantile in enumerate(np.repeat(quantiles, 2)):
+        y = Y[:, output % 2]
+        model = QuantileRegressor(quantile=quantile, alpha=alpha, fit_intercept=fit_intercept)
+        model.fit(X, y)
+        expected = tilted_loss(y, model.predict(X), quantile) + alpha * np.abs(model.coef_).sum()
+        prediction = X @ coef[:, output] + intercept[output]
+        result = tilted_loss(y, prediction, quantile) + alpha * np.abs(coef[:, output]).sum()
+        assert result == pytest.approx(expected, rel=1e-3)
+
+
+def test_non_crossing():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, 3))
+    Y = (X @ [1, 0.5, 0] + rng.standard_t(2, size=60)).reshape(-1, 1)
+    # The order of the quantiles does not matter
+    quantiles = [0.5, 0.45, 0.55]
+    crossing = []
+    for non_crossing in [False, True]:
+        coef, intercept, _ = admm_quantile_regression(
+            X, Y, quantiles, alpha=0, non_crossing=non_crossing, tol=1e-5, max_iter=5000
+        )
+        prediction = (X @ coef + intercept)[:, [1, 0, 2]]
+        crossing.append(np.diff(prediction, axis=1).min())
+    assert crossing[0] < -0.1
+    assert crossing[1] > -0.01
+
+
+def test_convergence_warning():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(100, 2))
+    Y = X @ [[1.0], [2.0]] + rng.normal(size=(100, 1))
+    with pytest.warns(ConvergenceWarning):
+        _, _, n_iter = admm_quantile_regression(X, Y, [0.1, 0.9], alpha=0.01, max_iter=2)
+    assert n_iter == 2
@@ -84,6 +84,9 @@ class TestConstantTimeseriesRegressor(unittest.TestCase):
         self.assertEqual(y_pred.shape, (20,))
         self.assertListEqual(list(y_pred.index), list(self.y_test.index))
 
+        # The differencing cannot be undone without y
+        self.assertRaises(ValueError, model.predict, self.X_test)
+
     def test_dump_load(self):
         """Test if the model can be dumped and loaded"""
         temp_dir = tempfile.gettempdir()
@@ -1,6 +1,8 @@
 import logging
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
 from sam.logging_functions import log_new_columns
 
 logger = logging.getLogger(__name__)
@@ -136,23 +138,45 @@ def make_df_monotonic(df: pd.DataFrame, aggregate_func: str = "max") -> pd.DataF
     ------
     ValueError
         If the aggregate_func raises an exception.
+        If the dataframe contains non-numeric columns.
     """
     if df.empty:
         return df
 
-    df_copy = df.copy()
-
     _LEGAL_AGG_FUNC = ("min", "max")
     if aggregate_func not in _LEGAL_AGG_FUNC:
         raise ValueError(
             f"Illegal aggregate_func={aggregate_func}, please choose from {_LEGAL_AGG_FUNC}"
         )
 
-    for idx, col in enumerate(df_copy.columns):
-        if idx > 0:
-            df_copy[col] = getattr(df_copy.iloc[:, : idx + 1], aggregate_func)(axis=1)
+    non_numeric = [col for col, dtype in df.dtypes.items() if not is_numeric_dtype(dtype)]
+    if non_numeric:
+        raise ValueError(f"make_df_monotonic requires numeric columns, got {non_numeric}")
+
+    # A running maximum (or minimum) over the columns, instead of aggregating every prefix.
+    # fmax and fmin ignore missing values, like DataFrame.max and DataFrame.min
+    accumulate = np.fmax.accumulate if aggregate_func == "max" else np.fmin.accumulate
+    values = accumulate(df.to_numpy(dtype=float, na_value=np.nan), axis=1)
+
+    # Column i holds the max (or min) of columns 0..i, so it gets their common dtype
+    result = pd.DataFrame(
+        {
+            i: pd.Series(values[:, i], index=df.index).astype(
+                _common_dtype(df.dtypes.iloc[: i + 1])
+            )
+            for i in range(df.shape[1])
+        }
+    )
+    result.columns = df.columns
+    return result
+
 
-    return df_copy
+def _common_dtype(dtypes: pd.Series):
+    """Common numpy dtype of the given dtypes, float for (nullable) extension dtypes"""
+    try:
+        return np.result_type(*dtypes)
+    except TypeError:
+        return float
 
 
 def contains_nans(df: pd.DataFrame) -> pd.DataFrame:
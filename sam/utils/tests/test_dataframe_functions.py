@@ -108,6 +108,29 @@ class TestMakeDataFrameMonotonic(unittest.TestCase):
 
         assert_frame_equal(result, expected)
 
+    def test_mixed_dtypes(self):
+        df = pd.DataFrame(
+            {
+                "a": pd.Series([0, 2, 1], dtype=int),
+                "b": pd.Series([1, 1, 1], dtype=int),
+                "c": pd.Series([0.5, np.nan, 3.5], dtype=float),
+            }
+        )
+        result = make_df_monotonic(df)
+        expected = pd.DataFrame(
+            {
+                "a": pd.Series([0, 2, 1], dtype=int),
+                "b": pd.Series([1, 2, 1], dtype=int),
+                "c": pd.Series([1.0, 2.0, 3.5], dtype=float),
+            }
+        )
+
+        assert_frame_equal(result, expected)
+
+    def test_non_numeric(self):
+        self.df["text"] = "a"
+        self.assertRaises(ValueError, make_df_monotonic, self.df)
+
 
 if __name__ == "__main__":
     unittest.main()